@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,line-too-long,wrong-import-position
+
+"""
+Action plugin running infini_* modules in the controller's worker process.
+
+Modules that run on the controller, i.e. using a local connection, are normally
+shipped as AnsiballZ payloads and started in a fresh Python process per task and
+per loop item. Each process imports infinisdk, logs in, does one operation and
+logs out. When INFINIBOX_ACTION_IN_PROCESS is true in the controller's environment,
+this plugin instead calls the module's main() in the worker process that runs the
+task. Imports are paid once per task and the Infinibox session is kept for all items
+of a loop. Set INFINIBOX_SESSION_CACHE_DIR to also reuse sessions across tasks.
+
+The task's environment, e.g. INFINIBOX_USER and INFINIBOX_PASSWORD, is set in the
+worker process while the module runs. Tasks using other connections, become, an
+ansible_python_interpreter other than the controller's Python, or async, run the
+module as usual. So do all tasks unless INFINIBOX_ACTION_IN_PROCESS is true.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import atexit
+import io
+import json
+import multiprocessing.util
+import os
+import sys
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from importlib import import_module, reload
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes, to_native
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils import infinibox as infinibox_utils
+
+MODULES_PACKAGE = "ansible_collections.infinidat.infinibox.plugins.modules"
+MODULE_PROFILE = "legacy"  # Serialization profile of module arguments and results, as used by AnsiballZ payloads
+
+
+def is_in_process_enabled():
+    """ Return True if running modules in process is enabled by INFINIBOX_ACTION_IN_PROCESS. It is disabled by default. """
+    return boolean(os.environ.get("INFINIBOX_ACTION_IN_PROCESS", False), strict=False)
+
+
+def is_controller_python(interpreter):
+    """ Return True if an ansible_python_interpreter value, or None if unset, is the Python running this process """
+    if not interpreter or interpreter == "auto" or interpreter.startswith("auto_"):
+        return True
+    return os.path.realpath(interpreter) == os.path.realpath(sys.executable)
+
+
+@contextmanager
+def task_environment(environment):
+    """ Set environment variables, as a module process started with the task's environment would see them, then restore them """
+    saved_environment = {name: os.environ.get(name) for name in environment}
+    try:
+        for name, value in environment.items():
+            os.environ[name] = to_native(value)
+        yield
+    finally:
+        for name, value in saved_environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def keep_systems():
+    """
+    Keep systems logged in across module runs in this process.
+    Log out when the worker process exits. Ansible's workers are multiprocessing processes,
+    which run multiprocessing finalizers, not atexit handlers, when they exit.
+    """
+    if infinibox_utils.INFINIBOX_KEEP_SYSTEMS:
+        return
+    infinibox_utils.INFINIBOX_KEEP_SYSTEMS = True
+    multiprocessing.util.Finalize(None, infinibox_utils.logout_kept_systems, exitpriority=0)
+    atexit.register(infinibox_utils.logout_kept_systems)
+
+
+def run_module_in_process(module_name, module_args):
+    """
+    Run a module's main() in this process with module_args. Return its result.
+    The module is reloaded so that its module level state does not leak from a previous run.
+    """
+    keep_systems()
+    infinibox_utils.reset_module_run()
+
+    full_module_name = f"{MODULES_PACKAGE}.{module_name}"
+    try:
+        if full_module_name in sys.modules:
+            module = reload(sys.modules[full_module_name])
+        else:
+            module = import_module(full_module_name)
+    except ImportError as err:
+        return dict(failed=True, msg=f"Cannot import module {module_name}: {to_native(err)}")
+
+    output = io.StringIO()
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": module_args}))  # pylint: disable=protected-access
+    if hasattr(basic, "_ANSIBLE_PROFILE"):  # ansible-core 2.19 and later require a serialization profile
+        basic._ANSIBLE_PROFILE = MODULE_PROFILE  # pylint: disable=protected-access
+    try:
+        with redirect_stdout(output):
+            module.main()
+    except SystemExit:
+        pass  # exit_json() and fail_json() exit once the result is written
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        return dict(failed=True, msg=f"Module {module_name} failed: {to_native(err)}", exception=traceback.format_exc())
+    finally:
+        basic._ANSIBLE_ARGS = None  # pylint: disable=protected-access
+        if hasattr(basic, "_ANSIBLE_PROFILE"):
+            basic._ANSIBLE_PROFILE = None  # pylint: disable=protected-access
+
+    for line in reversed(output.getvalue().splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return dict(failed=True, msg=f"Module {module_name} returned no result", module_stdout=output.getvalue())
+
+
+class ActionModule(ActionBase):
+    """ Run infini_* modules in process when they run on the controller """
+
+    def can_run_in_process(self, task_vars):
+        """
+        Return True if the module may run in this process rather than as a separate module process.
+        Become and other interpreters cannot apply to this process, so such tasks run as usual.
+        """
+        interpreter = self._templar.template(task_vars.get("ansible_python_interpreter"))
+        return (
+            is_in_process_enabled()
+            and infinibox_utils.HAS_INFINISDK
+            and self._connection.transport == "local"
+            and not self._task.async_val
+            and not self._play_context.become
+            and is_controller_python(interpreter)
+        )
+
+    def run(self, tmp=None, task_vars=None):
+        """ Run the task's module in process, or as usual """
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_name = self._task.resolved_action or self._task.action
+        if not self.can_run_in_process(task_vars or {}):
+            result.update(self._execute_module(module_name=module_name, task_vars=task_vars))
+            return result
+
+        module_args = self._task.args.copy()
+        self._update_module_args(module_name, module_args, task_vars)
+        environment = {}
+        self._compute_environment_string(raw_environment_out=environment)
+        with task_environment(environment):
+            result.update(run_module_in_process(module_name.split(".")[-1], module_args))
+        return result
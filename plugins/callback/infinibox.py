@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,line-too-long,wrong-import-position
+
+""" Callback plugin summarizing the Infinibox REST calls of a playbook """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: infinibox
+type: aggregate
+version_added: 2.16.0
+short_description: Summarize the Infinibox REST calls made by infini_* tasks
+description:
+    - Aggregates the REST call statistics that infini_* modules add to their results as C(perf)
+      when INFINIBOX_PERF is true in their environment.
+    - At the end of the playbook, displays the number of calls, errors, bytes transferred and latency percentiles,
+      in total and per task, and the URL templates that took the most time, e.g. C(GET volumes/{id}).
+    - Percentiles across tasks are estimated from the latency histograms of the modules, so they are upper bounds.
+author: David Ohlemacher (@ohlemacher)
+requirements:
+    - Enable the callback using the callbacks_enabled setting.
+    - Set INFINIBOX_PERF to true in the environment of the infini_* tasks.
+options:
+  output_file:
+    description:
+      - Also write the summary as JSON to this file.
+    type: path
+    env:
+      - name: INFINIBOX_PERF_REPORT
+    ini:
+      - section: callback_infinibox
+        key: output_file
+  top:
+    description:
+      - Number of URL templates displayed, by total latency.
+    type: int
+    default: 10
+    env:
+      - name: INFINIBOX_PERF_TOP
+    ini:
+      - section: callback_infinibox
+        key: top
+'''
+
+import json
+
+from ansible.plugins.callback import CallbackBase
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import PERF_LATENCY_BUCKETS_MS
+
+PERF_COUNTERS = ('calls', 'errors', 'bytes_sent', 'bytes_received')
+
+
+def get_empty_perf():
+    """ Return a perf summary with no calls, to merge module perf summaries into """
+    return dict(
+        dict.fromkeys(PERF_COUNTERS, 0),
+        latency_ms=dict(total=0, max=0),
+        latency_histogram_ms={},
+        requests={},
+    )
+
+
+def merge_perf(total, perf):
+    """ Add a module's perf summary to total """
+    for counter in PERF_COUNTERS:
+        total[counter] += perf.get(counter, 0)
+    total['latency_ms']['total'] = round(total['latency_ms']['total'] + perf['latency_ms']['total'], 1)
+    total['latency_ms']['max'] = max(total['latency_ms']['max'], perf['latency_ms']['max'])
+    for bucket, count in perf['latency_histogram_ms'].items():
+        total['latency_histogram_ms'][bucket] = total['latency_histogram_ms'].get(bucket, 0) + count
+    for key, request in perf['requests'].items():
+        total_request = total['requests'].setdefault(key, dict(calls=0, total_ms=0, max_ms=0))
+        total_request['calls'] += request['calls']
+        total_request['total_ms'] = round(total_request['total_ms'] + request['total_ms'], 1)
+        total_request['max_ms'] = max(total_request['max_ms'], request['max_ms'])
+
+
+def get_histogram_percentile(histogram, percent, max_ms):
+    """
+    Return an upper bound, in ms, of a latency percentile of a histogram: the upper bound of the bucket holding it,
+    or max_ms, the largest latency, if lower. Return 0 if the histogram is empty.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    count = 0
+    for upper_bound in PERF_LATENCY_BUCKETS_MS:
+        count += histogram.get(str(upper_bound), 0)
+        if count * 100.0 >= percent * total:
+            return min(upper_bound, max_ms)
+    return max_ms
+
+
+def get_perf_line(perf):
+    """ Return a one line description of a perf summary """
+    histogram = perf['latency_histogram_ms']
+    max_ms = perf['latency_ms']['max']
+    return (
+        f"{perf['calls']} calls, {perf['errors']} errors, {perf['bytes_sent']} bytes sent, {perf['bytes_received']} bytes received, "
+        f"{perf['latency_ms']['total']} ms, p50 <= {get_histogram_percentile(histogram, 50, max_ms)} ms, "
+        f"p90 <= {get_histogram_percentile(histogram, 90, max_ms)} ms, p99 <= {get_histogram_percentile(histogram, 99, max_ms)} ms, "
+        f"max {max_ms} ms"
+    )
+
+
+class CallbackModule(CallbackBase):
+    """ Summarize the Infinibox REST calls of a playbook """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'infinidat.infinibox.infinibox'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.total = get_empty_perf()
+        self.tasks = {}  # Perf summaries and descriptions of tasks, keyed by task UUID, in the order they ran
+
+    def add_result(self, result):
+        """ Add the perf summaries of a task result, or of each of its loop items, to the task's and the total """
+        results = result._result.get('results', [result._result])  # pylint: disable=protected-access
+        perfs = [item['perf'] for item in results if isinstance(item, dict) and isinstance(item.get('perf'), dict)]
+        if not perfs:
+            return
+        task = result._task  # pylint: disable=protected-access
+        task_perf = self.tasks.setdefault(task._uuid, dict(name=task.get_name(), action=task.action, perf=get_empty_perf()))  # pylint: disable=protected-access
+        for perf in perfs:
+            merge_perf(task_perf['perf'], perf)
+            merge_perf(self.total, perf)
+
+    def v2_runner_on_ok(self, result):
+        """ Aggregate the perf of a successful task """
+        self.add_result(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        """ Aggregate the perf of a failed task """
+        self.add_result(result)
+
+    def v2_playbook_on_stats(self, stats):
+        """ Display, and write if requested, the summary """
+        if not self.tasks:
+            return
+
+        self._display.banner("INFINIBOX REST CALLS")
+        self._display.display(f"Total: {get_perf_line(self.total)}")
+        self._display.display("Tasks:")
+        for task in self.tasks.values():
+            self._display.display(f"  {task['name']} ({task['action']}): {get_perf_line(task['perf'])}")
+        self._display.display("Requests by total latency:")
+        requests = sorted(self.total['requests'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for key, request in requests[:self.get_option('top')]:
+            self._display.display(f"  {key}: {request['calls']} calls, {request['total_ms']} ms, max {request['max_ms']} ms")
+
+        output_file = self.get_option('output_file')
+        if output_file:
+            report = dict(total=self.total, tasks=list(self.tasks.values()))
+            try:
+                with open(output_file, 'w', encoding='utf-8') as report_file:
+                    json.dump(report, report_file, indent=2, sort_keys=True)
+            except (OSError, IOError) as err:
+                self._display.warning(f"Cannot write the Infinibox REST call summary to {output_file}: {err}")
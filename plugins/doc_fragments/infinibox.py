@@ -31,6 +31,10 @@ notes:
     if user and password arguments are not passed to the module directly
   - Ansible uses the infinisdk configuration file C(~/.infinidat/infinisdk.ini) if no credentials are provided.
     See U(http://infinisdk.readthedocs.io/en/latest/getting_started.html)
+  - Set the INFINIBOX_SESSION_CACHE_DIR environment variable to reuse Infinibox sessions across module invocations.
+    Sessions are stored, per system and user, in a file-locked cache within that directory on the host running the module.
+    A cached session is reused for INFINIBOX_SESSION_CACHE_TTL seconds (default 600) instead of logging in again.
+    Modules do not log out of cached sessions. If the Infinibox has expired a session, the module logs in again.
   - All Infinidat modules support check mode (--check). However, a dryrun that creates
     resources may fail if the resource dependencies are not met for a task.
     For example, consider a task that creates a volume in a pool.
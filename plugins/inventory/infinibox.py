@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,line-too-long,wrong-import-position
+
+""" Inventory plugin exposing Infinibox objects as Ansible hosts """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: infinibox
+version_added: 2.16.0
+short_description: Infinibox objects as inventory hosts
+description:
+    - Enumerates volumes, filesystems, pools, hosts, clusters and exports on an Infinibox and adds each as an inventory host.
+    - Each object type is listed using paginated queries limited to the fields required. One or a few API calls are made per object type,
+      not one per object.
+    - Inventory host names are the object type and object name, e.g. C(volume_db01) or C(export_/db01).
+    - Object fields are available as host variables prefixed by C(infinibox_).
+    - Objects are grouped by object type, e.g. C(infinibox_volumes), by pool, e.g. C(pool_pool01), and optionally by metadata,
+      e.g. C(metadata_owner_dba).
+    - Uses a YAML configuration file that ends with C(infinibox.yml) or C(infinibox.yaml).
+    - Enable the inventory cache to avoid enumerating the Infinibox on every run.
+author: David Ohlemacher (@ohlemacher)
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices: [ "infinidat.infinibox.infinibox" ]
+  system:
+    description:
+      - Infinibox Hostname or IPv4 Address.
+    type: str
+    required: true
+  user:
+    description:
+      - Infinibox User username.
+    type: str
+    env:
+      - name: INFINIBOX_USER
+  password:
+    description:
+      - Infinibox User password.
+    type: str
+    env:
+      - name: INFINIBOX_PASSWORD
+  object_types:
+    description:
+      - Object types to add to the inventory.
+    type: list
+    elements: str
+    default: [ "volumes", "filesystems", "pools", "hosts", "clusters", "exports" ]
+    choices: [ "volumes", "filesystems", "pools", "hosts", "clusters", "exports" ]
+  fields:
+    description:
+      - Fields to fetch, per object type, e.g. C({volumes: [size, used]}).
+      - The fields required to name and group objects are always fetched.
+      - Object types not listed use a default set of fields.
+    type: dict
+    default: {}
+  metadata:
+    description:
+      - Fetch the metadata of all objects, add it as the C(infinibox_metadata) host variable
+        and group objects by metadata key and value.
+    type: bool
+    default: false
+  page_size:
+    description:
+      - Number of objects fetched per API call.
+    type: int
+    default: 1000
+extends_documentation_fragment:
+    - constructed
+    - inventory_cache
+requirements:
+    - infinisdk
+'''
+
+EXAMPLES = r'''
+# ibox001.infinibox.yml
+plugin: infinidat.infinibox.infinibox
+system: ibox001
+object_types:
+  - volumes
+  - filesystems
+  - pools
+fields:
+  volumes: [size, used, provtype, write_protected]
+metadata: true
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/infinibox_inventory
+cache_timeout: 3600
+compose:
+  ansible_connection: "'local'"
+keyed_groups:
+  - key: infinibox_provtype
+    prefix: provtype
+'''
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import to_native
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
+    iter_paginated_results,
+)
+
+# Collection, inventory host name prefix, name field and default fields of each object type
+OBJECT_TYPES = {
+    'volumes': ('volume', 'name', ['type', 'size', 'used', 'provtype', 'write_protected', 'serial', 'pool_id']),
+    'filesystems': ('fs', 'name', ['type', 'size', 'used', 'provtype', 'write_protected', 'pool_id']),
+    'pools': ('pool', 'name', ['physical_capacity', 'virtual_capacity', 'free_physical_space', 'free_virtual_space', 'state']),
+    'hosts': ('host', 'name', ['host_type', 'luns_count', 'host_cluster_id', 'security_method']),
+    'clusters': ('cluster', 'name', ['host_type', 'luns_count']),
+    'exports': ('export', 'export_path', ['filesystem_id', 'enabled', 'pref_readdir', 'privileged_port']),
+}
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    """ Add Infinibox objects to the inventory """
+
+    NAME = 'infinidat.infinibox.infinibox'
+
+    def verify_file(self, path):
+        """ Return true if path is an infinibox inventory configuration file """
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('infinibox.yml', 'infinibox.yaml'))
+
+    def get_system(self):
+        """ Log in to the Infinibox """
+        from infinisdk import InfiniBox  # pylint: disable=import-outside-toplevel  # Slow to import, so only when used
+        user = self.get_option('user')
+        password = self.get_option('password')
+        auth = None
+        if user and password:
+            auth = (user, password)
+        system = InfiniBox(self.get_option('system'), auth=auth, use_ssl=True)
+        try:
+            system.login()
+        except Exception as err:
+            raise AnsibleError(f"Infinibox authentication failed. Check your credentials: {to_native(err)}") from err
+        return system
+
+    def get_fields(self, object_type):
+        """ Return the fields to fetch for an object type """
+        _, name_field, default_fields = OBJECT_TYPES[object_type]
+        fields = self.get_option('fields').get(object_type, default_fields)
+        required_fields = {'id', name_field}
+        if 'pool_id' in default_fields:
+            required_fields.add('pool_id')
+        return sorted(set(fields) | required_fields)
+
+    def fetch_objects(self):
+        """
+        Return a cacheable dict of the listed objects of each object type, the pool names,
+        and the metadata of all objects keyed by object id.
+        """
+        system = self.get_system()
+        page_size = self.get_option('page_size')
+        results = dict(objects={}, pool_names={}, metadata={})
+        try:
+            for object_type in self.get_option('object_types'):
+                url = f"{object_type}?fields={','.join(self.get_fields(object_type))}"
+                results['objects'][object_type] = list(iter_paginated_results(system, url, page_size=page_size))
+
+            pool_results = results['objects'].get('pools')
+            if pool_results is None:
+                pool_results = iter_paginated_results(system, 'pools?fields=id,name', page_size=page_size)
+            results['pool_names'] = {str(pool['id']): pool['name'] for pool in pool_results}
+
+            if self.get_option('metadata'):
+                for entry in iter_paginated_results(system, 'metadata', page_size=page_size):
+                    object_metadata = results['metadata'].setdefault(str(entry['object_id']), {})
+                    object_metadata[entry['key']] = entry['value']
+        finally:
+            system.logout()
+        return results
+
+    def populate(self, results):
+        """ Add objects to the inventory as hosts with groups and host variables """
+        strict = self.get_option('strict')
+        system_name = self.get_option('system')
+        for object_type, objects in results['objects'].items():
+            host_prefix, name_field, _ = OBJECT_TYPES[object_type]
+            type_group = self.inventory.add_group(f"infinibox_{object_type}")
+            for an_object in objects:
+                host_name = f"{host_prefix}_{an_object[name_field]}"
+                self.inventory.add_host(host_name, group=type_group)
+
+                host_vars = {f"infinibox_{field}": value for field, value in an_object.items()}
+                host_vars['infinibox_system'] = system_name
+                host_vars['infinibox_object_type'] = object_type
+                pool_name = results['pool_names'].get(str(an_object.get('pool_id')))
+                if pool_name:
+                    host_vars['infinibox_pool'] = pool_name
+                    pool_group = self.inventory.add_group(self._sanitize_group_name(f"pool_{pool_name}"))
+                    self.inventory.add_child(pool_group, host_name)
+                object_metadata = results['metadata'].get(str(an_object['id']))
+                if object_metadata is not None:
+                    host_vars['infinibox_metadata'] = object_metadata
+                    for key, value in object_metadata.items():
+                        metadata_group = self.inventory.add_group(self._sanitize_group_name(f"metadata_{key}_{value}"))
+                        self.inventory.add_child(metadata_group, host_name)
+
+                for var_name, value in host_vars.items():
+                    self.inventory.set_variable(host_name, var_name, value)
+
+                self._set_composite_vars(self.get_option('compose'), host_vars, host_name, strict=strict)
+                self._add_host_to_composed_groups(self.get_option('groups'), host_vars, host_name, strict=strict)
+                self._add_host_to_keyed_groups(self.get_option('keyed_groups'), host_vars, host_name, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        """ Populate the inventory from the cache or from the Infinibox """
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        if not HAS_INFINISDK:
+            raise AnsibleError("The infinidat.infinibox.infinibox inventory plugin requires the infinisdk python library")
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        results = None
+        if use_cache:
+            try:
+                results = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if results is None:
+            results = self.fetch_objects()
+
+        if update_cache:
+            self._cache[cache_key] = results
+
+        self.populate(results)
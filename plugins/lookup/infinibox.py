@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,line-too-long,wrong-import-position
+
+""" Lookup plugin querying Infinibox objects """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: infinibox
+version_added: 2.16.0
+short_description: Query Infinibox objects
+description:
+    - Returns the objects of Infinibox REST collections, e.g. volumes, that match a filter.
+    - Each query is paginated and limited to the fields requested. One API call is made per page of results,
+      not one per object.
+    - Query results are cached in memory, keyed by the query, for the rest of the task. A lookup repeated within a task, e.g. once per
+      loop item, does not query the Infinibox again. Ansible runs each task in a new worker process, so lookups in later tasks
+      query the Infinibox again and see its current objects.
+    - Objects may be selected by metadata. Metadata entries of the requested keys are fetched in bulk, using paginated queries,
+      and indexed by key and value in memory. Matching objects are then queried by ID in batches.
+    - Each lookup that queries the Infinibox logs in and out. Set INFINIBOX_SESSION_CACHE_DIR to keep the session instead,
+      and reuse it across lookups and processes, as modules do.
+author: David Ohlemacher (@ohlemacher)
+options:
+  _terms:
+    description:
+      - REST collections to query, e.g. volumes, filesystems, pools, hosts, clusters or exports.
+    required: true
+    type: list
+    elements: str
+  system:
+    description:
+      - Infinibox Hostname or IPv4 Address.
+    type: str
+    required: true
+  user:
+    description:
+      - Infinibox User username.
+    type: str
+    env:
+      - name: INFINIBOX_USER
+  password:
+    description:
+      - Infinibox User password.
+    type: str
+    env:
+      - name: INFINIBOX_PASSWORD
+  filter:
+    description:
+      - Field values the objects must match, e.g. C({pool_name: pool01, type: MASTER}).
+      - A value may use an Infinibox filter operator, e.g. C(gt:1000000) or C(like:db).
+      - A list value matches any of its items.
+    type: dict
+    default: {}
+  metadata:
+    description:
+      - Metadata keys and values the objects must have, e.g. C({app: payments, tier: gold}).
+      - A list value matches any of its items.
+    type: dict
+    default: {}
+  fields:
+    description:
+      - Fields to return for each object. By default all fields are returned.
+    type: list
+    elements: str
+    default: []
+  page_size:
+    description:
+      - Number of objects fetched per API call.
+    type: int
+    default: 1000
+  cache:
+    description:
+      - Reuse the results of an identical query, and the metadata index, made earlier in the same task.
+    type: bool
+    default: true
+requirements:
+    - infinisdk
+'''
+
+EXAMPLES = r'''
+- name: Find volumes in pool01 that are more than 80% used
+  ansible.builtin.debug:
+    msg: "{{ item.name }}"
+  loop: "{{ query('infinidat.infinibox.infinibox', 'volumes', filter={'pool_name': 'pool01'}, fields=['name', 'size', 'used'],
+            system='ibox001', user='admin', password='secret') }}"
+  when: item.used > item.size * 0.8
+
+- name: Count the hosts of two clusters
+  ansible.builtin.debug:
+    msg: "{{ query('infinidat.infinibox.infinibox', 'hosts', filter={'host_cluster_id': [1001, 1002]}, fields=['id'],
+             system='ibox001') | length }}"
+
+- name: Find the payments volumes
+  ansible.builtin.debug:
+    msg: "{{ item.name }} {{ item.size }}"
+  loop: "{{ query('infinidat.infinibox.infinibox', 'volumes', metadata={'app': 'payments'}, fields=['name', 'size'],
+            system='ibox001') }}"
+'''
+
+RETURN = r'''
+_raw:
+  description:
+    - The objects found, as returned by the Infinibox REST API.
+  type: list
+  elements: dict
+'''
+
+from urllib.parse import quote
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import to_native
+from ansible.plugins.lookup import LookupBase
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
+    NAMES_PER_QUERY,
+    get_session_cache_key,
+    get_session_cache_path,
+    iter_paginated_results,
+    restore_cached_session,
+    save_cached_session,
+)
+
+INFINIBOX_SYSTEMS = {}  # Logged in systems keyed by system and user, kept when the session cache is enabled
+INFINIBOX_QUERY_RESULTS = {}  # Query results keyed by system, user and query URL. Kept for the task's worker process.
+INFINIBOX_METADATA_INDEXES = {}  # Object IDs by metadata value, keyed by system, user and metadata key
+
+
+def get_filter_value(value):
+    """ Return a filter value as used in a query, e.g. a list as an in: filter """
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (list, tuple)):
+        return "in:(" + ",".join(get_filter_value(item) for item in value) + ")"
+    return str(value)
+
+
+class LookupModule(LookupBase):
+    """ Query Infinibox objects """
+
+    def get_system(self):
+        """ Return a logged in system, reusing a session when possible """
+        box = self.get_option('system')
+        user = self.get_option('user')
+        password = self.get_option('password')
+        if (box, user) in INFINIBOX_SYSTEMS:
+            return INFINIBOX_SYSTEMS[(box, user)]
+
+        from infinisdk import InfiniBox  # pylint: disable=import-outside-toplevel  # Slow to import, so only when used
+
+        auth = None
+        if user and password:
+            auth = (user, password)
+        system = InfiniBox(box, auth=auth, use_ssl=True)
+
+        session_cache_path = get_session_cache_path()
+        if not (session_cache_path and auth and restore_cached_session(system, session_cache_path, get_session_cache_key(box, *auth))):
+            try:
+                system.login()
+            except Exception as err:
+                raise AnsibleError(f"Infinibox authentication failed. Check your credentials: {to_native(err)}") from err
+        INFINIBOX_SYSTEMS[(box, user)] = system
+        return system
+
+    def release_system(self, system):
+        """
+        Store the session in the session cache, if it is enabled, for other lookups and processes to reuse.
+        Otherwise log out, as the inventory plugin does, rather than leave a session open per worker process.
+        """
+        box = self.get_option('system')
+        user = self.get_option('user')
+        password = self.get_option('password')
+        session_cache_path = get_session_cache_path()
+        if session_cache_path and user and password:
+            save_cached_session(system, session_cache_path, get_session_cache_key(box, user, password))
+            return
+        INFINIBOX_SYSTEMS.pop((box, user), None)
+        try:
+            system.logout()
+        except Exception:
+            pass  # The session expires on the Infinibox
+
+    def get_query_url(self, collection, object_ids=None):
+        """ Return the URL of a query of a collection using the filter and fields options, optionally limited to object_ids """
+        query_filter = dict(self.get_option('filter'))
+        if object_ids is not None:
+            query_filter['id'] = object_ids
+        query = [
+            f"{quote(str(field), safe='')}={quote(get_filter_value(value), safe=':(),')}"
+            for field, value in sorted(query_filter.items())
+        ]
+        if self.get_option('fields'):
+            query.append("fields=" + ",".join(self.get_option('fields')))
+        if not query:
+            return collection
+        return f"{collection}?{'&'.join(query)}"
+
+    def get_metadata_indexes(self, system):
+        """
+        Return a dict of each metadata key of the metadata option to an index of its values to the IDs of the objects having them.
+        Indexes are built from bulk, paginated queries of metadata entries and cached in memory.
+        """
+        box_user = (self.get_option('system'), self.get_option('user'))
+        keys = sorted(self.get_option('metadata'))
+        missing_keys = [key for key in keys if not self.get_option('cache') or box_user + (key,) not in INFINIBOX_METADATA_INDEXES]
+        if missing_keys:
+            for key in missing_keys:
+                INFINIBOX_METADATA_INDEXES[box_user + (key,)] = {}
+            url = f"metadata?key={quote(get_filter_value(missing_keys), safe=':(),')}"
+            try:
+                for entry in iter_paginated_results(system, url, page_size=self.get_option('page_size')):
+                    index = INFINIBOX_METADATA_INDEXES.setdefault(box_user + (entry['key'],), {})
+                    index.setdefault(get_filter_value(entry['value']), set()).add(entry['object_id'])
+            except Exception as err:
+                raise AnsibleError(f"Infinibox query {url} failed: {to_native(err)}") from err
+        return {key: INFINIBOX_METADATA_INDEXES[box_user + (key,)] for key in keys}
+
+    def get_metadata_object_ids(self, system):
+        """ Return the sorted IDs of the objects whose metadata matches the metadata option """
+        indexes = self.get_metadata_indexes(system)
+        object_ids = None
+        for key, value in sorted(self.get_option('metadata').items()):
+            values = value if isinstance(value, (list, tuple)) else [value]
+            matching_ids = set()
+            for a_value in values:
+                matching_ids |= indexes[key].get(get_filter_value(a_value), set())
+            object_ids = matching_ids if object_ids is None else object_ids & matching_ids
+        return sorted(object_ids)
+
+    def run(self, terms, variables=None, **kwargs):
+        """ Return the objects found by querying each collection in terms """
+        self.set_options(var_options=variables, direct=kwargs)
+
+        if not HAS_INFINISDK:
+            raise AnsibleError("The infinidat.infinibox.infinibox lookup plugin requires the infinisdk python library")
+
+        system = None
+        try:
+            urls = []
+            if self.get_option('metadata'):
+                system = self.get_system()
+                object_ids = self.get_metadata_object_ids(system)
+                for collection in terms:
+                    for start in range(0, len(object_ids), NAMES_PER_QUERY):
+                        urls.append(self.get_query_url(collection, object_ids[start:start + NAMES_PER_QUERY]))
+            else:
+                urls = [self.get_query_url(collection) for collection in terms]
+
+            results = []
+            for url in urls:
+                cache_key = (self.get_option('system'), self.get_option('user'), url)
+                if not self.get_option('cache') or cache_key not in INFINIBOX_QUERY_RESULTS:
+                    system = system or self.get_system()
+                    try:
+                        INFINIBOX_QUERY_RESULTS[cache_key] = list(iter_paginated_results(system, url, page_size=self.get_option('page_size')))
+                    except Exception as err:
+                        raise AnsibleError(f"Infinibox query {url} failed: {to_native(err)}") from err
+                results.extend(INFINIBOX_QUERY_RESULTS[cache_key])
+        finally:
+            if system:
+                self.release_system(system)
+        return results
@@ -17,38 +17,70 @@ __metaclass__ = type
 # except (ImportError, ModuleNotFoundError):
 #     import errors  # Used during "make dev-hack-module-[present, stat, absent]"
 
-try:
-    from infinisdk import InfiniBox, core
-    from infinisdk.core.exceptions import ObjectNotFound
-except ImportError as imp_exc:
-    HAS_INFINISDK = False
-    INFINISDK_IMPORT_ERROR = imp_exc
-else:
-    HAS_INFINISDK = True
-    INFINISDK_IMPORT_ERROR = None
-
-HAS_ARROW = True
-try:
-    import arrow
-except ImportError:
-    HAS_ARROW = False
-except Exception:
-    HAS_INFINISDK = False
-
+import hashlib
+import json
+import math
+import os
+import re
+import time
 from functools import wraps
+from importlib.util import find_spec
 from os import environ
 from os import path
 from datetime import datetime
+from urllib.parse import quote, urlsplit
 
-HAS_URLLIB3 = True
+HAS_FCNTL = True
 try:
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    import fcntl
 except ImportError:
-    HAS_URLLIB3 = False
+    HAS_FCNTL = False
+
+
+def is_importable(module_name):
+    """
+    Return True if a module can be imported, without importing it.
+    infinisdk, arrow and urllib3 are slow to import. They are imported when a code path first
+    needs them, so that tasks failing option checks, and controller plugins, do not pay for them.
+    """
+    try:
+        return find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+HAS_INFINISDK = is_importable('infinisdk')
+INFINISDK_IMPORT_ERROR = None if HAS_INFINISDK else ImportError("No module named 'infinisdk'")
+HAS_ARROW = is_importable('arrow')
+HAS_URLLIB3 = is_importable('urllib3')
 
 
 INFINIBOX_SYSTEM = None
+INFINIBOX_SESSION_CACHE_KEY = None
+INFINIBOX_KEEP_SYSTEMS = False  # Set when modules run repeatedly in one process, e.g. by the infinibox action plugin
+INFINIBOX_KEPT_SYSTEMS = {}  # Logged in systems kept across module runs, keyed by session cache key
+INFINIBOX_NAME_INDEXES = {}
+INFINIBOX_LUN_TABLES = {}
+INFINIBOX_OBJECT_IDS = {}  # Object IDs keyed by object_type and object_name, as looked up by infini_metadata
+INFINIBOX_PERF = None  # RestCallStats of the current module run, when REST call accounting is enabled
+
+MAX_PAGE_SIZE = 1000  # Largest page size the Infinibox REST API supports
+NAMES_PER_QUERY = 100  # Keep URLs short when filtering by many names
+NAME_INDEX_MIN_LOOKUPS = 10  # Fewer name lookups than this are cheaper as filtered queries
+FIRST_LUN = 1  # LUN 0 is reserved by the Infinibox
+
+SESSION_CACHE_FILE_NAME = "infinibox_sessions.json"
+SESSION_CACHE_DEFAULT_TTL = 600  # Seconds
+
+PERF_HOOK_TOKEN = "infinidat.infinibox.perf"
+PERF_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)  # Upper bounds of the latency histogram buckets
+PERF_URL_TEMPLATES = [  # Path segments that are names rather than IDs, as (pattern, replacement)
+    (re.compile(r"^metadata/(\{id\}|system)/[^/]+$"), r"metadata/\1/{key}"),
+    (re.compile(r"^config/[^/{}]+/[^/{}]+$"), "config/{group}/{key}"),
+    (re.compile(r"^hosts/\{id\}/ports/[^/]+/[^/]+$"), "hosts/{id}/ports/{type}/{address}"),
+    (re.compile(r"^hosts/host_id_by_initiator_address/[^/]+$"), "hosts/host_id_by_initiator_address/{address}"),
+    (re.compile(r"^network/spaces/\{id\}/ips/[^/]+"), "network/spaces/{id}/ips/{ip}"),
+]
 
 
 def unixMillisecondsToDate(unix_ms):  # pylint: disable=invalid-name
@@ -63,11 +95,7 @@ def api_wrapper(func):
         module = args[0]
         try:
             return func(*args, **kwargs)
-        except core.exceptions.SystemNotFoundException as err:
-            module.fail_json(msg=str(err))
-        except core.exceptions.APICommandException as err:
-            module.fail_json(msg=str(err))
-        except Exception as err:
+        except Exception as err:  # Including infinisdk's SystemNotFoundException and APICommandException
             module.fail_json(msg=str(err))
         return None  # Should never get to this line but it quiets pylint inconsistent-return-statements
     return __wrapper
@@ -97,6 +125,242 @@ def merge_two_dicts(dict1, dict2):
     return result
 
 
+def get_session_cache_path():
+    """
+    Return the path of the session cache file or None if the session cache is disabled.
+    The session cache is opt-in. Enable it by setting INFINIBOX_SESSION_CACHE_DIR.
+    """
+    cache_dir = environ.get('INFINIBOX_SESSION_CACHE_DIR')
+    if not cache_dir or not HAS_FCNTL:
+        return None
+    return path.join(path.expanduser(cache_dir), SESSION_CACHE_FILE_NAME)
+
+
+def get_session_cache_ttl():
+    """ Return the number of seconds a cached session may be reused """
+    try:
+        return int(environ.get('INFINIBOX_SESSION_CACHE_TTL', SESSION_CACHE_DEFAULT_TTL))
+    except ValueError:
+        return SESSION_CACHE_DEFAULT_TTL
+
+
+def get_session_cache_key(box, user, password):
+    """
+    Return the key of a session in the session cache.
+    The password is part of the digest so that changed credentials never reuse a session.
+    """
+    key = f"{box}\0{user}\0{password}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def update_session_cache(cache_path, key, session=None):
+    """
+    Read the session cache while holding an exclusive lock on it.
+    Drop expired sessions. If a session is provided, store it using key.
+    A stored session keeps the expiry of the cached session it replaces if their cookies match.
+    Return the session found for key or None.
+    """
+    cache_dir = path.dirname(cache_path)
+    if not path.isdir(cache_dir):
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    cache_fd = os.open(cache_path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(cache_fd, 'r+') as cache_file:
+        fcntl.flock(cache_file, fcntl.LOCK_EX)
+        try:
+            try:
+                sessions = json.load(cache_file)
+            except ValueError:
+                sessions = {}
+            now = time.time()
+            sessions = {
+                a_key: a_session for a_key, a_session in sessions.items()
+                if a_session.get('expires_at', 0) > now
+            }
+            if session is not None:
+                cached_session = sessions.get(key)
+                if cached_session and cached_session['cookies'] == session['cookies']:
+                    session['expires_at'] = cached_session['expires_at']
+                sessions[key] = session
+            cache_file.seek(0)
+            cache_file.truncate()
+            json.dump(sessions, cache_file)
+        finally:
+            fcntl.flock(cache_file, fcntl.LOCK_UN)
+    return sessions.get(key)
+
+
+def restore_cached_session(system, cache_path, key):
+    """
+    Load a cached session's cookies and API version into system.
+    Return True if a valid session was found. If the array has expired the session,
+    infinisdk logs in again on the first 401 response.
+    """
+    try:
+        session = update_session_cache(cache_path, key)
+    except (OSError, IOError):
+        return False
+    if not session:
+        return False
+    for cookie_name, cookie_value in session['cookies'].items():
+        system.api.set_cookie(cookie_name, cookie_value)
+    if session.get('version'):
+        system.components.system_component.update_field_cache({'version': session['version']})
+    system.mark_logged_in()
+    return True
+
+
+def save_cached_session(system, cache_path, key):
+    """
+    Store the system's session cookies and API version in the session cache.
+    The expiry is only extended if infinisdk had to log in again and the cookies changed.
+    """
+    cookies = {cookie.name: cookie.value for cookie in system.api.save_credentials()}
+    if not cookies:
+        return
+    session = {
+        'cookies': cookies,
+        'expires_at': time.time() + get_session_cache_ttl(),
+        'version': system.get_version(),
+    }
+    try:
+        update_session_cache(cache_path, key, session)
+    except (OSError, IOError):
+        pass  # The session cache is an optimization. Never fail a module because of it.
+
+
+def is_perf_result_enabled():
+    """ Return True if REST call statistics are added to module results. Enable it by setting INFINIBOX_PERF to true. """
+    return environ.get('INFINIBOX_PERF', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_perf_file_path():
+    """ Return the path of the file REST call statistics are appended to, or None. Set it using INFINIBOX_PERF_FILE. """
+    perf_file = environ.get('INFINIBOX_PERF_FILE')
+    return path.expanduser(perf_file) if perf_file else None
+
+
+def get_url_template(url):
+    """ Return the template of a REST API URL, e.g. volumes/{id} for https://ibox/api/rest/volumes/1001?fields=name """
+    url_path = urlsplit(url).path.split('/api/rest/', 1)[-1].strip('/')
+    template = '/'.join('{id}' if part.isdigit() else part for part in url_path.split('/'))
+    for pattern, replacement in PERF_URL_TEMPLATES:
+        template = pattern.sub(replacement, template)
+    return template
+
+
+def get_percentile(sorted_values, percent):
+    """ Return the nearest rank percentile of sorted values, or 0 if there are none """
+    if not sorted_values:
+        return 0
+    return sorted_values[max(int(math.ceil(percent / 100.0 * len(sorted_values))) - 1, 0)]
+
+
+def get_latency_histogram(latencies_ms):
+    """ Return the number of latencies in each bucket of PERF_LATENCY_BUCKETS_MS, keyed by upper bound, omitting empty buckets """
+    histogram = {}
+    for latency in latencies_ms:
+        bucket = next((str(upper_bound) for upper_bound in PERF_LATENCY_BUCKETS_MS if latency <= upper_bound), 'inf')
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    return histogram
+
+
+class RestCallStats:
+    """ Latencies and bytes transferred of the REST calls of a module run, by method and URL template """
+
+    def __init__(self):
+        self.latencies_ms = {}  # Lists of latencies, keyed by method and URL template, e.g. 'GET volumes/{id}'
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors = 0
+
+    def record(self, request, response):
+        """ Record a request, a requests PreparedRequest, and its response """
+        key = f"{request.method} {get_url_template(request.url)}"
+        self.latencies_ms.setdefault(key, []).append(response.elapsed.total_seconds() * 1000)
+        body = request.body or b''
+        self.bytes_sent += len(body.encode('utf-8') if isinstance(body, str) else body)
+        self.bytes_received += len(response.content or b'')
+        if response.status_code >= 400:
+            self.errors += 1
+
+    def get_summary(self):
+        """ Return a compact dict of the statistics, as added to module results """
+        latencies = sorted(latency for key_latencies in self.latencies_ms.values() for latency in key_latencies)
+        return dict(
+            calls=len(latencies),
+            errors=self.errors,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            latency_ms=dict(
+                total=round(sum(latencies), 1),
+                p50=round(get_percentile(latencies, 50), 1),
+                p90=round(get_percentile(latencies, 90), 1),
+                p99=round(get_percentile(latencies, 99), 1),
+                max=round(latencies[-1], 1) if latencies else 0,
+            ),
+            latency_histogram_ms=get_latency_histogram(latencies),
+            requests={
+                key: dict(calls=len(key_latencies), total_ms=round(sum(key_latencies), 1), max_ms=round(max(key_latencies), 1))
+                for key, key_latencies in sorted(self.latencies_ms.items())
+            },
+        )
+
+
+def record_rest_call(request, response, **_):
+    """ infinisdk after_api_request hook. Record a REST call of the current module run. """
+    if INFINIBOX_PERF is not None:
+        INFINIBOX_PERF.record(request, response)
+
+
+def write_perf_record(module, perf_file_path, perf):
+    """ Append the REST call statistics of a module run to a file, as a JSON line """
+    record = dict(perf, module=module._name, pid=os.getpid(), time=round(time.time(), 3))  # pylint: disable=protected-access
+    try:
+        with open(perf_file_path, 'a', encoding='utf-8') as perf_file:
+            if HAS_FCNTL:
+                fcntl.flock(perf_file, fcntl.LOCK_EX)  # Unlocked when closed
+            perf_file.write(json.dumps(record, sort_keys=True) + '\n')
+    except (OSError, IOError) as err:
+        module.warn(f"Cannot write REST call statistics to {perf_file_path}: {err}")
+
+
+def with_perf_report(module, exit_method):
+    """ Return exit_method, a module's exit_json() or fail_json(), reporting the REST call statistics of the run first """
+    @wraps(exit_method)
+    def __wrapper(*args, **kwargs):
+        if INFINIBOX_PERF is not None:
+            perf = INFINIBOX_PERF.get_summary()
+            if is_perf_result_enabled():
+                kwargs['perf'] = perf
+            perf_file_path = get_perf_file_path()
+            if perf_file_path:
+                write_perf_record(module, perf_file_path, dict(perf, failed=exit_method.__name__ == 'fail_json'))
+        return exit_method(*args, **kwargs)
+    return __wrapper
+
+
+def enable_perf_accounting(module):
+    """
+    Count the REST calls of the module run, if INFINIBOX_PERF is true or INFINIBOX_PERF_FILE is set.
+    Each request made by infinisdk is recorded by its after_api_request hook. When the module exits,
+    a compact summary is added to its result as perf, and/or appended to INFINIBOX_PERF_FILE.
+    The log out that follows the module's result is not counted.
+    """
+    global INFINIBOX_PERF  # pylint: disable=global-statement
+    if INFINIBOX_PERF is not None or not (is_perf_result_enabled() or get_perf_file_path()):
+        return
+    try:
+        import gossip  # pylint: disable=import-outside-toplevel  # Installed with infinisdk
+    except ImportError:
+        return
+
+    gossip.unregister_token(PERF_HOOK_TOKEN)  # Register once, even when modules run repeatedly in one process
+    gossip.register('infinidat.sdk.after_api_request', token=PERF_HOOK_TOKEN)(record_rest_call)
+    INFINIBOX_PERF = RestCallStats()
+    module.exit_json = with_perf_report(module, module.exit_json)
+    module.fail_json = with_perf_report(module, module.fail_json)
+
+
 @api_wrapper
 def get_system(module):
     """
@@ -104,34 +368,169 @@ def get_system(module):
     Use a global system Infinibox object so that there will only be one
     system session used for this module instance.
     Enables execute_state() to log out of the only session properly.
+    If the session cache is enabled, reuse a cached session instead of logging in.
+    If REST call accounting is enabled, count the REST calls of the module run.
     """
     global INFINIBOX_SYSTEM  # pylint: disable=global-statement
+    global INFINIBOX_SESSION_CACHE_KEY  # pylint: disable=global-statement
 
+    enable_perf_accounting(module)
     if not INFINIBOX_SYSTEM:
+        try:
+            from infinisdk import InfiniBox  # pylint: disable=import-outside-toplevel
+        except ImportError as err:
+            module.fail_json(msg=f"Failed to import infinisdk module: {err}")
+        disable_insecure_request_warnings()
+
         # Create system and login
         box = module.params['system']
         user = module.params.get('user', None)
         password = module.params.get('password', None)
+        auth = None
         if user and password:
-            INFINIBOX_SYSTEM = InfiniBox(box, auth=(user, password), use_ssl=True)
+            auth = (user, password)
         elif environ.get('INFINIBOX_USER') and environ.get('INFINIBOX_PASSWORD'):
-            INFINIBOX_SYSTEM = InfiniBox(box,
-                                         auth=(environ.get('INFINIBOX_USER'),
-                                               environ.get('INFINIBOX_PASSWORD')),
-                                         use_ssl=True)
+            auth = (environ.get('INFINIBOX_USER'), environ.get('INFINIBOX_PASSWORD'))
+
+        kept_system_key = None
+        if INFINIBOX_KEEP_SYSTEMS and auth:
+            kept_system_key = get_session_cache_key(box, *auth)
+            if kept_system_key in INFINIBOX_KEPT_SYSTEMS:
+                INFINIBOX_SYSTEM = INFINIBOX_KEPT_SYSTEMS[kept_system_key]
+                return INFINIBOX_SYSTEM
+
+        if auth:
+            INFINIBOX_SYSTEM = InfiniBox(box, auth=auth, use_ssl=True)
         elif path.isfile(path.expanduser('~') + '/.infinidat/infinisdk.ini'):
             INFINIBOX_SYSTEM = InfiniBox(box, use_ssl=True)
         else:
             module.fail_json(msg="You must set INFINIBOX_USER and INFINIBOX_PASSWORD environment variables or set username/password module arguments")
 
+        if kept_system_key:
+            INFINIBOX_KEPT_SYSTEMS[kept_system_key] = INFINIBOX_SYSTEM
+
+        session_cache_path = get_session_cache_path()
+        if session_cache_path and auth:
+            INFINIBOX_SESSION_CACHE_KEY = get_session_cache_key(box, *auth)
+            if restore_cached_session(INFINIBOX_SYSTEM, session_cache_path, INFINIBOX_SESSION_CACHE_KEY):
+                return INFINIBOX_SYSTEM
+
         try:
             INFINIBOX_SYSTEM.login()
         except Exception:
+            INFINIBOX_KEPT_SYSTEMS.pop(kept_system_key, None)
             module.fail_json(msg="Infinibox authentication failed. Check your credentials")
 
     return INFINIBOX_SYSTEM
 
 
+def disable_insecure_request_warnings():
+    """ Disable urllib3's warnings about unverified HTTPS requests """
+    if HAS_URLLIB3:
+        import urllib3  # pylint: disable=import-outside-toplevel
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def logout_system(system):
+    """
+    Log out of the system session at the end of a module run.
+    If the session cache is enabled, keep the session open and cache it for the next module run.
+    """
+    if INFINIBOX_SESSION_CACHE_KEY:
+        save_cached_session(system, get_session_cache_path(), INFINIBOX_SESSION_CACHE_KEY)
+    elif not any(system is kept_system for kept_system in INFINIBOX_KEPT_SYSTEMS.values()):
+        system.logout()
+
+
+def reset_module_run():
+    """
+    Forget the system and caches of the previous module run.
+    Used when modules run repeatedly in one process. Kept systems remain logged in.
+    """
+    global INFINIBOX_SYSTEM  # pylint: disable=global-statement
+    global INFINIBOX_SESSION_CACHE_KEY  # pylint: disable=global-statement
+    global INFINIBOX_PERF  # pylint: disable=global-statement
+    INFINIBOX_SYSTEM = None
+    INFINIBOX_SESSION_CACHE_KEY = None
+    INFINIBOX_PERF = None
+    INFINIBOX_NAME_INDEXES.clear()
+    INFINIBOX_LUN_TABLES.clear()
+    INFINIBOX_OBJECT_IDS.clear()
+
+
+def logout_kept_systems():
+    """
+    Log out of the systems kept across module runs.
+    If the session cache is enabled, their sessions are left open for other processes to reuse.
+    """
+    while INFINIBOX_KEPT_SYSTEMS:
+        _, system = INFINIBOX_KEPT_SYSTEMS.popitem()
+        if get_session_cache_path():
+            continue
+        try:
+            system.logout()
+        except Exception:
+            pass  # The session expires on the Infinibox
+
+
+def iter_paginated_results(system, url, page_size=MAX_PAGE_SIZE):
+    """
+    Yield each result of a REST GET request, fetching one page per call.
+    Use fields= within url to limit the results to the fields required.
+    """
+    separator = '&' if '?' in url else '?'
+    page = 1
+    while True:
+        response = system.api.get(path=f"{url}{separator}page={page}&page_size={page_size}")
+        for result in response.get_result():
+            yield result
+        pages_total = response.get_metadata().get('pages_total', 1)
+        if page >= pages_total:
+            break
+        page += 1
+
+
+def iter_results_by_field_values(system, collection, field, values, fields=None):
+    """
+    Yield each result of a collection whose field matches one of values.
+    Values are queried in batches using the API's in: filter rather than one request per value.
+    """
+    values = sorted(set(values))
+    fields_query = ""
+    if fields:
+        fields_query = "&fields=" + ",".join(sorted(set(fields) | {"id", field}))
+    for start in range(0, len(values), NAMES_PER_QUERY):
+        values_batch = ",".join(quote(str(value), safe='') for value in values[start:start + NAMES_PER_QUERY])
+        url = f"{collection}?{field}=in:({values_batch}){fields_query}"
+        for result in iter_paginated_results(system, url):
+            yield result
+
+
+def get_objects_by_names(system, collection, names, fields=None, name_field='name'):
+    """
+    Return a dict of object results, keyed by name, for the named objects found in a collection.
+    For example collection may be 'volumes' or 'hosts'. Objects not found are not included.
+    Names are queried in batches using the API's in: filter rather than one request per name.
+    """
+    return {
+        result[name_field]: result
+        for result in iter_results_by_field_values(system, collection, name_field, names, fields=fields)
+    }
+
+
+def get_object_fields(binder, field_names, **query):
+    """
+    Return a dict of the named fields of the object matching query, e.g. name='vol1', or None if not found.
+    The object is fetched by one query limited to field_names. Values are translated as by get_fields(),
+    e.g. sizes are Capacity objects. Names that are not fields of the object type are ignored.
+    """
+    object_fields = binder.object_type.fields
+    field_names = [field_name for field_name in field_names if object_fields.get(field_name)]
+    for an_object in binder.find(**query).only_fields(field_names):
+        return an_object.get_fields(field_names, from_cache=True)
+    return None
+
+
 @api_wrapper
 def get_pool(module, system):
     """
@@ -170,6 +569,7 @@ def get_filesystem(module, system):
 @api_wrapper
 def get_export(module, system):
     """Return export if found or None if not found"""
+    from infinisdk.core.exceptions import ObjectNotFound  # pylint: disable=import-outside-toplevel
     try:
         try:
             export_name = module.params['export']
@@ -202,6 +602,7 @@ def get_volume(module, system):
 @api_wrapper
 def get_net_space(module, system):
     """Return network space or None"""
+    from infinisdk.core.exceptions import ObjectNotFound  # pylint: disable=import-outside-toplevel
     try:
         net_space = system.network_spaces.get(name=module.params['name'])
     except (KeyError, ObjectNotFound):
@@ -231,50 +632,119 @@ def get_fs_by_sn(module, system):
 
 @api_wrapper
 def get_host(module, system):
-    """Find a host by the name specified in the module"""
-    host = None
-
-    for a_host in system.hosts.to_list():
-        a_host_name = a_host.get_name()
+    """Find a host by the name specified in the module. Use a server side filtered query."""
+    try:
+        host_param = module.params['name']
+    except KeyError:
         try:
-            host_param = module.params['name']
+            host_param = module.params['host']
         except KeyError:
-            try:
-                host_param = module.params['host']
-            except KeyError:
-                host_param = module.params['object_name']  # For metadata
+            host_param = module.params['object_name']  # For metadata
 
-        if a_host_name == host_param:
-            host = a_host
-            break
-    return host
+    if not host_param:
+        return None
+    return system.hosts.safe_get(name=host_param)
 
 
 @api_wrapper
 def get_cluster(module, system):
-    """Find a cluster by the name specified in the module"""
-    cluster = None
-    # print("dir:", dir(system))
-
-    for a_cluster in system.host_clusters.to_list():
-        a_cluster_name = a_cluster.get_name()
+    """Find a cluster by the name specified in the module. Use a server side filtered query."""
+    try:
+        cluster_param = module.params['name']
+    except KeyError:
         try:
-            cluster_param = module.params['name']
+            cluster_param = module.params['cluster']
         except KeyError:
-            try:
-                cluster_param = module.params['cluster']
-            except KeyError:
-                cluster_param = module.params['object_name']  # For metadata
+            cluster_param = module.params['object_name']  # For metadata
 
-        if a_cluster_name == cluster_param:
-            cluster = a_cluster
-            break
-    return cluster
+    if not cluster_param:
+        return None
+    return system.host_clusters.safe_get(name=cluster_param)
+
+
+def get_object_name_index(system, object_type):
+    """
+    Return a dict of objects of object_type, e.g. 'hosts' or 'host_clusters', keyed by name.
+    The index is built once per module run from one paginated listing.
+    Use it instead of get_host() or get_cluster() when a module looks up many objects by name.
+    """
+    if object_type not in INFINIBOX_NAME_INDEXES:
+        objects = getattr(system, object_type).find().page_size(MAX_PAGE_SIZE)
+        INFINIBOX_NAME_INDEXES[object_type] = {
+            an_object.get_name(from_cache=True): an_object for an_object in objects
+        }
+    return INFINIBOX_NAME_INDEXES[object_type]
+
+
+class LunTable(object):
+    """
+    A snapshot of the LUNs mapped to a host or cluster.
+    Load it once from the host's or cluster's luns field. Answer lookups by LUN number
+    or by volume ID from memory. Keep it current using add() and remove() after mapping
+    or unmapping, or discard it and load it again.
+    reserved_luns are LUN numbers that may not be allocated even though they are not
+    in the table, e.g. LUNs used by the hosts of a cluster. A reserved_luns set given
+    is used, not copied, so that tables sharing it see each other's reservations.
+    """
+    def __init__(self, luns, reserved_luns=None):
+        self.luns_by_number = {}
+        self.luns_by_volume_id = {}
+        self.reserved_luns = reserved_luns if isinstance(reserved_luns, set) else set(reserved_luns or [])
+        for lun_info in luns:
+            self.add(lun_info)
+
+    def add(self, lun_info):
+        """ Add a LUN dict, with at least lun and volume_id keys, to the table """
+        lun_info = dict(lun_info, lun=int(lun_info['lun']))
+        self.luns_by_number[lun_info['lun']] = lun_info
+        self.luns_by_volume_id[lun_info['volume_id']] = lun_info
+
+    def remove(self, volume_id):
+        """ Remove the LUN of a volume from the table. Return the removed LUN dict or None. """
+        lun_info = self.luns_by_volume_id.pop(volume_id, None)
+        if lun_info:
+            self.luns_by_number.pop(lun_info['lun'], None)
+        return lun_info
+
+    def get_lun_by_volume_id(self, volume_id):
+        """ Return the LUN dict of a mapped volume or None """
+        return self.luns_by_volume_id.get(volume_id)
+
+    def get_lun_by_number(self, lun):
+        """ Return the LUN dict using a LUN number or None """
+        return self.luns_by_number.get(lun)
+
+    def find_free_lun(self):
+        """ Return the lowest LUN number that is neither used nor reserved """
+        lun = FIRST_LUN
+        while lun in self.luns_by_number or lun in self.reserved_luns:
+            lun += 1
+        return lun
+
+
+def get_lun_table(host_or_cluster):
+    """
+    Return the LunTable of a host or cluster. It is loaded once per module run,
+    from the object's cached luns field when the object was fetched by a query.
+    Call invalidate_lun_table() after mapping or unmapping volumes.
+    """
+    key = (host_or_cluster.get_type_name(), host_or_cluster.id)
+    if key not in INFINIBOX_LUN_TABLES:
+        luns = host_or_cluster.get_field('luns', from_cache=True, fetch_if_not_cached=True)
+        INFINIBOX_LUN_TABLES[key] = LunTable(luns)
+    return INFINIBOX_LUN_TABLES[key]
+
+
+def invalidate_lun_table(host_or_cluster):
+    """ Discard the LunTable of a host or cluster so that it is loaded again when next used """
+    INFINIBOX_LUN_TABLES.pop((host_or_cluster.get_type_name(), host_or_cluster.id), None)
+    host_or_cluster.invalidate_cache('luns')
 
 
 @api_wrapper
 def get_user(module, system, user_name_to_find=None):
     """Find a user by the user_name specified in the module"""
+    from infinisdk.core.exceptions import ObjectNotFound  # pylint: disable=import-outside-toplevel
     user = None
     if not user_name_to_find:
         user_name = module.params['user_name']
@@ -301,6 +771,7 @@ def check_snapshot_lock_options(module):
     snapshot_lock_expires_at = module.params["snapshot_lock_expires_at"]
 
     if snapshot_lock_expires_at:  # Then user has specified wish to lock snap
+        import arrow  # pylint: disable=import-outside-toplevel
         lock_expires_at = arrow.get(snapshot_lock_expires_at)
 
         # Check for lock in the past
@@ -331,6 +802,7 @@ def manage_snapshot_locks(module, snapshot):
     check_snapshot_lock_options(module)
 
     if snapshot_lock_expires_at:  # Then user has specified wish to lock snap
+        import arrow  # pylint: disable=import-outside-toplevel
         lock_expires_at = arrow.get(snapshot_lock_expires_at)
         if snap_is_locked and lock_expires_at < current_lock_expires_at:
             # Lock earlier than current lock
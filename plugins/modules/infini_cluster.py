@@ -62,9 +62,12 @@ try:
         api_wrapper,
         infinibox_argument_spec,
         get_system,
+        logout_system,
         get_cluster,
+        get_object_name_index,
         unixMillisecondsToDate,
         merge_two_dicts,
+        NAME_INDEX_MIN_LOOKUPS,
     )
 except ModuleNotFoundError:
     from infinibox import (  # Used when hacking
@@ -72,23 +75,35 @@ except ModuleNotFoundError:
         api_wrapper,
         infinibox_argument_spec,
         get_system,
+        logout_system,
         get_cluster,
+        get_object_name_index,
         unixMillisecondsToDate,
         merge_two_dicts,
+        NAME_INDEX_MIN_LOOKUPS,
     )
 
 
 @api_wrapper
-def get_host_by_name(system, host_name):
-    """Find a host by the name specified in the module"""
-    host = None
-
-    for a_host in system.hosts.to_list():
-        a_host_name = a_host.get_name()
-        if a_host_name == host_name:
-            host = a_host
-            break
-    return host
+def get_host_by_name(system, host_name, host_index=None):
+    """
+    Find a host by name. Use host_index, if provided, to avoid a query per host.
+    Otherwise use a server side filtered query.
+    """
+    if host_index is not None:
+        return host_index.get(host_name)
+    return system.hosts.safe_get(name=host_name)
+
+
+def get_host_index(system, host_names):
+    """
+    Return a host name index if there are enough host names to look up
+    that one paginated listing of all hosts is cheaper than a query per host.
+    Count only the hosts that will be looked up, i.e. added to or removed from the cluster.
+    """
+    if len(set(host_names)) >= NAME_INDEX_MIN_LOOKUPS:
+        return get_object_name_index(system, 'hosts')
+    return None
 
 
 @api_wrapper
@@ -98,10 +113,12 @@ def create_cluster(module, system):
     if not module.check_mode:
         cluster = system.host_clusters.create(name=module.params['name'])
         cluster_hosts = module.params['cluster_hosts']
+        host_names = [cluster_host['host_name'] for cluster_host in cluster_hosts or [] if cluster_host['host_cluster_state'] == 'present']
+        host_index = get_host_index(system, host_names)
         if cluster_hosts:
             for cluster_host in cluster_hosts:
                 if cluster_host['host_cluster_state'] == 'present':
-                    host = get_host_by_name(system, cluster_host['host_name'])
+                    host = get_host_by_name(system, cluster_host['host_name'], host_index)
                     cluster.add_host(host)
                     changed = True
     return changed
@@ -116,13 +133,19 @@ def update_cluster(module, system, cluster):
     #    {host_name: <'some_name'>, host_cluster_state: <'present' or 'absent'>}
     module_cluster_hosts = module.params['cluster_hosts']
     current_cluster_hosts_names = [host.get_name() for host in cluster.get_field('hosts')]
+    host_names = [
+        module_cluster_host['host_name']
+        for module_cluster_host in module_cluster_hosts or []
+        if (module_cluster_host['host_name'] in current_cluster_hosts_names) == (module_cluster_host['host_cluster_state'] == 'absent')
+    ]
+    host_index = get_host_index(system, host_names)
     if module_cluster_hosts:
         for module_cluster_host in module_cluster_hosts:
             module_cluster_host_name = module_cluster_host['host_name']
             # Need to add host to cluster?
             if module_cluster_host_name not in current_cluster_hosts_names:
                 if module_cluster_host['host_cluster_state'] == 'present':
-                    host = get_host_by_name(system, module_cluster_host_name)
+                    host = get_host_by_name(system, module_cluster_host_name, host_index)
                     if not host:
                         msg = f'Cannot find host {module_cluster_host_name} to add to cluster {cluster.get_name()}'
                         module.fail_json(msg=msg)
@@ -131,7 +154,7 @@ def update_cluster(module, system, cluster):
             # Need to remove host from cluster?
             elif module_cluster_host_name in current_cluster_hosts_names:
                 if module_cluster_host['host_cluster_state'] == 'absent':
-                    host = get_host_by_name(system, module_cluster_host_name)
+                    host = get_host_by_name(system, module_cluster_host_name, host_index)
                     if not host:
                         msg = f'Cannot find host {module_cluster_host_name} to add to cluster {cluster.get_name()}'
                         module.fail_json(msg=msg)
@@ -234,7 +257,7 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -71,13 +71,9 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
-
 
 @api_wrapper
 def get_config(module, disable_fail=False):
@@ -86,6 +82,7 @@ def get_config(module, disable_fail=False):
     Use disable_fail when we are looking for config
     and it may or may not exist and neither case is an error.
     """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     config_group = module.params["config_group"]
     key = module.params["key"]
@@ -131,6 +128,7 @@ def set_config(module):
     Use disable_fail when we are looking for config
     and it may or may not exist and neither case is an error.
     """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     config_group = module.params["config_group"]
     key = module.params["key"]
@@ -178,7 +176,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -0,0 +1,383 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# pylint: disable=invalid-name,use-dict-literal,too-many-branches,too-many-locals,line-too-long,wrong-import-position
+
+"""This module creates, deletes, snapshots and restores consistency groups on Infinibox."""
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: infini_cons_group
+version_added: 2.16.0
+short_description: Create, Delete, Snapshot and Restore consistency groups on Infinibox
+description:
+    - This module creates or deletes a consistency group on Infinibox and adds volumes and file systems to it.
+    - A consistency group snapshot, a snapshot group, snapshots all members in one crash consistent operation on the Infinibox.
+    - Snapshot groups may be locked and may be used to restore the consistency group.
+author: David Ohlemacher (@ohlemacher)
+options:
+  name:
+    description:
+      - Consistency group name.
+    type: str
+    required: true
+  pool:
+    description:
+      - Pool of the consistency group. Required to create a consistency group.
+    type: str
+    required: false
+  volumes:
+    description:
+      - Names of volumes that should be members of the consistency group. Missing members are added.
+    type: list
+    elements: str
+    required: false
+    default: []
+  filesystems:
+    description:
+      - Names of file systems that should be members of the consistency group. Missing members are added.
+    type: list
+    elements: str
+    required: false
+    default: []
+  snapshot_group:
+    description:
+      - Name of a snapshot group of the consistency group.
+      - When present, the snapshot group is created if it does not exist. When absent, the snapshot group, rather
+        than the consistency group, is deleted. When restore, the consistency group is restored from the snapshot group.
+    type: str
+    required: false
+  snapshot_prefix:
+    description:
+      - Prefix of the names of the member snapshots when creating a snapshot group.
+    type: str
+    required: false
+  snapshot_suffix:
+    description:
+      - Suffix of the names of the member snapshots when creating a snapshot group.
+        If neither a prefix nor a suffix is specified, a timestamp suffix is used.
+    type: str
+    required: false
+  snapshot_lock_expires_at:
+    description:
+      - This will cause the snapshot group to be locked at the specified date-time.
+        Uses python's datetime format YYYY-mm-dd HH:MM:SS.ffffff, e.g. 2020-02-13 16:21:59.699700
+    type: str
+    required: false
+  state:
+    description:
+      - Creates the consistency group, adds members and creates the snapshot group when present.
+      - Removes the snapshot group, or the consistency group if no snapshot group is specified, when absent.
+      - Restores the consistency group from the snapshot group when restore.
+    type: str
+    required: false
+    default: present
+    choices: [ "stat", "present", "absent", "restore" ]
+
+extends_documentation_fragment:
+    - infinibox
+requirements:
+    - arrow
+'''
+
+EXAMPLES = r'''
+- name: Create consistency group app_cg with its volumes
+  infini_cons_group:
+    name: app_cg
+    pool: pool01
+    volumes: "{{ app_volumes }}"
+    state: present
+    user: admin
+    password: secret
+    system: ibox001
+
+- name: Snapshot all members of app_cg in one operation and lock the snapshot group
+  infini_cons_group:
+    name: app_cg
+    snapshot_group: app_cg_nightly
+    snapshot_suffix: _nightly
+    snapshot_lock_expires_at: "2025-01-01 00:00:00"
+    state: present
+    user: admin
+    password: secret
+    system: ibox001
+
+- name: Restore app_cg from a snapshot group
+  infini_cons_group:
+    name: app_cg
+    snapshot_group: app_cg_nightly
+    state: restore
+    user: admin
+    password: secret
+    system: ibox001
+'''
+
+# RETURN = r''' # '''
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_ARROW,
+    HAS_INFINISDK,
+    api_wrapper,
+    check_snapshot_lock_options,
+    get_objects_by_names,
+    get_pool,
+    get_system,
+    infinibox_argument_spec,
+    iter_paginated_results,
+    logout_system,
+    manage_snapshot_locks,
+)
+
+MEMBER_COLLECTIONS = ['volumes', 'filesystems']
+
+
+@api_wrapper
+def get_cons_group(module, system, name):  # pylint: disable=unused-argument
+    """ Return a consistency group or snapshot group by name or None if not found """
+    return system.cons_groups.safe_get(name=name)
+
+
+@api_wrapper
+def get_members(module, system, cons_group):  # pylint: disable=unused-argument
+    """ Return the members of a consistency group, keyed by id, using paginated queries """
+    url = f"cgs/{cons_group.id}/members?fields=id,name,dataset_type"
+    return {member['id']: member for member in iter_paginated_results(system, url)}
+
+
+@api_wrapper
+def get_snapshot_groups(module, system, cons_group):  # pylint: disable=unused-argument
+    """ Return the snapshot groups of a consistency group using paginated queries """
+    url = f"cgs?parent_id={cons_group.id}&fields=id,name,created_at,lock_state,lock_expires_at"
+    return list(iter_paginated_results(system, url))
+
+
+@api_wrapper
+def create_cons_group(module, system):
+    """ Create a consistency group """
+    pool = get_pool(module, system)
+    if not pool:
+        module.fail_json(msg=f"Pool {module.params['pool']} not found. Cannot create consistency group {module.params['name']}")
+    if not module.check_mode:
+        return system.cons_groups.create(name=module.params['name'], pool=pool)
+    return None
+
+
+@api_wrapper
+def add_members(module, system, cons_group):
+    """
+    Add the listed volumes and file systems that are not members of the consistency group.
+    Datasets are resolved using batched queries. Return the names of the members added.
+    """
+    current_members = {}
+    if cons_group:
+        current_members = get_members(module, system, cons_group)
+
+    added = []
+    for collection in MEMBER_COLLECTIONS:
+        names = module.params[collection]
+        if not names:
+            continue
+        datasets = get_objects_by_names(system, collection, names, fields=['id'])
+        missing_names = sorted(set(names) - set(datasets))
+        if missing_names:
+            module.fail_json(msg=f"Cannot add {collection} {missing_names} to consistency group {module.params['name']}. Not found.")
+        for name in names:
+            dataset_id = datasets[name]['id']
+            if dataset_id in current_members:
+                continue
+            if not module.check_mode:
+                system.api.post(path=f"cgs/{cons_group.id}/members", data=dict(dataset_id=dataset_id))
+            added.append(name)
+    return added
+
+
+@api_wrapper
+def create_snapshot_group(module, cons_group):
+    """ Create and optionally lock a snapshot group of all members in one operation """
+    check_snapshot_lock_options(module)
+    lock_expires_at = None
+    if module.params['snapshot_lock_expires_at']:
+        import arrow  # pylint: disable=import-outside-toplevel
+        lock_expires_at = arrow.get(module.params['snapshot_lock_expires_at'])
+    if not module.check_mode:
+        cons_group.create_snapgroup(
+            name=module.params['snapshot_group'],
+            prefix=module.params['snapshot_prefix'],
+            suffix=module.params['snapshot_suffix'],
+            lock_expires_at=lock_expires_at,
+        )
+    return True
+
+
+@api_wrapper
+def delete_cons_group(module, cons_group):
+    """ Delete a consistency group or snapshot group. Members are not deleted. """
+    if not module.check_mode:
+        cons_group.delete(delete_members=False)
+    return True
+
+
+@api_wrapper
+def restore_cons_group(module, system, cons_group, snapshot_group):
+    """ Restore all members of a consistency group from a snapshot group """
+    if not module.check_mode:
+        restore_url = f"cgs/{cons_group.id}/restore?approved=true"
+        system.api.post(path=restore_url, data=dict(source_id=snapshot_group.id))
+    return True
+
+
+def handle_stat(module):
+    """ Return consistency group stat """
+    system = get_system(module)
+    name = module.params['name']
+    cons_group = get_cons_group(module, system, name)
+    if not cons_group:
+        module.fail_json(msg=f"Consistency group {name} not found")
+    fields = cons_group.get_fields(from_cache=True)
+    members = get_members(module, system, cons_group)
+    snapshot_groups = get_snapshot_groups(module, system, cons_group)
+    result = dict(
+        changed=False,
+        id=cons_group.id,
+        name=name,
+        members=sorted(member['name'] for member in members.values()),
+        members_count=fields.get('members_count', None),
+        msg='Consistency group stat found',
+        snapshot_groups=snapshot_groups,
+        type=fields.get('type', None),
+    )
+    module.exit_json(**result)
+
+
+def handle_present(module):
+    """ Create the consistency group, add members and create the snapshot group as required """
+    system = get_system(module)
+    name = module.params['name']
+    snapshot_group_name = module.params['snapshot_group']
+    changed = False
+    msgs = []
+
+    cons_group = get_cons_group(module, system, name)
+    if not cons_group:
+        cons_group = create_cons_group(module, system)
+        changed = True
+        msgs.append(f"Consistency group {name} created")
+
+    if module.check_mode and not cons_group:
+        module.exit_json(changed=changed, msg=". ".join(msgs))
+
+    added = add_members(module, system, cons_group)
+    if added:
+        changed = True
+        msgs.append(f"Members {added} added")
+
+    if snapshot_group_name:
+        snapshot_group = get_cons_group(module, system, snapshot_group_name)
+        if not snapshot_group:
+            changed = create_snapshot_group(module, cons_group) or changed
+            msgs.append(f"Snapshot group {snapshot_group_name} created")
+        elif module.params['snapshot_lock_expires_at'] and manage_snapshot_locks(module, snapshot_group):
+            changed = True
+            msgs.append(f"Snapshot group {snapshot_group_name} locked")
+
+    if not msgs:
+        msgs.append(f"Consistency group {name} unchanged")
+    module.exit_json(changed=changed, msg=". ".join(msgs))
+
+
+def handle_absent(module):
+    """ Remove the snapshot group or the consistency group """
+    system = get_system(module)
+    name = module.params['snapshot_group'] or module.params['name']
+    cons_group = get_cons_group(module, system, name)
+    if not cons_group:
+        module.exit_json(changed=False, msg=f"Consistency group {name} already absent")
+    if cons_group.get_lock_state(from_cache=True) == 'LOCKED':
+        module.fail_json(changed=False, msg=f"Cannot delete snapshot group {name}. Locked.")
+    changed = delete_cons_group(module, cons_group)
+    module.exit_json(changed=changed, msg=f"Consistency group {name} removed")
+
+
+def handle_restore(module):
+    """ Restore the consistency group from the snapshot group """
+    system = get_system(module)
+    name = module.params['name']
+    snapshot_group_name = module.params['snapshot_group']
+    cons_group = get_cons_group(module, system, name)
+    snapshot_group = get_cons_group(module, system, snapshot_group_name)
+    if not cons_group or not snapshot_group:
+        module.fail_json(msg=f"Cannot restore. Either consistency group {name} or snapshot group {snapshot_group_name} not found")
+    if snapshot_group.get_field('parent_id', from_cache=True, raw_value=True) != cons_group.id:
+        module.fail_json(msg=f"Cannot restore. {snapshot_group_name} is not a snapshot group of consistency group {name}")
+    changed = restore_cons_group(module, system, cons_group, snapshot_group)
+    module.exit_json(changed=changed, msg=f"Consistency group {name} restored from snapshot group {snapshot_group_name}")
+
+
+def execute_state(module):
+    """Determine which state function to execute and do so"""
+    state = module.params['state']
+    try:
+        if state == 'stat':
+            handle_stat(module)
+        elif state == 'present':
+            handle_present(module)
+        elif state == 'absent':
+            handle_absent(module)
+        elif state == 'restore':
+            handle_restore(module)
+        else:
+            module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
+    finally:
+        system = get_system(module)
+        logout_system(system)
+
+
+def check_options(module):
+    """Verify module options are sane"""
+    state = module.params['state']
+    if state == 'restore' and not module.params['snapshot_group']:
+        module.fail_json(msg="snapshot_group is required when state is restore")
+    if module.params['snapshot_lock_expires_at'] and not module.params['snapshot_group']:
+        module.fail_json(msg="snapshot_group is required when snapshot_lock_expires_at is specified")
+
+
+def main():
+    """ Main """
+    argument_spec = infinibox_argument_spec()
+    argument_spec.update(
+        dict(
+            name=dict(required=True),
+            pool=dict(required=False, default=None),
+            volumes=dict(required=False, type='list', elements='str', default=[]),
+            filesystems=dict(required=False, type='list', elements='str', default=[]),
+            snapshot_group=dict(required=False, default=None),
+            snapshot_prefix=dict(required=False, default=None),
+            snapshot_suffix=dict(required=False, default=None),
+            snapshot_lock_expires_at=dict(required=False, default=None),
+            state=dict(default='present', choices=['stat', 'present', 'absent', 'restore']),
+        )
+    )
+
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    if not HAS_INFINISDK:
+        module.fail_json(msg=missing_required_lib('infinisdk'))
+
+    if not HAS_ARROW:
+        module.fail_json(msg=missing_required_lib('arrow'))
+
+    check_options(module)
+    execute_state(module)
+
+
+if __name__ == '__main__':
+    main()
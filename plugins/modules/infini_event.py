@@ -76,6 +76,7 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     HAS_INFINISDK,
     infinibox_argument_spec,
     get_system,
+    logout_system,
 )
 
 
@@ -114,7 +115,7 @@ def execute_state(module):
             module.exit_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def main():
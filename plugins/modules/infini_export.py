@@ -19,12 +19,15 @@ version_added: '2.3.0'
 short_description: Create, Delete or Modify NFS Exports on Infinibox
 description:
     - This module creates, deletes or modifies NFS exports on Infinibox.
+    - When state is stat and no name is provided, all exports, or all exports of a file system, are listed
+      with their permissions. Exports are fetched using paginated queries limited to the fields requested.
 author: David Ohlemacher (@ohlemacher)
 options:
   name:
     description:
       - Export name. Must start with a forward slash, e.g. name=/data.
-    required: true
+      - Required unless state is stat. If not provided with state stat, all exports are listed.
+    required: false
     type: str
   state:
     description:
@@ -44,8 +47,22 @@ options:
   filesystem:
     description:
       - Name of exported file system.
-    required: true
+      - Required when state is present. When listing exports, only list the exports of this file system.
+    required: false
     type: str
+  fields:
+    description:
+      - Export fields to return for each export when listing exports.
+    required: false
+    type: list
+    elements: str
+    default: [ "export_path", "filesystem_id", "enabled", "permissions" ]
+  output_file:
+    description:
+      - When listing exports, write each export as a line of JSON to this file rather than returning them.
+        This keeps large lists out of the task's result, which then contains only the number of exports written.
+    required: false
+    type: path
 extends_documentation_fragment:
     - infinibox
 requirements:
@@ -80,6 +97,22 @@ EXAMPLES = r'''
     password: secret
     system: ibox001
 
+- name: List the exports of file system foo with their permissions
+  infini_export:
+    filesystem: foo
+    state: stat
+    user: admin
+    password: secret
+    system: ibox001
+
+- name: Write all exports to a JSON lines file
+  infini_export:
+    state: stat
+    output_file: /tmp/ibox001_exports.jsonl
+    user: admin
+    password: secret
+    system: ibox001
+
 - name: Export and specify client list explicitly
   infini_export:
     name: /data02
@@ -101,6 +134,10 @@ EXAMPLES = r'''
 
 # RETURN = r''' # '''
 
+import json
+import os
+import tempfile
+
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
@@ -108,8 +145,11 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     get_filesystem,
     get_export,
+    get_objects_by_names,
+    iter_paginated_results,
     merge_two_dicts,
 )
 
@@ -174,7 +214,7 @@ def delete_export(module, export):
 
 def get_export_fields(export):
     """ Return export fields dict """
-    fields = export.get_fields()  # from_cache=True, raw_value=True)
+    fields = export.get_fields(from_cache=True)
     export_id = fields.get('id', None)
     permissions = fields.get('permissions', None)
     enabled = fields.get('enabled', None)
@@ -204,6 +244,71 @@ def handle_stat(module):
     module.exit_json(**result)
 
 
+@api_wrapper
+def get_exports_url(module, system):
+    """ Return the URL listing the requested fields of all exports, or of the exports of the file system """
+    url = f"exports?fields={','.join(get_export_list_fields(module))}"
+    filesystem_name = module.params['filesystem']
+    if filesystem_name:
+        filesystems = get_objects_by_names(system, 'filesystems', [filesystem_name], fields=['id'])
+        if filesystem_name not in filesystems:
+            module.fail_json(msg=f'File system {filesystem_name} not found')
+        url += f"&filesystem_id={filesystems[filesystem_name]['id']}"
+    return url
+
+
+def get_export_list_fields(module):
+    """ Return the export fields to list, always including the ID """
+    return sorted(set(module.params['fields']) | {'id'})
+
+
+def iter_exports(module, system, url):
+    """ Yield a compact dict of the requested fields of each export. Exports are fetched one page at a time. """
+    fields = get_export_list_fields(module)
+    for export in iter_paginated_results(system, url):
+        yield {field: export.get(field) for field in fields}
+
+
+@api_wrapper
+def get_exports(module, system, url):
+    """ Return a list of the requested fields of each export """
+    return list(iter_exports(module, system, url))
+
+
+@api_wrapper
+def write_exports(module, exports):
+    """
+    Write each export as a line of JSON to output_file as it is fetched.
+    The file is replaced atomically once all exports are written. Return the number of exports written.
+    exports may be a generator fetching exports, so API errors are raised, and handled, here.
+    """
+    output_file = module.params['output_file']
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            for export in exports:
+                tmp_file.write(json.dumps(export, sort_keys=True) + '\n')
+                count += 1
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    module.atomic_move(tmp_path, output_file)
+    return count
+
+
+def handle_stat_all(module):
+    """ List exports and their permissions. Changed is always False. """
+    system = get_system(module)
+    url = get_exports_url(module, system)
+    if module.params['output_file']:
+        count = write_exports(module, iter_exports(module, system, url))
+        msg = f"{count} exports written to {module.params['output_file']}"
+        module.exit_json(changed=False, msg=msg, count=count, output_file=module.params['output_file'])
+    exports = get_exports(module, system, url)
+    module.exit_json(changed=False, msg=f"{len(exports)} exports found", count=len(exports), exports=exports)
+
+
 def handle_present(module):
     """ Handle present state """
     system = get_system(module)
@@ -239,7 +344,9 @@ def execute_state(module):
     """ Execute states """
     state = module.params['state']
     try:
-        if state == 'stat':
+        if state == 'stat' and not module.params['name']:
+            handle_stat_all(module)
+        elif state == 'stat':
             handle_stat(module)
         elif state == 'present':
             handle_present(module)
@@ -249,7 +356,18 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
+
+
+def check_options(module):
+    """ Verify module options are sane """
+    state = module.params['state']
+    if state != 'stat' and not module.params['name']:
+        module.fail_json(msg=f"An export name is required when state is {state}")
+    if state == 'present' and not module.params['filesystem']:
+        module.fail_json(msg="A filesystem is required when state is present")
+    if module.params['output_file'] and (state != 'stat' or module.params['name']):
+        module.fail_json(msg="output_file may only be used when listing exports using state stat without a name")
 
 
 def main():
@@ -257,10 +375,12 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
-            name=dict(required=True),
+            name=dict(required=False),
             state=dict(default='present', choices=['stat', 'present', 'absent']),
-            filesystem=dict(required=True),
-            client_list=dict(type='list', elements='dict')
+            filesystem=dict(required=False),
+            client_list=dict(type='list', elements='dict'),
+            fields=dict(type='list', elements='str', default=['export_path', 'filesystem_id', 'enabled', 'permissions']),
+            output_file=dict(type='path', required=False),
         )
     )
 
@@ -272,6 +392,7 @@ def main():
     if not HAS_INFINISDK:
         module.fail_json(msg=missing_required_lib('infinisdk'))
 
+    check_options(module)
     execute_state(module)
 
 
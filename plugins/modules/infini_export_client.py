@@ -19,14 +19,56 @@ version_added: '2.3.0'
 short_description: Create, Delete or Modify NFS Client(s) for existing exports on Infinibox
 description:
     - This module creates, deletes or modifys NFS client(s) for existing exports on Infinibox.
+    - Many clients may be managed in one task using clients. The export's permissions are then read once,
+      the new permissions computed in one pass and written with a single update.
 author: David Ohlemacher (@ohlemacher)
 options:
   client:
     description:
       - Client IP or Range. Ranges can be defined as follows
         192.168.0.1-192.168.0.254.
-    required: true
+      - Required unless clients is provided.
+    required: false
     type: str
+  clients:
+    description:
+      - List of clients to make present or absent, instead of a single client.
+      - When state is present and purge_clients is true, this is the complete list of the export's clients.
+    required: false
+    type: list
+    elements: dict
+    suboptions:
+      client:
+        description:
+          - Client IP or Range.
+        type: str
+        required: true
+      access_mode:
+        description:
+          - Read Write or Read Only Access.
+        choices: [ "RW", "RO" ]
+        default: "RW"
+        type: str
+      no_root_squash:
+        description:
+          - Don't squash root user to anonymous.
+        type: bool
+        default: false
+  retries:
+    description:
+      - Number of times to retry updating the export's permissions when another task modifies them concurrently.
+      - After writing the permissions, the module waits about twice as long as it took to read and write them, and reads them again.
+        If they differ from what it wrote, another task wrote them meanwhile, possibly without this task's clients, and the update
+        is retried from the latest permissions. Retries wait for a randomized, exponentially increasing, time.
+    type: int
+    default: 5
+    required: false
+  purge_clients:
+    description:
+      - When state is present, remove the export's clients that are not listed in clients.
+    type: bool
+    default: false
+    required: false
   state:
     description:
       - Creates/Modifies client when present and removes when absent.
@@ -82,12 +124,28 @@ EXAMPLES = r'''
   with_items:
     - 10.0.0.2
     - 10.0.0.3
+
+- name: Make these the only clients of export /data, using a single update
+  infini_export_client:
+    clients:
+      - client: 10.0.0.2
+        access_mode: RO
+      - client: 10.0.1.1-10.0.1.254
+        access_mode: RW
+        no_root_squash: true
+    purge_clients: true
+    export: /data
+    user: admin
+    password: secret
+    system: ibox001
 '''
 
 # RETURN = r''' # '''
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
+import random
+import time
 import traceback
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
@@ -95,82 +153,111 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     get_export,
     merge_two_dicts,
 )
 
 MUNCH_IMPORT_ERROR = None
 try:
-    from munch import Munch, unmunchify
+    from munch import unmunchify
     HAS_MUNCH = True
 except ImportError:
     MUNCH_IMPORT_ERROR = traceback.format_exc()
     HAS_MUNCH = False
 
+RETRY_BACKOFF = 0.5  # Seconds before the first retry of a concurrently modified update
+RETRY_BACKOFF_MAX = 8
+VERIFY_DELAY_FACTOR = 2  # Wait this many times as long as a read-modify-write took before verifying it
+VERIFY_DELAY_MAX = 1.0  # Seconds
 
-@api_wrapper
-def update_client(module, export):
-    """
-    Update export client list. Note that this will replace existing clients.
-    """
 
-    changed = False
+def get_desired_clients(module):
+    """ Return the permissions of the clients option, or of the client option, keyed by client """
+    if module.params['clients'] is not None:
+        clients = module.params['clients']
+    else:
+        clients = [module.params]
+    return {
+        item['client']: dict(client=item['client'], access=item['access_mode'], no_root_squash=item['no_root_squash'])
+        for item in clients
+    }
 
-    client = module.params['client']
-    access_mode = module.params['access_mode']
-    no_root_squash = module.params['no_root_squash']
-
-    client_list = export.get_permissions()
-    client_not_in_list = True
-
-    for item in client_list:
-        if item.client == client:  # Update client
-            client_not_in_list = False
-            if item.access != access_mode:
-                item.access = access_mode
-                changed = True
-            if item.no_root_squash is not no_root_squash:
-                item.no_root_squash = no_root_squash
-                changed = True
-
-    # If access_mode and/or no_root_squash not passed as arguments to the module,
-    # use access_mode with RW value and set no_root_squash to False
-    if client_not_in_list:  # Create client
-        changed = True
-        client_list.append(Munch(client=client, access=access_mode, no_root_squash=no_root_squash))
 
-    if changed:
-        for index, item in enumerate(client_list):
-            client_list[index] = unmunchify(item)
-        if not module.check_mode:
-            export.update_permissions(client_list)
+def get_new_permissions(module, permissions):
+    """
+    Return the export permissions after making the desired clients present or absent.
+    Computed in one pass over the current permissions. Other clients keep their order.
+    """
+    desired_clients = get_desired_clients(module)
+    is_present = module.params['state'] == 'present'
+    new_permissions = []
+    for permission in permissions:
+        client = permission['client']
+        if client in desired_clients:
+            if is_present:
+                new_permissions.append(merge_two_dicts(permission, desired_clients.pop(client)))
+        elif not (is_present and module.params['purge_clients']):
+            new_permissions.append(permission)
+    if is_present:
+        new_permissions.extend(desired_clients.values())  # Clients not yet in permissions
+    return new_permissions
 
-    return changed
 
+def get_permissions(export):
+    """ Return the export's current permissions, read from the Infinibox, as dicts """
+    return [unmunchify(item) for item in export.get_permissions()]
 
-@api_wrapper
-def delete_client(module, export):
-    """delete export client from client list"""
-    if export is None and module.params['state'] == 'absent':
-        module.exit_json(changed=False)
 
-    changed = False
+def is_same_permissions(permissions, other_permissions):
+    """ Return True if two permission lists grant the same access to the same clients, in any order """
+    def get_grants(permission_list):
+        return sorted((permission['client'], permission['access'], permission['no_root_squash']) for permission in permission_list)
+    return get_grants(permissions) == get_grants(other_permissions)
 
-    client = module.params['client']
-    client_list = export.get_permissions()
 
-    for index, item in enumerate(client_list):
-        if item.client == client:
-            changed = True
-            del client_list[index]
+def wait_before_retry(attempt):
+    """ Sleep for an exponentially increasing, randomized, time before retrying an update """
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt)
+    time.sleep(delay * random.uniform(0.5, 1.5))
 
-    if changed:
-        for index, item in enumerate(client_list):
-            client_list[index] = unmunchify(item)
-        if not module.check_mode:
-            export.update_permissions(client_list)
 
-    return changed
+@api_wrapper
+def update_clients(module, export):
+    """
+    Make the desired clients present or absent. Update the export's permissions
+    with a single write, if they change. Return changed and the new permissions.
+
+    Permissions are replaced as a whole, so concurrent tasks updating the same export
+    could overwrite each other's changes. Each attempt reads the latest permissions right
+    before computing and writing new ones. A concurrent task that read them before this
+    write writes its own version within about the time this read-modify-write took. So,
+    twice that time after writing, the permissions are read again and compared with those
+    written. If they differ, another task wrote meanwhile, and the update is retried after
+    a backoff. The other task in turn finds its write replaced, and retries from a version
+    including this task's clients.
+    """
+    changed = False
+    conflicts = 0
+    while True:
+        start = time.monotonic()
+        permissions = get_permissions(export)
+        new_permissions = get_new_permissions(module, permissions)
+        if new_permissions == permissions:
+            return changed, permissions
+        if module.check_mode:
+            return True, new_permissions
+        if conflicts > module.params['retries']:
+            msg = f"Export {module.params['export']} permissions were modified concurrently {conflicts} times. Cannot update them."
+            module.fail_json(changed=changed, msg=msg)
+
+        export.update_permissions(new_permissions)
+        changed = True
+        time.sleep(min(VERIFY_DELAY_MAX, VERIFY_DELAY_FACTOR * (time.monotonic() - start)))
+        if is_same_permissions(get_permissions(export), new_permissions):
+            return changed, new_permissions
+        wait_before_retry(conflicts)
+        conflicts += 1
 
 
 def get_export_client_fields(export, client_name):
@@ -194,6 +281,17 @@ def handle_stat(module):
     export = get_export(module, system)
     if not export:
         module.fail_json(msg=f"Export {module.params['export']} not found")
+    if module.params['clients'] is not None:
+        permissions = {item['client']: item for item in [unmunchify(item) for item in export.get_permissions()]}
+        clients = []
+        for client_name in get_desired_clients(module):
+            client_dict = dict(client=client_name, exists=client_name in permissions)
+            if client_dict['exists']:
+                client_dict['access_mode'] = permissions[client_name]['access']
+                client_dict['no_root_squash'] = permissions[client_name]['no_root_squash']
+            clients.append(client_dict)
+        found_count = len([client_dict for client_dict in clients if client_dict['exists']])
+        module.exit_json(changed=False, msg=f"{found_count} of {len(clients)} export clients found", clients=clients)
     client_name = module.params['client']
     field_dict = get_export_client_fields(export, client_name)
     result = dict(
@@ -212,9 +310,11 @@ def handle_present(module):
         msg = f"Export {module.params['export']} not found"
         module.fail_json(msg=msg)
 
-    changed = update_client(module, export)
+    changed, permissions = update_clients(module, export)
     msg = "Export client updated"
-    module.exit_json(changed=changed, msg=msg)
+    if module.params['clients'] is not None:
+        msg = "Export clients updated"
+    module.exit_json(changed=changed, msg=msg, permissions=permissions)
 
 
 def handle_absent(module):
@@ -226,9 +326,11 @@ def handle_absent(module):
         msg = "Export client already absent"
         module.exit_json(changed=False, msg=msg)
     else:
-        changed = delete_client(module, export)
+        changed, permissions = update_clients(module, export)
         msg = "Export client removed"
-        module.exit_json(changed=changed, msg=msg)
+        if module.params['clients'] is not None:
+            msg = "Export clients removed"
+        module.exit_json(changed=changed, msg=msg, permissions=permissions)
 
 
 def execute_state(module):
@@ -245,7 +347,15 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
+
+
+def check_options(module):
+    """ Verify module options are sane """
+    if (module.params['client'] is None) == (module.params['clients'] is None):
+        module.fail_json(msg="Either client or clients must be provided, but not both")
+    if module.params['purge_clients'] and (module.params['clients'] is None or module.params['state'] != 'present'):
+        module.fail_json(msg="purge_clients requires clients and state present")
 
 
 def main():
@@ -253,7 +363,19 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
-            client=dict(required=True),
+            client=dict(required=False),
+            clients=dict(
+                required=False,
+                type='list',
+                elements='dict',
+                options=dict(
+                    client=dict(required=True),
+                    access_mode=dict(choices=['RO', 'RW'], default='RW', type="str"),
+                    no_root_squash=dict(type='bool', default=False),
+                ),
+            ),
+            purge_clients=dict(type='bool', default=False),
+            retries=dict(type='int', default=5),
             state=dict(default='present', choices=['stat', 'present', 'absent']),
             access_mode=dict(choices=['RO', 'RW'], default='RW', type="str"),
             no_root_squash=dict(type='bool', default='no'),
@@ -270,6 +392,7 @@ def main():
     if not HAS_INFINISDK:
         module.fail_json(msg=missing_required_lib('infinisdk'))
 
+    check_options(module)
     execute_state(module)
 
 
@@ -69,17 +69,14 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
     merge_two_dicts,
     get_system,
+    logout_system,
     infinibox_argument_spec,
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
-
 
 def find_switch_by_name(module):
     """ Find switch by name """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     switch = module.params['switch_name']
     path = f"fc/switches?name={switch}"
     system = get_system(module)
@@ -108,6 +105,7 @@ def handle_stat(module):
 
 def handle_rename(module):
     """ Handle rename state """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     switch_name = module.params['switch_name']
     new_switch_name = module.params['new_switch_name']
 
@@ -145,7 +143,7 @@ def execute_state(module):
             module.exit_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -92,6 +92,15 @@ options:
     required: false
     default: "Default"
     choices: ["Default", "True", "False"]
+  fields:
+    description:
+      - Limit the stat result to these fields. By default all fields are returned.
+      - The file system is fetched using one query limited to the fields required.
+    type: list
+    elements: str
+    required: false
+    choices: [ "created_at", "filesystem_id", "filesystem_type", "has_children", "lock_expires_at", "lock_state", "mapped", "name",
+               "parent_id", "provisioning", "serial", "size", "updated_at", "used", "write_protected" ]
 extends_documentation_fragment:
     - infinibox
 requirements:
@@ -143,34 +152,34 @@ from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 HAS_INFINISDK = True
 try:
     from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+        HAS_INFINISDK,
         api_wrapper,
         check_snapshot_lock_options,
         get_filesystem,
         get_fs_by_sn,
+        get_object_fields,
         get_pool,
         get_system,
         infinibox_argument_spec,
+        logout_system,
         manage_snapshot_locks,
     )
 except ModuleNotFoundError:
     from infinibox import (  # Used when hacking
+        HAS_INFINISDK,
         api_wrapper,
         check_snapshot_lock_options,
         get_filesystem,
+        get_object_fields,
         get_pool,
         get_system,
         infinibox_argument_spec,
+        logout_system,
         manage_snapshot_locks,
     )
 except ImportError:
     HAS_INFINISDK = False
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-    from infinisdk.core.exceptions import ObjectNotFound
-except ImportError:
-    HAS_INFINISDK = False
-
 CAPACITY_IMP_ERR = None
 try:
     from capacity import KiB, Capacity
@@ -179,6 +188,26 @@ try:
 except ImportError:
     HAS_CAPACITY = False
 
+# Stat result keys and the file system fields they are built from
+STAT_FIELDS = {
+    "created_at": "created_at",
+    "filesystem_id": "id",
+    "filesystem_type": "type",
+    "has_children": "has_children",
+    "lock_expires_at": "lock_expires_at",
+    "lock_state": "lock_state",
+    "mapped": "mapped",
+    "name": "name",
+    "parent_id": "parent",
+    "provisioning": "provisioning",
+    "serial": "serial",
+    "size": "size",
+    "updated_at": "updated_at",
+    "used": "used_size",
+    "write_protected": "write_protected",
+}
+STRING_STAT_FIELDS = ["created_at", "lock_expires_at", "mapped", "size", "updated_at", "used"]
+
 
 @api_wrapper
 def create_filesystem(module, system):
@@ -253,6 +282,7 @@ def delete_filesystem(module, filesystem):
 @api_wrapper
 def create_fs_snapshot(module, system):
     """ Create Snapshot from parent fs """
+    from infinisdk.core.exceptions import ObjectNotFound  # pylint: disable=import-outside-toplevel
     snapshot_name = module.params["name"]
     parent_fs_name = module.params["parent_fs_name"]
     changed = False
@@ -327,6 +357,7 @@ def find_fs_id(module, system, fs_name):
 @api_wrapper
 def restore_fs_from_snapshot(module, system):
     """ Use snapshot to restore a file system """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     changed = False
     is_restoring = module.params["restore_fs_from_snapshot"]
     fs_type = module.params["fs_type"]
@@ -356,62 +387,45 @@ def restore_fs_from_snapshot(module, system):
     return changed
 
 
+@api_wrapper
+def get_filesystem_stat_fields(module, system, field_names):
+    """ Return the named fields of the file system, found by name or serial, using one query. None if not found. """
+    if module.params["name"]:
+        return get_object_fields(system.filesystems, field_names, name=module.params["name"])
+    return get_object_fields(system.filesystems, field_names, serial=module.params["serial"])
+
+
 def handle_stat(module):
     """ Handle the stat state """
     system = get_system(module)
-    pool = get_pool(module, system)
-    if module.params["name"]:
-        filesystem = get_filesystem(module, system)
-    else:
-        filesystem = get_fs_by_sn(module, system)
     fs_type = module.params["fs_type"]
-
     if fs_type == "master":
+        pool = get_pool(module, system)
         if not pool:
             module.fail_json(msg=f"Pool {module.params['pool']} not found")
-    if not filesystem:
+
+    stat_fields = module.params["fields"] or list(STAT_FIELDS)
+    field_names = {STAT_FIELDS[stat_field] for stat_field in stat_fields} | {"type"}
+    fields = get_filesystem_stat_fields(module, system, field_names)
+    if not fields:
         module.fail_json(msg=f"File system {module.params['name']} not found")
-    fields = filesystem.get_fields()  # from_cache=True, raw_value=True)
-
-    created_at = str(fields.get("created_at", None))
-    filesystem_id = fields.get("id", None)
-    filesystem_type = fields.get("type", None)
-    has_children = fields.get("has_children", None)
-    lock_expires_at = str(filesystem.get_lock_expires_at())
-    lock_state = filesystem.get_lock_state()
-    mapped = str(fields.get("mapped", None))
-    name = fields.get("name", None)
-    parent_id = fields.get("parent_id", None)
-    provisioning = fields.get("provisioning", None)
-    serial = fields.get("serial", None)
-    size = str(filesystem.get_size())
-    updated_at = str(fields.get("updated_at", None))
-    used = str(fields.get("used_size", None))
-    write_protected = fields.get("write_protected", None)
-    if filesystem_type == "SNAPSHOT":
+
+    if fields.get("type") == "SNAPSHOT":
         msg = "File system snapshot stat found"
     else:
         msg = "File system stat found"
 
     result = dict(
         changed=False,
-        created_at=created_at,
-        filesystem_id=filesystem_id,
-        filesystem_type=filesystem_type,
-        has_children=has_children,
-        lock_state=lock_state,
-        lock_expires_at=lock_expires_at,
-        mapped=mapped,
         msg=msg,
-        name=name,
-        parent_id=parent_id,
-        provisioning=provisioning,
-        serial=serial,
-        size=size,
-        updated_at=updated_at,
-        used=used,
-        write_protected=write_protected,
     )
+    for stat_field in stat_fields:
+        value = fields.get(STAT_FIELDS[stat_field], None)
+        if stat_field == "parent_id" and value is not None:
+            value = value.id
+        elif stat_field in STRING_STAT_FIELDS:
+            value = str(value)
+        result[stat_field] = value
     module.exit_json(**result)
 
 
@@ -495,7 +509,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -548,6 +562,7 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
+            fields=dict(required=False, type="list", elements="str", default=None, choices=list(STAT_FIELDS)),
             fs_type=dict(choices=["master", "snapshot"], default="master"),
             name=dict(required=False, default=None),
             parent_fs_name=dict(default=None, required=False),
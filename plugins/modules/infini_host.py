@@ -55,6 +55,7 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     get_host,
     unixMillisecondsToDate,
     merge_two_dicts,
@@ -167,7 +168,7 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def main():
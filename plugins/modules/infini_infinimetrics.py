@@ -70,20 +70,17 @@ EXAMPLES = r"""
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
     merge_two_dicts,
     get_system,
+    logout_system,
     infinibox_argument_spec,
 )
 
-HAS_INFINISDK = True
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    HAS_INFINISDK = False
-
 
 def handle_stat(module):
     """ Handle the stat state parameter """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     infinimetrics_system = module.params['infinimetrics_system']
     infinibox_system = module.params['system']
     path = "system/certificates"
@@ -103,6 +100,7 @@ def handle_stat(module):
 
 def handle_present(module):
     """ Handle the present state parameter """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     certificate_file_name = module.params['certificate_file_name']
     path = "system/certificates"
     system = get_system(module)
@@ -134,6 +132,7 @@ def handle_present(module):
 
 def handle_absent(module):
     """ Handle the absent state parameter. """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     path = "system/certificates/generate_self_signed?approved=true"
     system = get_system(module)
     try:
@@ -163,7 +162,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def main():
@@ -103,88 +103,75 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     get_cluster,
     get_host,
+    get_lun_table,
     get_system,
     get_volume,
     infinibox_argument_spec,
+    invalidate_lun_table,
+    logout_system,
     merge_two_dicts
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
-
 
 def vol_is_mapped_to_host(volume, host):
     """ Return a bool showing if a vol is mapped to a host """
-    host_luns = host.get_luns()
-    for lun in host_luns:
-        if lun.volume == volume:
-            return True
-    return False
+    return get_lun_table(host).get_lun_by_volume_id(volume.id) is not None
 
 
 def vol_is_mapped_to_cluster(volume, cluster):
     """ Return a bool showing if a vol is mapped to a cluster """
-    cluster_luns = cluster.get_luns()
-    for lun in cluster_luns:
-        if lun.volume == volume:
-            return True
-    return False
+    return get_lun_table(cluster).get_lun_by_volume_id(volume.id) is not None
 
 
-def find_host_lun_use(module, host, volume):
-    """ Return a dict showing if a host lun matches a volume. """
+def find_lun_use(module, host_or_cluster, volume):
+    """ Return a dict showing if a host's or cluster's lun matches a volume. """
     check_result = {'lun_used': False, 'lun_volume_matches': False}
     desired_lun = module.params['lun']
 
     if desired_lun:
-        for host_lun in host.get_luns():
-            if desired_lun == host_lun.lun:
-                if host_lun.volume == volume:
-                    check_result = {'lun_used': True, 'lun_volume_matches': True}
-                else:
-                    check_result = {'lun_used': True, 'lun_volume_matches': False}
+        lun_info = get_lun_table(host_or_cluster).get_lun_by_number(desired_lun)
+        if lun_info:
+            check_result = {'lun_used': True, 'lun_volume_matches': lun_info['volume_id'] == volume.id}
 
     return check_result
 
 
-def find_cluster_lun_use(module, cluster, volume):
-    """ Return a dict showing if a cluster lun matches a volume. """
-    check_result = {'lun_used': False, 'lun_volume_matches': False}
-    desired_lun = module.params['lun']
+def find_host_lun_use(module, host, volume):
+    """ Return a dict showing if a host lun matches a volume. """
+    return find_lun_use(module, host, volume)
 
-    if desired_lun:
-        for cluster_lun in cluster.get_luns():
-            if desired_lun == cluster_lun:
-                if cluster.volume == volume:
-                    check_result = {'lun_used': True, 'lun_volume_matches': True}
-                else:
-                    check_result = {'lun_used': True, 'lun_volume_matches': False}
 
-    return check_result
+def find_cluster_lun_use(module, cluster, volume):
+    """ Return a dict showing if a cluster lun matches a volume. """
+    return find_lun_use(module, cluster, volume)
 
 
 def find_host_lun(host, volume):
     """ Find a hosts lun """
-    found_lun = None
-    luns = host.get_luns()
-
-    for lun in luns:
-        if lun.volume == volume:
-            found_lun = lun.lun
-    return found_lun
+    lun_info = get_lun_table(host).get_lun_by_volume_id(volume.id)
+    if lun_info:
+        return lun_info['lun']
+    return None
 
 
 def find_cluster_lun(cluster, volume):
     """ Find a cluster's LUN """
-    found_lun = None
-    luns = cluster.get_luns()
+    lun_info = get_lun_table(cluster).get_lun_by_volume_id(volume.id)
+    if lun_info:
+        return lun_info['lun']
+    return None
 
-    for lun in luns:
-        if lun.volume == volume:
-            found_lun = lun.lun
-    return found_lun
+
+def unmap_lun(host_or_cluster, lun):
+    """ Unmap a LUN from a host or cluster without reloading the host's or cluster's LUNs """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    url = host_or_cluster.get_this_url_path().add_path(f"luns/lun/{lun}")
+    try:
+        host_or_cluster.system.api.delete(url)
+    except APICommandFailed as err:
+        if err.status_code != 404:
+            raise
+    invalidate_lun_table(host_or_cluster)
 
 
 @api_wrapper
@@ -213,6 +200,7 @@ def create_mapping(module, system):
 @api_wrapper
 def create_mapping_to_cluster(module, system):
     """ Create mapping of volume to cluster. If already mapped, exit_json with changed False. """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     changed = False
 
     cluster = get_cluster(module, system)
@@ -230,6 +218,7 @@ def create_mapping_to_cluster(module, system):
         desired_lun = module.params['lun']
         if not module.check_mode:
             cluster.map_volume(volume, lun=desired_lun)
+            invalidate_lun_table(cluster)
         changed = True
     except APICommandFailed as err:
         if "is already mapped" not in str(err):
@@ -242,9 +231,10 @@ def create_mapping_to_cluster(module, system):
 @api_wrapper
 def create_mapping_to_host(module, system):
     """ Create mapping of volume to host. If already mapped, exit_json with changed False. """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     changed = False
 
-    host = system.hosts.get(name=module.params['host'])
+    host = get_host(module, system)
     volume = get_volume(module, system)
     volume_name = module.params['volume']
     host_name = module.params['host']
@@ -259,6 +249,7 @@ def create_mapping_to_host(module, system):
         desired_lun = module.params['lun']
         if not module.check_mode:
             host.map_volume(volume, lun=desired_lun)
+            invalidate_lun_table(host)
         changed = True
     except APICommandFailed as err:
         if "is already mapped" not in str(err):
@@ -353,16 +344,13 @@ def delete_mapping_to_host(module, system):
         host_name = module.params['host']
 
         if volume and host:
-            try:
-                existing_lun = find_host_lun(host, volume)
-                host.unmap_volume(volume)
+            existing_lun = find_host_lun(host, volume)
+            if existing_lun is not None:
+                unmap_lun(host, existing_lun)
                 changed = True
                 msg = f"Volume '{volume_name}' was unmapped from host '{host_name}' freeing lun '{existing_lun}'"
-            except KeyError as err:
-                if 'has no logical units' not in str(err):
-                    module.fail_json(f"Cannot unmap volume '{volume_name}' from host '{host_name}': {str(err)}")
-                else:
-                    msg = f"Volume '{volume_name}' was not mapped to host '{host_name}' and so unmapping was not executed"
+            else:
+                msg = f"Volume '{volume_name}' was not mapped to host '{host_name}' and so unmapping was not executed"
         else:
             msg = f"Either volume '{volume_name}' or host '{host_name}' does not exist. Unmapping was not executed"
     else:  # check_mode
@@ -389,17 +377,13 @@ def delete_mapping_to_cluster(module, system):
         cluster_name = module.params['cluster']
 
         if volume and cluster:
-            try:
-                existing_lun = find_cluster_lun(cluster, volume)
-                cluster.unmap_volume(volume)
+            existing_lun = find_cluster_lun(cluster, volume)
+            if existing_lun is not None:
+                unmap_lun(cluster, existing_lun)
                 changed = True
                 msg = f"Volume '{volume_name}' was unmapped from cluster '{cluster_name}' freeing lun '{existing_lun}'"
-            except KeyError as err:
-                if 'has no logical units' not in str(err):
-                    msg = f"Cannot unmap volume '{volume_name}' from cluster '{cluster_name}': {str(err)}"
-                    module.fail_json(msg=msg)
-                else:
-                    msg = f"Volume '{volume_name}' was not mapped to cluster '{cluster_name}' and so unmapping was not executed"
+            else:
+                msg = f"Volume '{volume_name}' was not mapped to cluster '{cluster_name}' and so unmapping was not executed"
         else:
             msg = f"Either volume '{volume_name}' or cluster '{cluster_name}' does not exist. Unmapping was not executed"
     else:  # check_mode
@@ -410,13 +394,12 @@ def delete_mapping_to_cluster(module, system):
 
 def get_mapping_fields(volume, host_or_cluster):
     """ Get mapping fields """
-    luns = host_or_cluster.get_luns()
-    for lun in luns:
-        if volume.get_name() == lun.volume.get_name():
-            field_dict = dict(
-                id=lun.id,
-            )
-            return field_dict
+    lun_info = get_lun_table(host_or_cluster).get_lun_by_volume_id(volume.id)
+    if lun_info:
+        field_dict = dict(
+            id=lun_info['id'],
+        )
+        return field_dict
     return dict()
 
 
@@ -550,7 +533,7 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_parameters(module):
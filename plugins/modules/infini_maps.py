@@ -0,0 +1,364 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# pylint: disable=invalid-name,use-dict-literal,too-many-branches,too-many-locals,line-too-long,wrong-import-position
+
+"""This module creates or deletes many mappings on Infinibox in one task."""
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: infini_maps
+version_added: 2.16.0
+short_description: Create and Delete many mappings of volumes to hosts or clusters on Infinibox
+description:
+    - This module creates or deletes a list of mappings of volumes to hosts or clusters on Infinibox.
+    - Volumes, hosts and clusters are resolved using a few batched queries. Each host's and cluster's LUN table is loaded once.
+      LUNs are allocated in memory. Only the map and unmap calls required are executed.
+    - Use this module instead of looping over infini_map when managing many mappings.
+    - For Linux hosts, after calling this module, the playbook should execute "rescan-scsi-bus.sh" on the host when creating mappings.
+    - When removing mappings "rescan-scsi-bus.sh --remove" should be called.
+author: David Ohlemacher (@ohlemacher)
+options:
+  mappings:
+    description:
+      - List of mappings. Each mapping requires a volume and either a host or a cluster.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      volume:
+        description:
+          - Volume name to map.
+        type: str
+        required: true
+      host:
+        description:
+          - Host Name
+        type: str
+        required: false
+      cluster:
+        description:
+          - Cluster Name
+        type: str
+        required: false
+      lun:
+        description:
+          - Volume lun. If not specified when mapping, the lowest free lun is used.
+        type: int
+        required: false
+      state:
+        description:
+          - Overrides the module state for this mapping. Either present or absent.
+        type: str
+        required: false
+        choices: [ "present", "absent" ]
+  state:
+    description:
+      - Creates mappings when present or removes them when absent, or provides
+        details of the mappings when stat.
+    required: false
+    default: present
+    choices: [ "stat", "present", "absent" ]
+    type: str
+extends_documentation_fragment:
+    - infinibox
+'''
+
+EXAMPLES = r'''
+- name: Map volumes to a cluster and a host
+  infini_maps:
+    mappings:
+      - volume: db_data_01
+        cluster: db-cluster
+      - volume: db_data_02
+        cluster: db-cluster
+        lun: 12
+      - volume: db_backup
+        host: backup.example.com
+    state: present  # Default
+    user: admin
+    password: secret
+    system: ibox001
+
+- name: Unmap volumes from a cluster
+  infini_maps:
+    mappings:
+      - volume: db_data_01
+        cluster: db-cluster
+      - volume: db_data_02
+        cluster: db-cluster
+    state: absent
+    user: admin
+    password: secret
+    system: ibox001
+'''
+
+# RETURN = r''' # '''
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
+    LunTable,
+    api_wrapper,
+    get_objects_by_names,
+    get_system,
+    infinibox_argument_spec,
+    logout_system,
+)
+
+TARGET_COLLECTIONS = {
+    'host': 'hosts',
+    'cluster': 'clusters',
+}
+
+
+def get_target(mapping):
+    """ Return a (target_type, target_name) tuple for a mapping """
+    if mapping['host']:
+        return ('host', mapping['host'])
+    return ('cluster', mapping['cluster'])
+
+
+def get_desired_state(module, mapping):
+    """ Return the desired state of a mapping, falling back to the module's state """
+    return mapping['state'] or module.params['state']
+
+
+@api_wrapper
+def load_lun_tables(module, system):
+    """
+    Resolve the hosts and clusters of all mappings and load each one's LUN table.
+    A cluster and its hosts share one set of reserved LUNs, the LUNs used by any of them,
+    so that a LUN mapped to one of them is not allocated to another in the same task.
+    Return a dict of (target_type, target_name): (target_id, LunTable) for targets found.
+    """
+    mappings = module.params['mappings']
+    host_names = [mapping['host'] for mapping in mappings if mapping['host']]
+    cluster_names = [mapping['cluster'] for mapping in mappings if mapping['cluster']]
+
+    hosts = get_objects_by_names(system, 'hosts', host_names, fields=['luns'])
+    clusters = get_objects_by_names(system, 'clusters', cluster_names, fields=['luns', 'hosts'])
+
+    cluster_host_ids = {host['id'] for cluster in clusters.values() for host in cluster['hosts']}
+    cluster_hosts = get_objects_by_names(system, 'hosts', cluster_host_ids, fields=['luns'], name_field='id')
+
+    lun_tables = {}
+    shared_reserved_luns = {}  # Reserved LUN sets keyed by the IDs of the hosts of clusters
+    for cluster_name, cluster in clusters.items():
+        reserved_luns = {int(lun_info['lun']) for lun_info in cluster['luns']}
+        for cluster_host in cluster['hosts']:
+            member = cluster_hosts.get(cluster_host['id'], {'luns': []})
+            reserved_luns.update(int(lun_info['lun']) for lun_info in member['luns'])
+            shared_reserved_luns[cluster_host['id']] = reserved_luns
+        lun_tables[('cluster', cluster_name)] = (cluster['id'], LunTable(cluster['luns'], reserved_luns))
+    for host_name, host in hosts.items():
+        lun_tables[('host', host_name)] = (host['id'], LunTable(host['luns'], shared_reserved_luns.get(host['id'])))
+    return lun_tables
+
+
+def map_volume(module, system, target_type, target_id, volume_id, lun):
+    """ Map a volume to a host or cluster using a specific LUN. Return the new LUN dict. """
+    lun_info = dict(lun=lun, volume_id=volume_id)
+    if not module.check_mode:
+        url = f"{TARGET_COLLECTIONS[target_type]}/{target_id}/luns"
+        lun_info = system.api.post(path=url, data=lun_info).get_result()
+    return lun_info
+
+
+def unmap_volume(module, system, target_type, target_id, lun):
+    """ Unmap the volume using a LUN from a host or cluster """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    if not module.check_mode:
+        url = f"{TARGET_COLLECTIONS[target_type]}/{target_id}/luns/lun/{lun}"
+        try:
+            system.api.delete(path=url)
+        except APICommandFailed as err:
+            if err.status_code != 404:
+                raise
+
+
+def get_item_result(mapping, state, changed, lun=None, msg=None):
+    """ Return a per mapping result """
+    target_type, target_name = get_target(mapping)
+    result = dict(volume=mapping['volume'], state=state, changed=changed)
+    result[target_type] = target_name
+    if lun is not None:
+        result['lun'] = lun
+    if msg:
+        result['msg'] = msg
+    return result
+
+
+def plan_and_apply_mapping(module, system, mapping, volume, lun_table, target_id):
+    """
+    Make one mapping present or absent, using and updating its target's LUN table.
+    Return the mapping's result. Fail the mapping, not the module, for conflicts.
+    """
+    volume_name = mapping['volume']
+    target_type, target_name = get_target(mapping)
+    desired_state = get_desired_state(module, mapping)
+    desired_lun = mapping['lun']
+    existing_lun = lun_table.get_lun_by_volume_id(volume['id'])
+
+    if desired_state == 'absent':
+        if not existing_lun:
+            return get_item_result(mapping, desired_state, False, msg=f"Volume '{volume_name}' is not mapped to {target_type} '{target_name}'")
+        unmap_volume(module, system, target_type, target_id, existing_lun['lun'])
+        lun_table.remove(volume['id'])
+        return get_item_result(mapping, desired_state, True, lun=existing_lun['lun'])
+
+    if existing_lun:
+        if desired_lun and existing_lun['lun'] != desired_lun:
+            msg = (
+                f"Cannot change the lun from '{existing_lun['lun']}' to '{desired_lun}' "
+                f"for existing mapping of volume '{volume_name}' to {target_type} '{target_name}'"
+            )
+            result = get_item_result(mapping, desired_state, False, lun=existing_lun['lun'], msg=msg)
+            result['failed'] = True
+            return result
+        return get_item_result(mapping, desired_state, False, lun=existing_lun['lun'])
+
+    if desired_lun:
+        if lun_table.get_lun_by_number(desired_lun) or desired_lun in lun_table.reserved_luns:
+            msg = f"Cannot create mapping of volume '{volume_name}' to {target_type} '{target_name}' using lun '{desired_lun}'. Lun in use."
+            result = get_item_result(mapping, desired_state, False, msg=msg)
+            result['failed'] = True
+            return result
+        lun = desired_lun
+    else:
+        lun = lun_table.find_free_lun()
+    lun_info = map_volume(module, system, target_type, target_id, volume['id'], lun)
+    lun_table.add(lun_info)
+    lun_table.reserved_luns.add(int(lun_info['lun']))  # Reserved for the cluster or hosts sharing the set, if any
+    return get_item_result(mapping, desired_state, True, lun=lun_info['lun'])
+
+
+def handle_stat(module):
+    """ Return the LUN of each mapping, or that it is not mapped """
+    system = get_system(module)
+    mappings = module.params['mappings']
+    volumes = get_objects_by_names(system, 'volumes', [mapping['volume'] for mapping in mappings], fields=['id'])
+    lun_tables = load_lun_tables(module, system)
+
+    results = []
+    for mapping in mappings:
+        volume = volumes.get(mapping['volume'])
+        target = lun_tables.get(get_target(mapping))
+        existing_lun = None
+        if volume and target:
+            existing_lun = target[1].get_lun_by_volume_id(volume['id'])
+        if existing_lun:
+            results.append(get_item_result(mapping, 'present', False, lun=existing_lun['lun']))
+        else:
+            results.append(get_item_result(mapping, 'absent', False))
+
+    mapped_count = len([result for result in results if result['state'] == 'present'])
+    msg = f"{mapped_count} of {len(results)} mappings found"
+    module.exit_json(changed=False, msg=msg, mappings=results)
+
+
+def handle_present_and_absent(module):
+    """ Create or remove mappings so that each matches its desired state """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    system = get_system(module)
+    mappings = module.params['mappings']
+    volumes = get_objects_by_names(system, 'volumes', [mapping['volume'] for mapping in mappings], fields=['id'])
+    lun_tables = load_lun_tables(module, system)
+
+    results = []
+    for mapping in mappings:
+        desired_state = get_desired_state(module, mapping)
+        target_type, target_name = get_target(mapping)
+        volume = volumes.get(mapping['volume'])
+        target = lun_tables.get((target_type, target_name))
+        if not volume or not target:
+            msg = f"Either volume '{mapping['volume']}' or {target_type} '{target_name}' does not exist"
+            result = get_item_result(mapping, desired_state, False, msg=msg)
+            result['failed'] = desired_state == 'present'
+            results.append(result)
+            continue
+        target_id, lun_table = target
+        try:
+            results.append(plan_and_apply_mapping(module, system, mapping, volume, lun_table, target_id))
+        except APICommandFailed as err:
+            result = get_item_result(mapping, desired_state, False, msg=str(err))
+            result['failed'] = True
+            results.append(result)
+
+    changed = any(result['changed'] for result in results)
+    changed_count = len([result for result in results if result['changed']])
+    failed_count = len([result for result in results if result.get('failed')])
+    if failed_count:
+        msg = f"{failed_count} of {len(results)} mappings failed. {changed_count} mappings changed."
+        module.fail_json(changed=changed, msg=msg, mappings=results)
+    msg = f"{changed_count} of {len(results)} mappings changed"
+    module.exit_json(changed=changed, msg=msg, mappings=results)
+
+
+def execute_state(module):
+    """Determine which state function to execute and do so"""
+    state = module.params['state']
+    try:
+        if state == 'stat':
+            handle_stat(module)
+        elif state in ['present', 'absent']:
+            handle_present_and_absent(module)
+        else:
+            module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
+    finally:
+        system = get_system(module)
+        logout_system(system)
+
+
+def check_parameters(module):
+    """Verify module options are sane"""
+    for mapping in module.params['mappings']:
+        volume_name = mapping['volume']
+        if mapping['host'] and mapping['cluster']:
+            msg = f"Mapping of volume '{volume_name}' requires a host or a cluster but not both to be provided"
+            module.fail_json(msg=msg)
+        if not mapping['host'] and not mapping['cluster']:
+            msg = f"Mapping of volume '{volume_name}' requires a host or a cluster to be provided"
+            module.fail_json(msg=msg)
+
+
+def main():
+    """ Main """
+    argument_spec = infinibox_argument_spec()
+    argument_spec.update(
+        dict(
+            mappings=dict(
+                required=True,
+                type='list',
+                elements='dict',
+                options=dict(
+                    volume=dict(required=True),
+                    host=dict(required=False, default=None),
+                    cluster=dict(required=False, default=None),
+                    lun=dict(required=False, type='int', default=None),
+                    state=dict(required=False, default=None, choices=['present', 'absent']),
+                ),
+            ),
+            state=dict(default='present', choices=['stat', 'present', 'absent']),
+        )
+    )
+
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    if not HAS_INFINISDK:
+        module.fail_json(msg=missing_required_lib('infinisdk'))
+
+    check_parameters(module)
+    execute_state(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,8 @@ description:
     - This module creates, deletes or modifies metadata on Infinibox.
     - Deleting metadata by object, without specifying a key, is not implemented for any object_type (e.g. DELETE api/rest/metadata/system).
     - This would delete all metadata belonging to the object. Instead delete each key explicitely using its key name.
+    - Metadata of many objects may be managed in one task using the metadata option.
+      All metadata of an object_type may be read using state stat without an object_name.
 author: David Ohlemacher (@ohlemacher)
 options:
   object_type:
@@ -36,14 +38,32 @@ options:
     required: false
   key:
     description:
-      - Name of the metadata key
+      - Name of the metadata key. Required unless metadata is provided or all metadata of an object_type is read.
     type: str
-    required: true
+    required: false
   value:
     description:
       - Value of the metadata key
     type: str
     required: false
+  metadata:
+    description:
+      - Metadata of many objects of object_type, as a dict of object names to dicts of keys and values.
+        Use instead of object_name, key and value to manage many objects in one task.
+      - Object IDs and existing metadata are fetched using batched queries.
+        When present, only keys whose values differ are written, using one request per object.
+        Values are written as strings, e.g. 3 as "3".
+        When absent, the listed keys are removed. Their values are ignored.
+        When stat, all metadata of the listed objects is returned.
+      - Not supported for object_type system.
+    type: dict
+    required: false
+  pool_name:
+    description:
+      - When reading all metadata of an object_type, only read the metadata of objects in this pool.
+        Applies to object types vol, vol-snap, fs and fs-snap.
+    type: str
+    required: false
   state:
     description:
       - Creates/Modifies metadata when present or removes when absent.
@@ -79,465 +99,371 @@ EXAMPLES = r"""
     user: admin
     password: secret
     system: ibox001
+- name: Set the owner of many volumes
+  infini_metadata:
+    object_type: vol
+    metadata:
+      db_data_01:
+        owner: dba
+      db_data_02:
+        owner: dba
+        tier: gold
+    state: present
+    user: admin
+    password: secret
+    system: ibox001
+- name: Read the metadata of all volumes in pool foo
+  infini_metadata:
+    object_type: vol
+    pool_name: foo
+    state: stat
+    user: admin
+    password: secret
+    system: ibox001
 """
 
 # RETURN = r''' # '''
 
 import json
+from urllib.parse import quote
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
     HAS_INFINISDK,
+    INFINIBOX_OBJECT_IDS,
     api_wrapper,
-    get_cluster,
-    get_filesystem,
-    get_host,
-    get_pool,
+    get_objects_by_names,
     get_system,
-    get_volume,
     infinibox_argument_spec,
+    iter_paginated_results,
+    iter_results_by_field_values,
+    logout_system,
+    MAX_PAGE_SIZE,
 )
 
-HAS_INFINISDK = True
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    HAS_INFINISDK = False
-
 HAS_CAPACITY = False
 
-
-@api_wrapper
-def get_metadata_vol(module, disable_fail):
-    """ Get metadata about a volume """
-    system = get_system(module)
-    object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
-    key = module.params["key"]
-    metadata = None
-
-    vol = get_volume(module, system)
-    if vol:
-        path = f"metadata/{vol.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"Volume {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"Volume with object name {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
-
-    return metadata
+OBJECT_TYPE_DESCRIPTIONS = {
+    "cluster": "Cluster",
+    "fs": "File system",
+    "fs-snap": "File system snapshot",
+    "host": "Host",
+    "pool": "Pool",
+    "vol": "Volume",
+    "vol-snap": "Volume snapshot",
+}
+
+# Collection and dataset type of each object_type supporting bulk metadata
+BULK_OBJECT_TYPES = {
+    "cluster": ("clusters", None),
+    "fs": ("filesystems", "MASTER"),
+    "fs-snap": ("filesystems", "SNAPSHOT"),
+    "host": ("hosts", None),
+    "pool": ("pools", None),
+    "vol": ("volumes", "MASTER"),
+    "vol-snap": ("volumes", "SNAPSHOT"),
+}
 
 
 @api_wrapper
-def get_metadata_fs(module, disable_fail):
-    """ Get metadata about a fs """
-    system = get_system(module)
+def get_object_id(module, system):
+    """
+    Return the ID of the object named object_name of object_type, or None if not found.
+    IDs are cached so that reading and writing metadata resolve the object once.
+    """
     object_type = module.params["object_type"]
     object_name = module.params["object_name"]
-    key = module.params["key"]
-    metadata = None
-
-    fs = get_filesystem(module, system)
-    if fs:
-        path = f"metadata/{fs.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"File system {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"File system named {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
-
-    return metadata
-
-
-@api_wrapper
-def get_metadata_host(module, disable_fail):
-    """ Get metadata about a host """
-    system = get_system(module)
+    if object_type == "system":
+        return None
+    cache_key = (object_type, object_name)
+    if cache_key not in INFINIBOX_OBJECT_IDS:
+        collection, _ = BULK_OBJECT_TYPES[object_type]
+        objects = get_objects_by_names(system, collection, [object_name], fields=["id"])
+        object_id = None
+        if object_name in objects:
+            object_id = objects[object_name]["id"]
+        INFINIBOX_OBJECT_IDS[cache_key] = object_id
+    return INFINIBOX_OBJECT_IDS[cache_key]
+
+
+def get_object_description(module):
+    """ Return a description of the object for messages, e.g. Volume named foo """
     object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
-    key = module.params["key"]
-    metadata = None
+    if object_type == "system":
+        return "System"
+    return f"{OBJECT_TYPE_DESCRIPTIONS[object_type]} named {module.params['object_name']}"
 
-    host = get_host(module, system)
-    if host:
-        path = f"metadata/{host.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"Host {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"Host named {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
 
-    return metadata
+def get_metadata_path(module, object_id):
+    """ Return the metadata path of the object """
+    if module.params["object_type"] == "system":
+        return "metadata/system"
+    return f"metadata/{object_id}"
 
 
 @api_wrapper
-def get_metadata_cluster(module, disable_fail):
-    """ Get metadata about a cluster """
-    system = get_system(module)
+def get_metadata(module, system, object_id, disable_fail=False):
+    """
+    Find and return metadata
+    Use disable_fail when we are looking for metadata
+    and it may or may not exist and neither case is an error.
+    """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
     key = module.params["key"]
+
     metadata = None
+    try:
+        if object_type == "system":
+            results = system.api.get(path=f"metadata/system?key={key}").get_result()
+            if results:
+                metadata = results[0]
+        else:
+            metadata = system.api.get(path=f"{get_metadata_path(module, object_id)}/{key}").get_result()
+    except APICommandFailed as err:
+        if err.status_code != 404:
+            raise
 
-    cluster = get_cluster(module, system)
-    if cluster:
-        path = f"metadata/{cluster.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"Cluster {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"Cluster named {object_name} not found. Cannot stat its metadata."
+    if not metadata and not disable_fail:
+        msg = f"Metadata for {get_object_description(module)} with key {key} not found. Cannot stat."
         module.fail_json(msg=msg)
-
     return metadata
 
 
 @api_wrapper
-def get_metadata_fssnap(module, disable_fail):
-    """ Get metadata about a fs snapshot """
-    system = get_system(module)
-    object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
+def put_metadata(module, system, object_id):
+    """Create metadata key with a value.  The changed variable is found elsewhere."""
     key = module.params["key"]
-    metadata = None
+    value = module.params["value"]
 
-    fssnap = get_filesystem(module, system)
-    if fssnap:
-        path = f"metadata/{fssnap.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"File system snapshot {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"File system snapshot named {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
+    # Could check metadata value size < 32k
 
-    return metadata
+    data = {
+        key: value
+    }
+    system.api.put(path=get_metadata_path(module, object_id), data=data)
+    # Variable 'changed' not returned by design
 
 
 @api_wrapper
-def get_metadata_pool(module, disable_fail):
-    """ Get metadata about a pool """
-    system = get_system(module)
-    object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
+def delete_metadata(module, system, object_id):
+    """
+    Remove metadata key.
+    Not implemented by design: Deleting all of the system's metadata
+    using 'DELETE api/rest/metadata/system'.
+    """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     key = module.params["key"]
-    metadata = None
-
-    pool = get_pool(module, system)
-    if pool:
-        path = f"metadata/{pool.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"Pool {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"Pool named {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
-
-    return metadata
+    changed = False
+    try:
+        system.api.delete(path=f"{get_metadata_path(module, object_id)}/{key}")
+        changed = True
+    except APICommandFailed as err:
+        if err.status_code != 404:
+            raise
+    return changed
 
 
 @api_wrapper
-def get_metadata_volsnap(module, disable_fail):
-    """ Get metadata for a volume snapshot """
-    system = get_system(module)
-    object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
-    key = module.params["key"]
-    metadata = None
+def get_object_ids(module, system, object_names):
+    """ Return a dict of object names to IDs for the named objects of object_type that exist, using batched queries """
+    collection, dataset_type = BULK_OBJECT_TYPES[module.params["object_type"]]
+    fields = ["type"] if dataset_type else ["id"]
+    objects = get_objects_by_names(system, collection, object_names, fields=fields)
+    return {
+        object_name: result["id"]
+        for object_name, result in objects.items()
+        if not dataset_type or result["type"] == dataset_type
+    }
 
-    volsnap = get_volume(module, system)
-    if volsnap:
-        path = f"metadata/{volsnap.id}/{key}"
-        try:
-            metadata = system.api.get(path=path)
-        except APICommandFailed:
-            if not disable_fail:
-                module.fail_json(
-                    f"Cannot find {object_type} metadata key. "
-                    f"Volume snapshot {object_name} key {key} not found"
-                )
-    elif not disable_fail:
-        msg = f"Volume snapshot named {object_name} not found. Cannot stat its metadata."
-        module.fail_json(msg=msg)
 
-    return metadata
+@api_wrapper
+def get_all_object_ids(module, system):
+    """ Return a dict of object names to IDs for all objects of object_type, optionally within pool_name """
+    collection, dataset_type = BULK_OBJECT_TYPES[module.params["object_type"]]
+    url = f"{collection}?fields=id,name"
+    if dataset_type:
+        url += f"&type={dataset_type}"
+    if module.params["pool_name"]:
+        url += f"&pool_name={quote(module.params['pool_name'], safe='')}"
+    return {result["name"]: result["id"] for result in iter_paginated_results(system, url)}
 
 
 @api_wrapper
-def get_metadata(module, disable_fail=False):
+def get_objects_metadata(module, system, object_ids):  # pylint: disable=unused-argument
     """
-    Find and return metadata
-    Use disable_fail when we are looking for metadata
-    and it may or may not exist and neither case is an error.
+    Return a dict of object IDs to dicts of their metadata keys and values.
+    Metadata is queried in batches of object IDs. When there are many objects,
+    it is cheaper to page through all metadata once.
     """
-    system = get_system(module)
-    object_type = module.params["object_type"]
-    object_name = module.params["object_name"]
-    key = module.params["key"]
-
-    if object_type == "system":
-        path = f"metadata/{object_type}?key={key}"
-        metadata = system.api.get(path=path)
-    elif object_type == "fs":
-        metadata = get_metadata_fs(module, disable_fail)
-    elif object_type == "vol":
-        metadata = get_metadata_vol(module, disable_fail)
-    elif object_type == "host":
-        metadata = get_metadata_host(module, disable_fail)
-    elif object_type == "cluster":
-        metadata = get_metadata_cluster(module, disable_fail)
-    elif object_type == "fs-snap":
-        metadata = get_metadata_fs(module, disable_fail)
-    elif object_type == "pool":
-        metadata = get_metadata_pool(module, disable_fail)
-    elif object_type == "vol-snap":
-        metadata = get_metadata_volsnap(module, disable_fail)
-
+    object_ids = set(object_ids)
+    objects_metadata = {object_id: {} for object_id in object_ids}
+    if len(object_ids) > MAX_PAGE_SIZE:
+        entries = iter_paginated_results(system, "metadata")
     else:
-        msg = f"Metadata for {object_type} not supported. Cannot stat."
-        module.fail_json(msg=msg)
-
-    if metadata:
-        result = metadata.get_result()
-        if not disable_fail and not result:
-            msg = f"Metadata for {object_type} with key {key} not found. Cannot stat."
-            module.fail_json(msg=msg)
-        return result
+        entries = iter_results_by_field_values(system, "metadata", "object_id", object_ids)
+    for entry in entries:
+        if entry["object_id"] in object_ids:
+            objects_metadata[entry["object_id"]][entry["key"]] = entry["value"]
+    return objects_metadata
 
-    if disable_fail:
-        return None
 
-    msg = f"Metadata for {object_type} named {object_name} not found. Cannot stat."
-    module.fail_json(msg=msg)
-    return None  # Quiet pylint
+def get_bulk_item_result(object_name, changed, keys=None, msg=None):
+    """ Return a per object result """
+    result = dict(object_name=object_name, changed=changed)
+    if keys:
+        result["keys"] = sorted(keys)
+    if msg:
+        result["msg"] = msg
+    return result
 
 
-@api_wrapper
-def put_metadata(module):  # pylint: disable=too-many-statements
-    """Create metadata key with a value.  The changed variable is found elsewhere."""
+def handle_bulk_stat(module):
+    """ Return the metadata of the listed objects, or of all objects of object_type """
     system = get_system(module)
+    if module.params["metadata"]:
+        object_ids = get_object_ids(module, system, module.params["metadata"])
+    else:
+        object_ids = get_all_object_ids(module, system)
+    objects_metadata = get_objects_metadata(module, system, object_ids.values())
+    metadata = {object_name: objects_metadata[object_id] for object_name, object_id in object_ids.items()}
+    msg = f"Metadata of {len(metadata)} {module.params['object_type']} objects found"
+    module.exit_json(changed=False, msg=msg, metadata=metadata)
 
-    object_type = module.params["object_type"]
-    key = module.params["key"]
-    value = module.params["value"]
 
-    # Could check metadata value size < 32k
+def handle_bulk_present(module):
+    """ Write the metadata keys of each listed object whose values differ """
+    system = get_system(module)
+    desired_metadata = module.params["metadata"]
+    object_ids = get_object_ids(module, system, desired_metadata)
+    missing_names = sorted(set(desired_metadata) - set(object_ids))
+    if missing_names:
+        module.fail_json(msg=f"{module.params['object_type']} objects {missing_names} not found. Cannot add metadata.")
+    objects_metadata = get_objects_metadata(module, system, object_ids.values())
+
+    results = []
+    for object_name, desired in desired_metadata.items():
+        object_id = object_ids[object_name]
+        current = objects_metadata[object_id]
+        # Metadata values are stored as strings. Values from YAML may be numbers or booleans.
+        updates = {key: str(value) for key, value in (desired or {}).items() if current.get(key) != str(value)}
+        if updates:
+            put_bulk_metadata(module, system, object_id, updates)
+        results.append(get_bulk_item_result(object_name, bool(updates), keys=updates))
+
+    changed_count = len([result for result in results if result["changed"]])
+    msg = f"Metadata of {changed_count} of {len(results)} objects changed"
+    module.exit_json(changed=changed_count > 0, msg=msg, objects=results)
+
+
+def handle_bulk_absent(module):
+    """ Remove the listed metadata keys of each listed object """
+    system = get_system(module)
+    desired_metadata = module.params["metadata"]
+    object_ids = get_object_ids(module, system, desired_metadata)
+    objects_metadata = get_objects_metadata(module, system, object_ids.values())
+
+    results = []
+    for object_name, desired in desired_metadata.items():
+        object_id = object_ids.get(object_name)
+        if object_id is None:
+            results.append(get_bulk_item_result(object_name, False, msg="Object not found"))
+            continue
+        keys = [key for key in (desired or {}) if key in objects_metadata[object_id]]
+        if keys:
+            delete_bulk_metadata(module, system, object_id, keys)
+        results.append(get_bulk_item_result(object_name, bool(keys), keys=keys))
+
+    changed_count = len([result for result in results if result["changed"]])
+    msg = f"Metadata of {changed_count} of {len(results)} objects removed"
+    module.exit_json(changed=changed_count > 0, msg=msg, objects=results)
 
-    if object_type == "system":
-        path = "metadata/system"
-    elif object_type == "vol":
-        vol = get_volume(module, system)
-        if not vol:
-            object_name = module.params["object_name"]
-            msg = f"Volume {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{vol.id}"
-    elif object_type == "fs":
-        fs = get_filesystem(module, system)
-        if not fs:
-            object_name = module.params["object_name"]
-            msg = f"File system {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{fs.id}"
-    elif object_type == "host":
-        host = get_host(module, system)
-        if not host:
-            object_name = module.params["object_name"]
-            msg = f"Cluster {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{host.id}"
-    elif object_type == "cluster":
-        cluster = get_cluster(module, system)
-        if not cluster:
-            object_name = module.params["object_name"]
-            msg = f"Cluster {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{cluster.id}"
-    elif object_type == "fs-snap":
-        fssnap = get_filesystem(module, system)
-        if not fssnap:
-            object_name = module.params["object_name"]
-            msg = f"File system snapshot {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{fssnap.id}"
-    elif object_type == "pool":
-        pool = get_pool(module, system)
-        if not pool:
-            object_name = module.params["object_name"]
-            msg = f"Pool {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{pool.id}"
-    elif object_type == "vol-snap":
-        volsnap = get_volume(module, system)
-        if not volsnap:
-            object_name = module.params["object_name"]
-            msg = f"Volume snapshot {object_name} not found. Cannot add metadata key {key}."
-            module.fail_json(msg=msg)
-        path = f"metadata/{volsnap.id}"
-
-    # Create json data
-    data = {
-        key: value
-    }
 
-    # Put
-    system.api.put(path=path, data=data)
-    # Variable 'changed' not returned by design
+@api_wrapper
+def put_bulk_metadata(module, system, object_id, updates):
+    """ Write many metadata keys of an object in one request """
+    if not module.check_mode:
+        system.api.put(path=f"metadata/{object_id}", data=updates)
 
 
 @api_wrapper
-def delete_metadata(module):  # pylint: disable=too-many-return-statements
-    """
-    Remove metadata key.
-    Not implemented by design: Deleting all of the system's metadata
-    using 'DELETE api/rest/metadata/system'.
-    """
-    system = get_system(module)
-    changed = False
-    object_type = module.params["object_type"]
-    key = module.params["key"]
-    if object_type == "system":
-        path = f"metadata/system/{key}"
-    elif object_type == "vol":
-        vol = get_volume(module, system)
-        if not vol:
-            changed = False
-            return changed  # No vol therefore no metadata to delete
-        path = f"metadata/{vol.id}/{key}"
-    elif object_type == "fs":
-        fs = get_filesystem(module, system)
-        if not fs:
-            changed = False
-            return changed  # No fs therefore no metadata to delete
-        path = f"metadata/{fs.id}/{key}"
-    elif object_type == "host":
-        host = get_host(module, system)
-        if not host:
-            changed = False
-            return changed  # No host therefore no metadata to delete
-        path = f"metadata/{host.id}/{key}"
-    elif object_type == "cluster":
-        cluster = get_cluster(module, system)
-        if not cluster:
-            changed = False
-            return changed  # No cluster therefore no metadata to delete
-        path = f"metadata/{cluster.id}/{key}"
-    elif object_type == "fs-snap":
-        fssnap = get_filesystem(module, system)
-        if not fssnap:
-            changed = False
-            return changed  # No fssnap therefore no metadata to delete
-        path = f"metadata/{fssnap.id}/{key}"
-    elif object_type == "pool":
-        pool = get_pool(module, system)
-        if not pool:
-            changed = False
-            return changed  # No pool therefore no metadata to delete
-        path = f"metadata/{pool.id}/{key}"
-    elif object_type == "vol-snap":
-        volsnap = get_volume(module, system)
-        if not volsnap:
-            changed = False
-            return changed  # No volsnap therefore no metadata to delete
-        path = f"metadata/{volsnap.id}/{key}"
-    else:
-        module.fail_json(f"Object type {object_type} not supported")
+def delete_bulk_metadata(module, system, object_id, keys):
+    """ Remove metadata keys of an object """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    if module.check_mode:
+        return
+    for key in keys:
+        try:
+            system.api.delete(path=f"metadata/{object_id}/{key}")
+        except APICommandFailed as err:
+            if err.status_code != 404:
+                raise
 
-    try:
-        system.api.delete(path=path)
-        changed = True
-    except APICommandFailed as err:
-        if err.status_code != 404:
-            raise
-    return changed
+
+def is_bulk(module):
+    """ Return True if the task manages the metadata of many objects """
+    return bool(module.params["metadata"]) or (
+        module.params["state"] == "stat" and module.params["object_type"] != "system" and not module.params["object_name"]
+    )
 
 
 def handle_stat(module):
     """Return metadata stat"""
+    system = get_system(module)
     object_type = module.params["object_type"]
     key = module.params["key"]
-    metadata = get_metadata(module)
-    if object_type == "system":
-        metadata_id = metadata[0]["id"]
-        object_id = metadata[0]["object_id"]
-        value = metadata[0]["value"]
-    else:
-        metadata_id = metadata["id"]
-        object_id = metadata["object_id"]
-        value = metadata["value"]
+    object_id = get_object_id(module, system)
+    if object_type != "system" and object_id is None:
+        module.fail_json(msg=f"{get_object_description(module)} not found. Cannot stat its metadata.")
+    metadata = get_metadata(module, system, object_id)
 
     result = {
         "msg": "Metadata found",
         "changed": False,
         "object_type": object_type,
         "key": key,
-        "id": metadata_id,
-        "object_id": object_id,
-        "value": value,
+        "id": metadata["id"],
+        "object_id": metadata["object_id"],
+        "value": metadata["value"],
     }
     module.exit_json(**result)
 
 
 def handle_present(module):
     """Make metadata present"""
-    changed = False
-    msg = "Metadata unchanged"
+    system = get_system(module)
+    object_type = module.params["object_type"]
+    key = module.params["key"]
+    object_id = get_object_id(module, system)
+    if object_type != "system" and object_id is None:
+        module.fail_json(msg=f"{get_object_description(module)} not found. Cannot add metadata key {key}.")
+
+    old_metadata = get_metadata(module, system, object_id, disable_fail=True)
+    if old_metadata and old_metadata["value"] == module.params["value"]:
+        module.exit_json(changed=False, msg="Metadata unchanged since the value is the same as the existing metadata")
+
     if not module.check_mode:
-        old_metadata = get_metadata(module, disable_fail=True)
-        put_metadata(module)
-        new_metadata = get_metadata(module)
-        changed = new_metadata != old_metadata
-        if changed:
-            msg = "Metadata changed"
-        else:
-            msg = "Metadata unchanged since the value is the same as the existing metadata"
-    module.exit_json(changed=changed, msg=msg)
+        put_metadata(module, system, object_id)
+    module.exit_json(changed=True, msg="Metadata changed")
 
 
 def handle_absent(module):
     """Make metadata absent"""
-    msg = "Metadata unchanged"
-    changed = False
-    if not module.check_mode:
-        changed = delete_metadata(module)
-        if changed:
-            msg = "Metadata removed"
-        else:
-            msg = "Metadata did not exist so no removal was necessary"
+    system = get_system(module)
+    object_type = module.params["object_type"]
+    object_id = get_object_id(module, system)
+    if object_type != "system" and object_id is None:
+        module.exit_json(changed=False, msg=f"{get_object_description(module)} not found so no removal was necessary")
+
+    if module.check_mode:
+        changed = get_metadata(module, system, object_id, disable_fail=True) is not None
+    else:
+        changed = delete_metadata(module, system, object_id)
+    if changed:
+        msg = "Metadata removed"
+    else:
+        msg = "Metadata did not exist so no removal was necessary"
     module.exit_json(changed=changed, msg=msg)
 
 
@@ -545,7 +471,16 @@ def execute_state(module):
     """Determine which state function to execute and do so"""
     state = module.params["state"]
     try:
-        if state == "stat":
+        if is_bulk(module):
+            if state == "stat":
+                handle_bulk_stat(module)
+            elif state == "present":
+                handle_bulk_present(module)
+            elif state == "absent":
+                handle_bulk_absent(module)
+            else:
+                module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
+        elif state == "stat":
             handle_stat(module)
         elif state == "present":
             handle_present(module)
@@ -555,7 +490,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -580,6 +515,10 @@ def check_options(module):
             f"Cannot create {object_type} metadata. Object type must be one of {object_types}"
         )
 
+    if is_bulk(module):
+        check_bulk_options(module)
+        return
+
     # Check object_name
     if object_type == "system":
         if object_name:
@@ -647,6 +586,23 @@ def check_options(module):
         module.fail_json(f"Invalid state '{state}' provided")
 
 
+def check_bulk_options(module):
+    """Verify options are sane when managing the metadata of many objects"""
+    object_type = module.params["object_type"]
+    if object_type == "system":
+        module.fail_json(msg="The metadata option is not supported for object_type system")
+    if module.params["metadata"] and (module.params["object_name"] or module.params["key"] or module.params["value"]):
+        module.fail_json(msg="The metadata option is mutually exclusive with object_name, key and value")
+    if module.params["pool_name"]:
+        if module.params["metadata"]:
+            module.fail_json(msg="pool_name may only be used to read the metadata of all objects of an object_type")
+        if object_type not in ["vol", "vol-snap", "fs", "fs-snap"]:
+            module.fail_json(msg=f"pool_name is not supported for object_type {object_type}")
+    for object_name, keys in (module.params["metadata"] or {}).items():
+        if keys is not None and not isinstance(keys, dict):
+            module.fail_json(msg=f"The metadata of {object_type} {object_name} must be a dict of keys and values")
+
+
 def main():
     """ Main """
     argument_spec = infinibox_argument_spec()
@@ -655,8 +611,10 @@ def main():
         {
             "object_type": {"required": True, "choices": ["cluster", "fs", "fs-snap", "host", "pool", "system", "vol", "vol-snap"]},
             "object_name": {"required": False, "default": None},
-            "key": {"required": True, "no_log": False},
+            "key": {"required": False, "default": None, "no_log": False},
             "value": {"required": False, "default": None},
+            "metadata": {"required": False, "type": "dict", "default": None},
+            "pool_name": {"required": False, "default": None},
             "state": {"default": "present", "choices": ["stat", "present", "absent"]},
         }
     )
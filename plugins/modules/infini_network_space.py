@@ -19,6 +19,9 @@ version_added: '2.12.0'
 short_description: Create, Delete and Modify network spaces on Infinibox
 description:
     - This module creates, deletes or modifies network spaces on Infinibox.
+    - Only fields that differ from the network space's current fields are updated. Options that are not provided are not changed.
+      The fields changed are returned in changes, with their values before and after.
+    - IPs are added and removed concurrently. The outcome for each IP is returned in ips.
 author: David Ohlemacher (@ohlemacher)
 options:
   name:
@@ -94,6 +97,12 @@ options:
     required: false
     type: bool
     default: false
+  workers:
+    description:
+      - Number of threads adding or removing IPs concurrently.
+    type: int
+    required: false
+    default: 8
 extends_documentation_fragment:
     - infinibox
 '''
@@ -125,6 +134,9 @@ EXAMPLES = r'''
 
 # RETURN = r''' # '''
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
@@ -132,19 +144,18 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     merge_two_dicts,
     get_net_space,
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
+NETWORK_CONFIG_KEYS = ["default_gateway", "netmask", "network"]
 
 
 @api_wrapper
 def create_empty_network_space(module, system):
     """ Create an empty network space """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     # Create network space
     network_space_name = module.params["name"]
     service = module.params["service"]
@@ -195,75 +206,127 @@ def find_network_space_id(module, system):
     return space_id
 
 
-@api_wrapper
-def add_ips_to_network_space(module, system, space_id):
-    """ Add IPs to space. Ignore address conflict errors. """
-    network_space_name = module.params["name"]
-    ips = module.params["ips"]
-    for ip in ips:
-        ip_url = f"network/spaces/{space_id}/ips"
-        ip_data = ip
+def get_ip_result(ip, changed, action=None, msg=None, failed=False):
+    """ Return a per IP result """
+    result = dict(ip=ip, changed=changed)
+    if action:
+        result["action"] = action
+    if msg:
+        result["msg"] = msg
+    if failed:
+        result["failed"] = True
+    return result
+
+
+def add_ip(module, system, space_id, ip):
+    """ Add an IP to a space. Ignore address conflict errors. API errors fail the IP, not the module. """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    if not module.check_mode:
         try:
-            system.api.post(path=ip_url, data=ip_data)
+            system.api.post(path=f"network/spaces/{space_id}/ips", data=ip)
         except APICommandFailed as err:
-            if err.error_code != "NET_SPACE_ADDRESS_CONFLICT":  # Ignore
-                module.fail_json(msg=f"Cannot add IP {ip} to network space {network_space_name}: {err}")
+            if err.error_code == "NET_SPACE_ADDRESS_CONFLICT":  # Ignore
+                return get_ip_result(ip, False, msg="Address conflict ignored")
+            return get_ip_result(ip, False, msg=f"Cannot add IP {ip} to network space {module.params['name']}: {err}", failed=True)
+    return get_ip_result(ip, True, action="added")
+
+
+def add_ips_to_network_space(module, system, space_id, existing_ips=()):
+    """
+    Add the IPs the space does not have yet, concurrently.
+    Return a result for each IP.
+    """
+    ips = list(dict.fromkeys(module.params["ips"]))
+    ips_to_add = [ip for ip in ips if ip not in existing_ips]
+    with ThreadPoolExecutor(max_workers=module.params["workers"]) as executor:
+        added_results = dict(zip(ips_to_add, executor.map(partial(add_ip, module, system, space_id), ips_to_add)))
+    return [added_results.get(ip) or get_ip_result(ip, False) for ip in ips]
 
 
 @api_wrapper
 def create_network_space(module, system):
-    """ Create a network space """
-    if not module.check_mode:
-        # Create space
-        create_empty_network_space(module, system)
-        # Find space's ID
-        space_id = find_network_space_id(module, system)
-        # Add IPs to space
-        add_ips_to_network_space(module, system, space_id)
+    """ Create a network space. Return changed and a result for each IP. """
+    if module.check_mode:
+        return True, []
 
-        changed = True
-    else:
-        changed = False
+    # Create space
+    create_empty_network_space(module, system)
+    # Find space's ID
+    space_id = find_network_space_id(module, system)
+    # Add IPs to space
+    ip_results = add_ips_to_network_space(module, system, space_id)
+    return True, ip_results
 
-    return changed
+
+def get_desired_network_space_fields(module):
+    """
+    Return the network space fields managed by the module options.
+    Options that are not provided, None or an empty interface list, are not managed.
+    network_config and properties are partial: only the keys provided are managed.
+    """
+    network_config = {key: module.params[key] for key in NETWORK_CONFIG_KEYS}
+    desired_fields = {
+        "interfaces": module.params["interfaces"] or None,
+        "mtu": module.params["mtu"],
+        "network_config": {key: value for key, value in network_config.items() if value is not None} or None,
+        "rate_limit": module.params["rate_limit"],
+        "properties": {"is_async_only": module.params["async_only"]},
+    }
+    return {field: value for field, value in desired_fields.items() if value is not None}
+
+
+def get_network_space_changes(module, fields):
+    """
+    Compare the desired fields with the space's current fields.
+    Return a dict of the fields that differ with their current and desired values.
+    Interfaces are compared regardless of order.
+    """
+    changes = {}
+    for field, desired_value in get_desired_network_space_fields(module).items():
+        current_value = fields.get(field)
+        if isinstance(desired_value, dict):
+            current_value = {key: (current_value or {}).get(key) for key in desired_value}
+            is_same = current_value == desired_value
+        elif field == "interfaces":
+            is_same = sorted(current_value or []) == sorted(desired_value)
+        else:
+            is_same = current_value == desired_value
+        if not is_same:
+            changes[field] = dict(before=current_value, after=desired_value)
+    return changes
 
 
-def update_network_space(module, system):
+def update_network_space(module, system, network_space):
     """
-    Update network space.
+    Update network space fields that differ from the space's current fields
+    and add missing IPs. Return changed, the field changes and a result for each IP.
     Update fields individually. If grouped the API will generate
     a NOT_SUPPORTED_MULTIPLE_UPDATE error.
     """
-    space_id = find_network_space_id(module, system)
-    datas = [
-        {"interfaces": module.params["interfaces"]},
-        {"mtu": module.params["mtu"]},
-        {"network_config":
-         {
-             "default_gateway": module.params["default_gateway"],
-             "netmask": module.params["netmask"],
-             "network": module.params["network"],
-         }
-         },
-        {"rate_limit": module.params["rate_limit"]},
-        {"properties":
-         {
-             "is_async_only": module.params["async_only"],
-         }
-         },
-    ]
-    for data in datas:
-        try:
-            system.api.put(
-                path=f"network/spaces/{space_id}",
-                data=data
-            )
-        except APICommandFailed as err:
-            msg = f"Cannot update network space: {err}"
-            module.fail_json(msg=msg)
-    add_ips_to_network_space(module, system, space_id)
-    changed = True
-    return changed
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    fields = network_space.get_fields(from_cache=True, raw_value=True)
+    space_id = fields["id"]
+    changes = get_network_space_changes(module, fields)
+    if not module.check_mode:
+        for field, change in changes.items():
+            data = {field: change["after"]}
+            if field == "network_config":
+                # The API requires the complete network config. Keep the current values of keys not provided.
+                current_config = {key: (fields.get(field) or {}).get(key) for key in NETWORK_CONFIG_KEYS}
+                data[field] = merge_two_dicts(current_config, change["after"])
+            try:
+                system.api.put(
+                    path=f"network/spaces/{space_id}",
+                    data=data
+                )
+            except APICommandFailed as err:
+                msg = f"Cannot update network space field {field}: {err}"
+                module.fail_json(msg=msg, changes=changes)
+
+    existing_ips = {ip["ip_address"] for ip in fields["ips"]}
+    ip_results = add_ips_to_network_space(module, system, space_id, existing_ips)
+    changed = bool(changes) or any(result["changed"] for result in ip_results)
+    return changed, changes, ip_results
 
 
 def get_network_space_fields(network_space):
@@ -312,21 +375,29 @@ def handle_present(module):
     network_space_name = module.params["name"]
     system = get_system(module)
     net_space = get_net_space(module, system)
+    changes = {}
     if net_space:
-        changed = update_network_space(module, system)
-        msg = f"Network space named {network_space_name} updated"
+        changed, changes, ip_results = update_network_space(module, system, net_space)
+        if changed:
+            msg = f"Network space named {network_space_name} updated"
+        else:
+            msg = f"Network space named {network_space_name} unchanged"
     else:
-        changed = create_network_space(module, system)
+        changed, ip_results = create_network_space(module, system)
         msg = f"Network space named {network_space_name} created"
-    module.exit_json(changed=changed, msg=msg)
+
+    failed_count = len([result for result in ip_results if result.get("failed")])
+    if failed_count:
+        msg = f"{msg}, but {failed_count} of {len(ip_results)} IPs failed"
+        module.fail_json(changed=changed, msg=msg, changes=changes, ips=ip_results)
+    module.exit_json(changed=changed, msg=msg, changes=changes, ips=ip_results)
 
 
 def disable_and_delete_ip(module, network_space, ip):
     """
-    Disable and delete a network space IP
+    Disable and delete a network space IP. Return its result. Errors fail the IP, not the module.
     """
-    if not ip:
-        return  # Nothing to do
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     addr = ip['ip_address']
     network_space_name = module.params["name"]
     ip_type = ip['type']
@@ -338,49 +409,54 @@ def disable_and_delete_ip(module, network_space, ip):
         try:
             network_space.disable_ip_address(addr)
         except APICommandFailed as err:
-            if err.error_code == "IP_ADDRESS_ALREADY_DISABLED":
-                pass
-            else:
-                module.fail_json(msg=f"Disabling of network space {network_space_name} IP {mgmt}{addr} API command failed")
+            if err.error_code != "IP_ADDRESS_ALREADY_DISABLED":
+                return get_ip_result(addr, False, msg=f"Disabling of network space {network_space_name} IP {mgmt}{addr} API command failed", failed=True)
 
         network_space.remove_ip_address(addr)
     except Exception as err:  # pylint: disable=broad-exception-caught
-        module.fail_json(msg=f"Disabling or removal of network space {network_space_name} IP {mgmt}{addr} failed: {err}")
+        return get_ip_result(addr, False, msg=f"Disabling or removal of network space {network_space_name} IP {mgmt}{addr} failed: {err}", failed=True)
+    return get_ip_result(addr, True, action="removed")
 
 
 def handle_absent(module):
     """
     Remove a namespace. First, may disable and remove the namespace's IPs.
+    IPs are removed concurrently, except the management IP, which must be removed last.
     """
     network_space_name = module.params["name"]
     system = get_system(module)
     network_space = get_net_space(module, system)
+    ip_results = []
     if not network_space:
         changed = False
         msg = f"Network space {network_space_name} already absent"
+    elif module.check_mode:
+        changed = False
+        msg = f"Network space {network_space_name} not altered due to checkmode"
     else:
         # Find IPs from space
-        ips = list(network_space.get_ips())
+        ips = network_space.get_fields(from_cache=True, raw_value=True)["ips"]
+        management_ips = [ip for ip in ips if ip['type'] == 'MANAGEMENT']
+        other_ips = [ip for ip in ips if ip['type'] != 'MANAGEMENT']
 
         # Disable and delete IPs from space
-        if not module.check_mode:
-            management_ip = None  # Must be disabled and deleted last
-            for ip in ips:
-                if ip['type'] == 'MANAGEMENT':
-                    management_ip = ip
-                    continue
-                disable_and_delete_ip(module, network_space, ip)
-            disable_and_delete_ip(module, network_space, management_ip)
-
-            # Delete space
-            network_space.delete()
-            changed = True
-            msg = f"Network space {network_space_name} removed"
-        else:
-            changed = False
-            msg = f"Network space {network_space_name} not altered due to checkmode"
+        with ThreadPoolExecutor(max_workers=module.params["workers"]) as executor:
+            ip_results = list(executor.map(partial(disable_and_delete_ip, module, network_space), other_ips))
+        if not any(result.get("failed") for result in ip_results):
+            for management_ip in management_ips:
+                ip_results.append(disable_and_delete_ip(module, network_space, management_ip))
+
+        failed_count = len([result for result in ip_results if result.get("failed")])
+        if failed_count:
+            msg = f"{failed_count} of {len(ip_results)} IPs of network space {network_space_name} could not be removed"
+            module.fail_json(changed=len(ip_results) > failed_count, msg=msg, ips=ip_results)
+
+        # Delete space
+        network_space.delete()
+        changed = True
+        msg = f"Network space {network_space_name} removed"
 
-    module.exit_json(changed=changed, msg=msg)
+    module.exit_json(changed=changed, msg=msg, ips=ip_results)
 
 
 def execute_state(module):
@@ -399,7 +475,7 @@ def execute_state(module):
             )
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def main():
@@ -425,6 +501,7 @@ def main():
             ips=dict(default=list(), required=False, type="list", elements="str"),
             rate_limit=dict(default=None, required=False, type="int"),
             async_only=dict(default=False, required=False, type="bool"),
+            workers=dict(default=8, required=False, type="int"),
         )
     )
 
@@ -433,6 +510,9 @@ def main():
     if not HAS_INFINISDK:
         module.fail_json(msg=missing_required_lib("infinisdk"))
 
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers must be at least 1")
+
     execute_state(module)
 
 
@@ -107,6 +107,7 @@ try:
         api_wrapper,
         infinibox_argument_spec,
         get_system,
+        logout_system,
     )
 except ModuleNotFoundError:
     from infinibox import (  # Used when hacking
@@ -114,6 +115,7 @@ except ModuleNotFoundError:
         api_wrapper,
         infinibox_argument_spec,
         get_system,
+        logout_system,
     )
 
 
@@ -311,7 +313,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
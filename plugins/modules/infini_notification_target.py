@@ -139,14 +139,10 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     merge_two_dicts,
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
-
 
 @api_wrapper
 def get_target(module):
@@ -155,6 +151,7 @@ def get_target(module):
     Use disable_fail when we are looking for config
     and it may or may not exist and neither case is an error.
     """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     name = module.params['name']
     path = f"notifications/targets?name={name}"
     system = get_system(module)
@@ -190,6 +187,7 @@ def handle_stat(module):
 @api_wrapper
 def find_target_id(module, system):
     """ Find the ID of the target by name """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     target_name = module.params["name"]
 
     try:
@@ -210,6 +208,7 @@ def find_target_id(module, system):
 @api_wrapper
 def delete_target(module):
     """ Delete a notification target """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     name = module.params["name"]
     target_id = find_target_id(module, system)
@@ -225,6 +224,7 @@ def delete_target(module):
 @api_wrapper
 def create_target(module):
     """ Create a new notifition target """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     name = module.params["name"]
     protocol = module.params["protocol"]
@@ -321,7 +321,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -59,6 +59,15 @@ options:
     required: false
     default: yes
     type: bool
+  fields:
+    description:
+      - Limit the stat result to these fields. By default all fields are returned.
+      - The pool is fetched using one query limited to the fields required.
+    type: list
+    elements: str
+    required: false
+    choices: [ "compression_enabled", "free_physical_capacity", "free_virtual_capacity", "id", "name",
+               "physical_capacity", "ssd_enabled", "state", "virtual_capacity" ]
 
 notes:
   - Infinibox Admin level access is required for pool modifications
@@ -103,8 +112,10 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     HAS_INFINISDK,
     api_wrapper,
     infinibox_argument_spec,
+    get_object_fields,
     get_pool,
     get_system,
+    logout_system,
 )
 
 
@@ -114,6 +125,20 @@ try:
 except ImportError:
     HAS_CAPACITY = False
 
+# Stat result keys and the pool fields they are built from
+STAT_FIELDS = {
+    'compression_enabled': 'compression_enabled',
+    'free_physical_capacity': 'free_physical_capacity',
+    'free_virtual_capacity': 'free_virtual_capacity',
+    'id': 'id',
+    'name': 'name',
+    'physical_capacity': 'physical_capacity',
+    'ssd_enabled': 'ssd_enabled',
+    'state': 'state',
+    'virtual_capacity': 'virtual_capacity',
+}
+STRING_STAT_FIELDS = ['free_physical_capacity', 'free_virtual_capacity', 'physical_capacity', 'virtual_capacity']
+
 
 @api_wrapper
 def create_pool(module, system):
@@ -194,25 +219,32 @@ def delete_pool(module, pool):
     module.exit_json(changed=True, msg=msg)
 
 
+@api_wrapper
+def get_pool_stat_fields(module, system, field_names):
+    """ Return the named fields of the pool using one query. None if not found. """
+    return get_object_fields(system.pools, field_names, name=module.params['name'])
+
+
 def handle_stat(module):
     """ Show details about a pool """
     system = get_system(module)
-    pool = get_pool(module, system)
+    stat_fields = module.params['fields'] or list(STAT_FIELDS)
+    field_names = {STAT_FIELDS[stat_field] for stat_field in stat_fields}
+    fields = get_pool_stat_fields(module, system, field_names)
 
     name = module.params['name']
-    if not pool:
+    if not fields:
         module.fail_json(msg=f'Pool {name} not found')
-    fields = pool.get_fields()
-    # print('fields: {0}'.format(fields))
-    free_physical_capacity = fields.get('free_physical_capacity', None)
-    pool_id = fields.get('id', None)
 
     result = dict(
         changed=False,
-        free_physical_capacity=str(free_physical_capacity),
-        id=pool_id,
         msg='Pool stat found'
     )
+    for stat_field in stat_fields:
+        value = fields.get(STAT_FIELDS[stat_field], None)
+        if stat_field in STRING_STAT_FIELDS:
+            value = str(value)
+        result[stat_field] = value
     module.exit_json(**result)
 
 
@@ -253,7 +285,7 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def main():
@@ -261,6 +293,7 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
+            fields=dict(required=False, type='list', elements='str', default=None, choices=list(STAT_FIELDS)),
             name=dict(required=True),
             state=dict(default='present', choices=['stat', 'present', 'absent']),
             size=dict(),
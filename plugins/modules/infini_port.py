@@ -20,13 +20,16 @@ short_description: Add and Delete fiber channel and iSCSI ports to a host on Inf
 description:
     - This module adds or deletes fiber channel or iSCSI ports to hosts on
       Infinibox.
+    - When state is stat and no host is provided, the ports and connectivity of all hosts are reported.
+      Hosts and initiators are each fetched using paginated queries rather than per host requests.
 author: David Ohlemacher (@ohlemacher)
 options:
   host:
     description:
       - Host Name
+      - Required unless state is stat.
     type: str
-    required: true
+    required: false
   state:
     description:
       - Creates mapping when present, removes when absent, or provides
@@ -66,6 +69,13 @@ EXAMPLES = r'''
     system: ibox01
     user: admin
     password: secret
+
+- name: Report the connectivity of all hosts
+  infini_port:
+    state: stat
+    system: ibox01
+    user: admin
+    password: secret
 '''
 
 # RETURN = r''' # '''
@@ -77,7 +87,10 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     get_host,
+    get_objects_by_names,
+    iter_paginated_results,
     merge_two_dicts,
 )
 
@@ -87,225 +100,214 @@ try:
 except ImportError:
     pass  # Handled by HAS_INFINISDK from module_utils
 
+CONNECTIVITY_LUT = {0: "DISCONNECTED", 1: "DEGRADED", 2: "DEGRADED", 3: "CONNECTED"}
 
-@api_wrapper
-def update_ports(module, system):
+
+def get_sys_host(module):
+    """ Get parameters """
+    system = get_system(module)
+    host = get_host(module, system)
+    return (system, host)
+
+
+def normalize_port_address(port_type, address):
     """
-    Updated mapping of volume to host. If already mapped, exit_json with changed False.
+    Return a port address comparable between host ports and initiators.
+    FC addresses are lower case without colons. iSCSI names are lower case.
     """
-    changed = False
+    address = str(address).lower()
+    if port_type.upper() == "FC":
+        address = address.replace(":", "")
+    return address
 
-    host = system.hosts.get(name=module.params["host"])
 
-    for wwn_port in module.params["wwns"]:
-        wwn = WWN(wwn_port)
-        if not system.hosts.get_host_by_initiator_address(wwn) == host:
-            if not module.check_mode:
-                host.add_port(wwn)
-            changed = True
+def get_long_address(address):
+    """ Return an FC address with colons inserted """
+    address_iter = iter(normalize_port_address("FC", address))
+    return ":".join(a + b for a, b in zip(address_iter, address_iter))
 
-    for iscsi_port in module.params["iqns"]:
-        iscsi_name = make_iscsi_name(iscsi_port)
-        if not system.hosts.get_host_by_initiator_address(iscsi_name) == host:
-            if not module.check_mode:
-                host.add_port(iscsi_name)
-            changed = True
 
-    return changed
+@api_wrapper
+def get_hosts_ports(module, system, host_name=None):  # pylint: disable=unused-argument
+    """
+    Return host results with their ports, for the named host or for all hosts.
+    All hosts are fetched using paginated queries.
+    """
+    if host_name:
+        return list(get_objects_by_names(system, "hosts", [host_name], fields=["ports"]).values())
+    return list(iter_paginated_results(system, "hosts?fields=id,name,ports"))
 
 
 @api_wrapper
-def delete_ports(module, system):
+def get_initiators_index(module, system, host_id=None):  # pylint: disable=unused-argument
     """
-    Remove ports from host.
+    Return initiators indexed by host ID and by normalized address.
+    Initiators of one host, or of all hosts, are fetched once using paginated queries.
     """
-    changed = False
+    url = "initiators"
+    if host_id is not None:
+        url += f"?host_id={host_id}"
+    initiators_index = {}
+    for initiator in iter_paginated_results(system, url):
+        host_initiators = initiators_index.setdefault(initiator["host_id"], {})
+        host_initiators[normalize_port_address(initiator["type"], initiator["address"])] = initiator
+    return initiators_index
 
-    host = system.hosts.get(name=module.params["host"])
+
+def get_requested_ports(module):
+    """
+    Return a dict of the ports in the wwns and iqns options, keyed by normalized address.
+    Duplicate addresses are therefore only added or removed once.
+    """
+    requested_ports = {}
     for wwn_port in module.params["wwns"]:
         wwn = WWN(wwn_port)
-        if system.hosts.get_host_by_initiator_address(wwn) == host:
-            if not module.check_mode:
-                host.remove_port(wwn)
-            changed = True
+        requested_ports[normalize_port_address("FC", wwn)] = wwn
     for iscsi_port in module.params["iqns"]:
         iscsi_name = make_iscsi_name(iscsi_port)
-        if system.hosts.get_host_by_initiator_address(iscsi_name) == host:
-            if not module.check_mode:
-                host.remove_port(iscsi_name)
-            changed = True
-    return changed
+        requested_ports[normalize_port_address("ISCSI", iscsi_name)] = iscsi_name
+    return requested_ports
 
 
-def get_sys_host(module):
-    """ Get parameters """
-    system = get_system(module)
-    host = get_host(module, system)
-    return (system, host)
+def get_port_owners(host_results):
+    """ Return a dict of host IDs keyed by the normalized address of each of their ports """
+    return {
+        normalize_port_address(port["type"], port["address"]): host_result["id"]
+        for host_result in host_results
+        for port in host_result["ports"]
+    }
 
 
-def edit_initiator_keys(host_initiators, include_key_list):
+def get_requested_port_owners(system, requested_ports):
     """
-    For each host initiator, remove keys not in the include_key_list.
-    For FCs, add a long address. This is the address with colons inserted.
-    Return the edited host initiators list.
+    Return a dict of host IDs keyed by the normalized address of each requested port that belongs to a host.
+    Only the requested addresses are looked up, rather than the ports of all hosts.
     """
-    trimmed_initiators = []
-    for init in host_initiators:
-        if init["type"] == "FC" and "address" in init.keys():
-            # Add address_long key to init whose value is the address with colons inserted.
-            address_str = str(init["address"])
-            address_iter = iter(address_str)
-            long_address = ":".join(a + b for a, b in zip(address_iter, address_iter))
-            init["address_long"] = long_address
-
-        trimmed_item = {
-            key: val for key, val in init.items() if key in include_key_list
-        }
-        trimmed_initiators.append(trimmed_item)
-    return trimmed_initiators
+    port_owners = {}
+    for address, port in requested_ports.items():
+        host_id = system.hosts.get_host_id_by_initiator_address(port)
+        if host_id is not None:
+            port_owners[address] = host_id
+    return port_owners
 
 
-def find_host_initiators_data(module, system, host, initiator_type):
+@api_wrapper
+def update_ports(module, system, host):
     """
-    Given a host object, find its initiators that match initiator_type.
-    Only include desired initiator keys for each initiator.
-    Return the filtered and edited host initiator list.
+    Add the requested ports the host does not have. If none, return changed False.
     """
-    request = f"initiators?page=1&page_size=1000&host_id={host.id}"
-    # print("\nrequest:", request, "initiator_type:", initiator_type)
-    get_initiators_result = system.api.get(request, check_version=False)
-    result_code = get_initiators_result.status_code
-    if result_code != 200:
-        msg = f"get initiators REST call failed. code: {result_code}"
-        module.fail_json(msg=msg)
-
-    # Only return initiators of the desired type.
-    host_initiators_by_type = [
-        initiator
-        for initiator in get_initiators_result.get_result()
-        if initiator["type"] == initiator_type
-    ]
-
-    # print("host_initiators_by_type:", host_initiators_by_type)
-    # print()
-
-    # Only include certain keys in the returned initiators
-    if initiator_type == "FC":
-        include_key_list = [
-            "address",
-            "address_long",
-            "host_id",
-            "port_key",
-            "targets",
-            "type",
-        ]
-    elif initiator_type == "ISCSI":
-        include_key_list = ["address", "host_id", "port_key", "targets", "type"]
-    else:
-        msg = "Cannot search for host initiator types other than FC and ISCSI"
-        module.fail_json(msg=msg)
-    host_initiators_by_type = edit_initiator_keys(
-        host_initiators_by_type, include_key_list
+    requested_ports = get_requested_ports(module)
+    port_owners = get_requested_port_owners(system, requested_ports)
+
+    owned_by_others = sorted(
+        str(requested_ports[address])
+        for address in requested_ports
+        if port_owners.get(address, host.id) != host.id
     )
+    if owned_by_others:
+        module.fail_json(msg=f"Ports {owned_by_others} belong to other hosts. Cannot add them to host {module.params['host']}.")
 
-    return host_initiators_by_type
+    addresses_to_add = sorted(set(requested_ports) - set(port_owners))
+    if not module.check_mode:
+        for address in addresses_to_add:
+            host.add_port(requested_ports[address])
+    return bool(addresses_to_add)
 
 
-def get_port_fields(module, system, host):  # pylint: disable=too-many-locals
+@api_wrapper
+def delete_ports(module, system, host):
     """
-    Return a dict with desired fields from FC and ISCSI ports associated with the host.
+    Remove the requested ports the host has.
     """
-    host_fc_initiators = find_host_initiators_data(
-        module, system, host, initiator_type="FC"
-    )
-    host_iscsi_initiators = find_host_initiators_data(
-        module, system, host, initiator_type="ISCSI"
-    )
+    requested_ports = get_requested_ports(module)
+    host_port_owners = get_port_owners(get_hosts_ports(module, system, module.params["host"]))
+
+    addresses_to_remove = sorted(set(requested_ports) & set(host_port_owners))
+    if not module.check_mode:
+        for address in addresses_to_remove:
+            host.remove_port(requested_ports[address])
+    return bool(addresses_to_remove)
+
+
+def get_host_connectivity(ports):
+    """
+    Return the connectivity of a host given its ports' fields. CONNECTED if all ports are connected,
+    DISCONNECTED if no port is connected and DEGRADED otherwise.
+    """
+    connectivities = {port["connectivity"] for port in ports}
+    if connectivities == {"CONNECTED"}:
+        return "CONNECTED"
+    if connectivities <= {"DISCONNECTED"}:
+        return "DISCONNECTED"
+    return "DEGRADED"
+
 
+def get_port_fields(host_result, host_initiators):
+    """
+    Return a dict with desired fields from FC and ISCSI ports associated with the host,
+    matching each port to its initiator by address.
+    """
     field_dict = dict(ports=[],)
 
-    connectivity_lut = {0: "DISCONNECTED", 1: "DEGRADED", 2: "DEGRADED", 3: "CONNECTED"}
-
-    ports = host.get_ports()
-    for port in ports:
-        if str(type(port)) == "<class 'infi.dtypes.wwn.WWN'>":
-            found_initiator = False
-            for initiator in host_fc_initiators:
-                if initiator["address"] == str(port).replace(":", ""):
-                    found_initiator = True
-                    # print("initiator targets:", initiator['targets'])
-                    unique_initiator_target_ids = {
-                        target["node_id"] for target in initiator["targets"]
-                    }
-                    port_dict = {
-                        "address": str(port),
-                        "address_long": initiator["address_long"],
-                        "connectivity": connectivity_lut[
-                            len(unique_initiator_target_ids)
-                        ],
-                        "targets": initiator["targets"],
-                        "type": initiator["type"],
-                    }
-
-            if not found_initiator:
-                address_str = str(port)
-                address_iter = iter(address_str)
-                long_address = ":".join(
-                    a + b for a, b in zip(address_iter, address_iter)
-                )
-                port_dict = {
-                    "address": str(port),
-                    "address_long": long_address,
-                    "connectivity": connectivity_lut[0],
-                    "targets": [],
-                    "type": "FC",
-                }
-
-            field_dict["ports"].append(port_dict)
-
-        if str(type(port)) == "<class 'infi.dtypes.iqn.IQN'>":
-            found_initiator = False
-            for initiator in host_iscsi_initiators:
-                if initiator["address"] == str(port):
-                    found_initiator = True
-                    # print("initiator targets:", initiator['targets'])
-                    unique_initiator_target_ids = {
-                        target["node_id"] for target in initiator["targets"]
-                    }
-                    port_dict = {
-                        "address": str(port),
-                        "connectivity": connectivity_lut[
-                            len(unique_initiator_target_ids)
-                        ],
-                        "targets": initiator["targets"],
-                        "type": initiator["type"],
-                    }
-
-            if not found_initiator:
-                port_dict = {
-                    "address": str(port),
-                    "connectivity": connectivity_lut[0],
-                    "targets": [],
-                    "type": "ISCSI",
-                }
-
-            field_dict["ports"].append(port_dict)
+    for port in host_result["ports"]:
+        port_type = port["type"].upper()
+        if port_type not in ("FC", "ISCSI"):
+            continue
+        initiator = host_initiators.get(normalize_port_address(port_type, port["address"]))
+        targets = []
+        if initiator:
+            targets = initiator["targets"]
+        unique_initiator_target_ids = {target["node_id"] for target in targets}
+
+        port_dict = {
+            "address": str(port["address"]),
+            "connectivity": CONNECTIVITY_LUT[min(len(unique_initiator_target_ids), 3)],
+            "targets": targets,
+            "type": port_type,
+        }
+        if port_type == "FC":
+            port_dict["address"] = get_long_address(port["address"])
+            port_dict["address_long"] = port_dict["address"]
+        field_dict["ports"].append(port_dict)
 
+    field_dict["connectivity"] = get_host_connectivity(field_dict["ports"])
     return field_dict
 
 
+def handle_stat_all(module):
+    """
+    Handle stat state without a host. Return json with the ports and connectivity of all hosts.
+    """
+    system = get_system(module)
+    initiators_index = get_initiators_index(module, system)
+    hosts = []
+    for host_result in get_hosts_ports(module, system):
+        host_dict = dict(name=host_result["name"], id=host_result["id"])
+        host_dict.update(get_port_fields(host_result, initiators_index.get(host_result["id"], {})))
+        hosts.append(host_dict)
+
+    connectivity_counts = {
+        connectivity: len([host for host in hosts if host["connectivity"] == connectivity])
+        for connectivity in ("CONNECTED", "DEGRADED", "DISCONNECTED")
+    }
+    msg = f"Ports of {len(hosts)} hosts found"
+    module.exit_json(changed=False, msg=msg, hosts=hosts, connectivity_counts=connectivity_counts)
+
+
 def handle_stat(module):
     """
     Handle stat state. Fail if host is None.
     Return json with status.
     """
-    system, host = get_sys_host(module)
+    system = get_system(module)
     host_name = module.params["host"]
-    if not host:
+    host_results = get_hosts_ports(module, system, host_name)
+    if not host_results:
         module.fail_json(msg=f"Host {host_name} not found")
 
-    field_dict = get_port_fields(module, system, host)
+    host_result = host_results[0]
+    initiators_index = get_initiators_index(module, system, host_result["id"])
+    field_dict = get_port_fields(host_result, initiators_index.get(host_result["id"], {}))
     result = dict(changed=False, msg=f"Host {host_name} ports found")
     result = merge_two_dicts(result, field_dict)
     module.exit_json(**result)
@@ -320,7 +322,7 @@ def handle_present(module):
     if not host:
         module.fail_json(msg=f"Host {host_name} not found")
 
-    changed = update_ports(module, system)
+    changed = update_ports(module, system, host)
     if changed:
         msg = f"Mapping created for host {host_name}"
     else:
@@ -341,7 +343,7 @@ def handle_absent(module):
             changed=False, msg=f"Host {host_name} not found"
         )
 
-    changed = delete_ports(module, system)
+    changed = delete_ports(module, system, host)
     if changed:
         msg = f"Mapping removed from host {host_name}"
     else:
@@ -357,7 +359,9 @@ def execute_state(module):
     """
     state = module.params["state"]
     try:
-        if state == "stat":
+        if state == "stat" and not module.params["host"]:
+            handle_stat_all(module)
+        elif state == "stat":
             handle_stat(module)
         elif state == "present":
             handle_present(module)
@@ -369,7 +373,13 @@ def execute_state(module):
             )
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
+
+
+def check_options(module):
+    """ Verify module options are sane """
+    if module.params["state"] != "stat" and not module.params["host"]:
+        module.fail_json(msg=f"A host is required when state is {module.params['state']}")
 
 
 def main():
@@ -379,7 +389,7 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
-            host=dict(required=True, type="str"),
+            host=dict(required=False, type="str"),
             state=dict(default="present", choices=["stat", "present", "absent"]),
             wwns=dict(type="list", elements="str", default=list()),
             iqns=dict(type="list", elements="str", default=list()),
@@ -391,6 +401,7 @@ def main():
     if not HAS_INFINISDK:
         module.fail_json(msg=missing_required_lib("infinisdk"))
 
+    check_options(module)
     execute_state(module)
 
 
@@ -0,0 +1,376 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# pylint: disable=invalid-name,use-dict-literal,too-many-branches,too-many-locals,line-too-long,wrong-import-position
+
+""" A module for creating many Infinibox snapshots in one task """
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: infini_snapshots
+version_added: 2.16.0
+short_description: Create many volume and file system snapshots on Infinibox in one task
+description:
+    - This module creates a snapshot of each listed volume and file system on Infinibox.
+    - Snapshot names are generated from a naming template. A snapshot that already exists is not created again,
+      but its write protection and lock are updated if required.
+    - Parents and existing snapshots are fetched using a few batched queries. Snapshots are then created,
+      locked and write protected by a pool of worker threads sharing one Infinibox session.
+    - Use this module instead of looping over infini_vol or infini_fs when snapshotting many datasets.
+author: David Ohlemacher (@ohlemacher)
+options:
+  volumes:
+    description:
+      - Names of the volumes to snapshot.
+    type: list
+    elements: str
+    required: false
+    default: []
+  filesystems:
+    description:
+      - Names of the file systems to snapshot.
+    type: list
+    elements: str
+    required: false
+    default: []
+  name_template:
+    description:
+      - Template of the snapshot names. Python format fields C({parent}), C({type}) and C({timestamp}) are replaced by
+        the parent's name, either volume or filesystem, and the time the module ran.
+    type: str
+    required: false
+    default: "{parent}_snap_{timestamp}"
+  timestamp_format:
+    description:
+      - strftime format of the C({timestamp}) field. The time is UTC.
+    type: str
+    required: false
+    default: "%Y%m%d%H%M"
+  write_protected:
+    description:
+      - Specifies if the snapshots should be write protected.
+    type: bool
+    required: false
+    default: true
+  snapshot_lock_expires_at:
+    description:
+      - This will cause the snapshots to be locked at the specified date-time.
+        Uses python's datetime format YYYY-mm-dd HH:MM:SS.ffffff, e.g. 2020-02-13 16:21:59.699700
+    type: str
+    required: false
+  workers:
+    description:
+      - Number of threads creating snapshots.
+    type: int
+    required: false
+    default: 8
+  max_in_flight:
+    description:
+      - Maximum number of API calls to the Infinibox in progress at once. Defaults to the number of workers.
+      - Use a smaller value to limit the load on the Infinibox.
+    type: int
+    required: false
+  state:
+    description:
+      - Creates snapshots when present. Stat returns which snapshots exist without making changes.
+    type: str
+    required: false
+    default: present
+    choices: [ "stat", "present" ]
+
+extends_documentation_fragment:
+    - infinibox
+requirements:
+    - arrow
+"""
+
+EXAMPLES = r"""
+- name: Hourly snapshots of database volumes and file systems, locked for a week
+  infini_snapshots:
+    volumes: "{{ db_volumes }}"
+    filesystems:
+      - db_logs
+    name_template: "{parent}_hourly_{timestamp}"
+    timestamp_format: "%Y%m%d%H"
+    snapshot_lock_expires_at: "{{ lookup('pipe', 'date -u -d \"+7 days\" \"+%Y-%m-%d %H:%M:%S\"') }}"
+    workers: 16
+    max_in_flight: 8
+    state: present
+    user: admin
+    password: secret
+    system: ibox001
+"""
+
+# RETURN = r''' # '''
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_ARROW,
+    HAS_INFINISDK,
+    api_wrapper,
+    check_snapshot_lock_options,
+    get_objects_by_names,
+    get_system,
+    infinibox_argument_spec,
+    logout_system,
+)
+
+SNAPSHOT_FIELDS = ["id", "name", "parent_id", "type", "write_protected", "lock_state", "lock_expires_at"]
+# Parent types and their collections. Each collection is also the option listing parents of that type.
+PARENT_TYPES = {
+    "volume": "volumes",
+    "filesystem": "filesystems",
+}
+
+
+def get_snapshot_specs(module):
+    """ Return a list of dicts of each parent's type and name and its snapshot's name """
+    timestamp = datetime.utcnow().strftime(module.params["timestamp_format"])
+    snapshot_specs = []
+    for parent_type, collection in PARENT_TYPES.items():
+        for parent_name in module.params[collection]:
+            snapshot_name = module.params["name_template"].format(parent=parent_name, type=parent_type, timestamp=timestamp)
+            snapshot_specs.append(dict(parent=parent_name, type=parent_type, name=snapshot_name))
+    return snapshot_specs
+
+
+@api_wrapper
+def get_parents_and_snapshots(module, system, snapshot_specs):  # pylint: disable=unused-argument
+    """
+    Fetch the listed parents and the snapshots that already exist using batched queries.
+    Return two dicts keyed by (type, name).
+    """
+    parents = {}
+    snapshots = {}
+    for parent_type, collection in PARENT_TYPES.items():
+        specs = [snapshot_spec for snapshot_spec in snapshot_specs if snapshot_spec["type"] == parent_type]
+        if not specs:
+            continue
+        found_parents = get_objects_by_names(system, collection, [spec["parent"] for spec in specs], fields=["id", "type"])
+        parents.update({(parent_type, name): parent for name, parent in found_parents.items()})
+        found_snapshots = get_objects_by_names(system, collection, [spec["name"] for spec in specs], fields=SNAPSHOT_FIELDS)
+        snapshots.update({(parent_type, name): snapshot for name, snapshot in found_snapshots.items()})
+    return parents, snapshots
+
+
+def get_lock_expires_at(module):
+    """ Return the desired lock time in milliseconds or None if no lock is desired """
+    snapshot_lock_expires_at = module.params["snapshot_lock_expires_at"]
+    if not snapshot_lock_expires_at:
+        return None
+    import arrow  # pylint: disable=import-outside-toplevel
+    return int(arrow.get(snapshot_lock_expires_at).float_timestamp * 1000)
+
+
+def get_item_result(snapshot_spec, changed, action=None, msg=None, failed=False):
+    """ Return a per snapshot result """
+    result = dict(
+        name=snapshot_spec["name"],
+        parent=snapshot_spec["parent"],
+        type=snapshot_spec["type"],
+        changed=changed,
+    )
+    if action:
+        result["action"] = action
+    if msg:
+        result["msg"] = msg
+    if failed:
+        result["failed"] = True
+    return result
+
+
+class SnapshotWorker(object):
+    """
+    Create, lock and write protect snapshots from worker threads.
+    All workers share the module's system and so its session.
+    The semaphore limits the number of API calls in flight.
+    """
+    def __init__(self, module, system, parents, snapshots):
+        self.module = module
+        self.system = system
+        self.parents = parents
+        self.snapshots = snapshots
+        self.lock_expires_at = get_lock_expires_at(module)
+        max_in_flight = module.params["max_in_flight"] or module.params["workers"]
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def api_call(self, method, *args, **kwargs):
+        """ Call an API method once a call slot is free """
+        with self.in_flight:
+            return method(*args, **kwargs)
+
+    def create_snapshot(self, snapshot_spec, parent):
+        """ Create, lock and write protect a snapshot with one API call """
+        collection = PARENT_TYPES[snapshot_spec["type"]]
+        data = dict(
+            name=snapshot_spec["name"],
+            parent_id=parent["id"],
+            write_protected=self.module.params["write_protected"],
+        )
+        if self.lock_expires_at:
+            data["lock_expires_at"] = self.lock_expires_at
+        if not self.module.check_mode:
+            self.api_call(self.system.api.post, path=collection, data=data)
+        return get_item_result(snapshot_spec, True, action="created")
+
+    def update_snapshot(self, snapshot_spec, snapshot):
+        """ Update the write protection and lock of an existing snapshot if required """
+        collection = PARENT_TYPES[snapshot_spec["type"]]
+        updates = {}
+        if snapshot["write_protected"] != self.module.params["write_protected"]:
+            updates["write_protected"] = self.module.params["write_protected"]
+        if self.lock_expires_at:
+            is_locked = snapshot["lock_state"] == "LOCKED"
+            if is_locked and self.lock_expires_at < snapshot["lock_expires_at"]:
+                msg = f"snapshot_lock_expires_at preceeds the current lock time of snapshot {snapshot_spec['name']}"
+                return get_item_result(snapshot_spec, False, msg=msg, failed=True)
+            if not is_locked or self.lock_expires_at != snapshot["lock_expires_at"]:
+                updates["lock_expires_at"] = self.lock_expires_at
+        if not updates:
+            return get_item_result(snapshot_spec, False)
+        if not self.module.check_mode:
+            self.api_call(self.system.api.put, path=f"{collection}/{snapshot['id']}", data=updates)
+        return get_item_result(snapshot_spec, True, action="updated", msg=f"Updated {sorted(updates)}")
+
+    def run(self, snapshot_spec):
+        """ Make one snapshot present. Return its result. API errors fail the snapshot, not the module. """
+        from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+        key = (snapshot_spec["type"], snapshot_spec["name"])
+        parent = self.parents.get((snapshot_spec["type"], snapshot_spec["parent"]))
+        snapshot = self.snapshots.get(key)
+        try:
+            if snapshot:
+                if snapshot["type"] != "SNAPSHOT" or snapshot["parent_id"] != (parent or {}).get("id"):
+                    msg = f"{snapshot_spec['name']} exists but is not a snapshot of {snapshot_spec['type']} {snapshot_spec['parent']}"
+                    return get_item_result(snapshot_spec, False, msg=msg, failed=True)
+                return self.update_snapshot(snapshot_spec, snapshot)
+            if not parent:
+                msg = f"Cannot create snapshot {snapshot_spec['name']}. Parent {snapshot_spec['type']} {snapshot_spec['parent']} not found"
+                return get_item_result(snapshot_spec, False, msg=msg, failed=True)
+            return self.create_snapshot(snapshot_spec, parent)
+        except APICommandFailed as err:
+            return get_item_result(snapshot_spec, False, msg=str(err), failed=True)
+
+
+def handle_stat(module):
+    """ Report which of the templated snapshots exist """
+    system = get_system(module)
+    snapshot_specs = get_snapshot_specs(module)
+    _, snapshots = get_parents_and_snapshots(module, system, snapshot_specs)
+    results = []
+    for snapshot_spec in snapshot_specs:
+        snapshot = snapshots.get((snapshot_spec["type"], snapshot_spec["name"]))
+        result = get_item_result(snapshot_spec, False)
+        result["exists"] = snapshot is not None
+        if snapshot:
+            result["id"] = snapshot["id"]
+            result["lock_state"] = snapshot["lock_state"]
+            result["write_protected"] = snapshot["write_protected"]
+        results.append(result)
+    found_count = len([result for result in results if result["exists"]])
+    msg = f"{found_count} of {len(results)} snapshots found"
+    module.exit_json(changed=False, msg=msg, snapshots=results)
+
+
+def handle_present(module):
+    """ Create, lock and write protect snapshots concurrently """
+    system = get_system(module)
+    snapshot_specs = get_snapshot_specs(module)
+    parents, snapshots = get_parents_and_snapshots(module, system, snapshot_specs)
+
+    worker = SnapshotWorker(module, system, parents, snapshots)
+    with ThreadPoolExecutor(max_workers=module.params["workers"]) as executor:
+        results = list(executor.map(worker.run, snapshot_specs))
+
+    changed = any(result["changed"] for result in results)
+    changed_count = len([result for result in results if result["changed"]])
+    failed_count = len([result for result in results if result.get("failed")])
+    if failed_count:
+        msg = f"{failed_count} of {len(results)} snapshots failed. {changed_count} snapshots changed."
+        module.fail_json(changed=changed, msg=msg, snapshots=results)
+    msg = f"{changed_count} of {len(results)} snapshots changed"
+    module.exit_json(changed=changed, msg=msg, snapshots=results)
+
+
+def execute_state(module):
+    """ Handle each state """
+    state = module.params["state"]
+    try:
+        if state == "stat":
+            handle_stat(module)
+        elif state == "present":
+            handle_present(module)
+        else:
+            module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
+    finally:
+        system = get_system(module)
+        logout_system(system)
+
+
+def check_options(module):
+    """Verify module options are sane"""
+    if not module.params["volumes"] and not module.params["filesystems"]:
+        module.fail_json(msg="At least one volume or file system is required")
+
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers must be at least 1")
+    if module.params["max_in_flight"] is not None and module.params["max_in_flight"] < 1:
+        module.fail_json(msg="max_in_flight must be at least 1")
+
+    try:
+        snapshot_specs = get_snapshot_specs(module)
+    except (KeyError, IndexError, ValueError) as err:
+        module.fail_json(msg=f"Invalid name_template: {err}")
+    for parent_type in PARENT_TYPES:
+        names = [snapshot_spec["name"] for snapshot_spec in snapshot_specs if snapshot_spec["type"] == parent_type]
+        duplicate_names = sorted({name for name in names if names.count(name) > 1})
+        if duplicate_names:
+            module.fail_json(msg=f"Snapshot names must be unique. name_template generates duplicates: {duplicate_names}")
+
+    if module.params["state"] == "present":
+        check_snapshot_lock_options(module)
+
+
+def main():
+    """ Main """
+    argument_spec = infinibox_argument_spec()
+    argument_spec.update(
+        dict(
+            volumes=dict(required=False, type="list", elements="str", default=[]),
+            filesystems=dict(required=False, type="list", elements="str", default=[]),
+            name_template=dict(required=False, default="{parent}_snap_{timestamp}"),
+            timestamp_format=dict(required=False, default="%Y%m%d%H%M"),
+            write_protected=dict(required=False, type="bool", default=True),
+            snapshot_lock_expires_at=dict(required=False, default=None),
+            workers=dict(required=False, type="int", default=8),
+            max_in_flight=dict(required=False, type="int", default=None),
+            state=dict(default="present", choices=["stat", "present"]),
+        )
+    )
+
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    if not HAS_INFINISDK:
+        module.fail_json(msg=missing_required_lib("infinisdk"))
+
+    if not HAS_ARROW:
+        module.fail_json(msg=missing_required_lib("arrow"))
+
+    check_options(module)
+    execute_state(module)
+
+
+if __name__ == "__main__":
+    main()
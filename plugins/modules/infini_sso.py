@@ -108,18 +108,15 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     api_wrapper,
     merge_two_dicts,
     get_system,
+    logout_system,
     infinibox_argument_spec,
 )
 
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    pass  # Handled by HAS_INFINISDK from module_utils
-
 
 @api_wrapper
 def find_sso(module, name):
     """ Find a SSO using its name """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     path = f"config/sso/idps?name={name}"
 
     try:
@@ -152,6 +149,7 @@ def handle_stat(module):
 
 def handle_present(module):  # pylint: disable=too-many-locals
     """ Handle the present state """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     enabled = module.params['enabled']
     issuer = module.params['issuer']
     sign_on_url = module.params['sign_on_url']
@@ -199,6 +197,7 @@ def handle_present(module):  # pylint: disable=too-many-locals
 
 def delete_sso(module, sso_id):
     """ Delete a SSO. Reference its ID. """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     path = f"config/sso/idps/{sso_id}"
     name = module.params["name"]
     try:
@@ -252,7 +251,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
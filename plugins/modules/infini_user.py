@@ -117,21 +117,16 @@ EXAMPLES = r'''
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
     api_wrapper,
     infinibox_argument_spec,
     get_system,
+    logout_system,
     get_user,
     merge_two_dicts,
 )
 
 
-HAS_INFINISDK = True
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    HAS_INFINISDK = False
-
-
 @api_wrapper
 def find_user_ldap_group_id(module):
     """
@@ -188,6 +183,7 @@ def create_user(module, system):
 @api_wrapper
 def create_ldap_user_group(module):
     """ Create ldap user group """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     ldap_group_name = module.params['user_ldap_group_name']
     ldap_name = module.params['user_ldap_group_ldap']
     ldap_id = find_ldap_id(module)
@@ -317,6 +313,7 @@ def delete_user(module, user):
 @api_wrapper
 def delete_ldap_user_group(module):
     """ Delete a ldap user group """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     changed = False
     ldap_group_name = module.params['user_ldap_group_name']
     ldap_group_id = find_user_ldap_group_id(module)
@@ -481,6 +478,7 @@ def handle_reset_password(module):
 
 def handle_login(module):
     """ Test user credentials by logging in """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     user_name = module.params["user_name"]
     user_password = module.params['user_password']
@@ -520,7 +518,7 @@ def execute_state(module):
             module.fail_json(msg=f'Internal handler error. Invalid state: {state}')
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):  # pylint: disable=too-many-branches
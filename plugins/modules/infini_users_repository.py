@@ -170,17 +170,13 @@ EXAMPLES = r"""
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 
 from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
     api_wrapper,
     get_system,
+    logout_system,
     infinibox_argument_spec,
 )
 
-HAS_INFINISDK = True
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-except ImportError:
-    HAS_INFINISDK = False
-
 
 @api_wrapper
 def get_users_repository(module, disable_fail=False):
@@ -216,6 +212,7 @@ def test_users_repository(module, repository_id, disable_fail=False):
     Use disable_fail when we are looking for an user repository
     and it may or may not exist and neither case is an error.
     """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     name = module.params['name']
     try:
@@ -273,6 +270,7 @@ def post_users_repository(module):
     Create or update users LDAP or AD repo. The changed variable is found elsewhere.
     Variable 'changed' not returned by design
     """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     name = module.params["name"]
     data = create_post_data(module)
@@ -294,6 +292,7 @@ def post_users_repository(module):
 @api_wrapper
 def delete_users_repository(module):
     """Delete repo."""
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     system = get_system(module)
     name = module.params['name']
     changed = False
@@ -418,7 +417,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -92,6 +92,15 @@ options:
     type: bool
     required: false
     default: false
+  fields:
+    description:
+      - Limit the stat result to these fields. By default all fields are returned.
+      - The volume is fetched using one query limited to the fields required.
+    type: list
+    elements: str
+    required: false
+    choices: [ "created_at", "has_children", "lock_expires_at", "lock_state", "mapped", "name", "parent_id", "provisioning",
+               "serial", "size", "updated_at", "used", "volume_id", "volume_type", "write_protected" ]
 
 extends_documentation_fragment:
     - infinibox
@@ -127,6 +136,14 @@ EXAMPLES = r"""
     user: admin
     password: secret
     system: ibox001
+- name: Stat the size and usage of volume foo
+  infini_vol:
+    name: foo
+    fields: [size, used]
+    state: stat
+    user: admin
+    password: secret
+    system: ibox001
 - name: Remove snapshot, also a volume, named foo_snap
   infini_vol:
     name: foo_snap
@@ -144,27 +161,42 @@ from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox impo
     HAS_INFINISDK,
     api_wrapper,
     check_snapshot_lock_options,
+    get_object_fields,
     get_pool,
     get_system,
     get_vol_by_sn,
     get_volume,
     infinibox_argument_spec,
+    logout_system,
     manage_snapshot_locks,
 )
 
-HAS_INFINISDK = True
-try:
-    from infinisdk.core.exceptions import APICommandFailed
-    from infinisdk.core.exceptions import ObjectNotFound
-except ImportError:
-    HAS_INFINISDK = False
-
 HAS_CAPACITY = True
 try:
     from capacity import KiB, Capacity
 except ImportError:
     HAS_CAPACITY = False
 
+# Stat result keys and the volume fields they are built from
+STAT_FIELDS = {
+    "created_at": "created_at",
+    "has_children": "has_children",
+    "lock_expires_at": "lock_expires_at",
+    "lock_state": "lock_state",
+    "mapped": "mapped",
+    "name": "name",
+    "parent_id": "parent",
+    "provisioning": "provisioning",
+    "serial": "serial",
+    "size": "size",
+    "updated_at": "updated_at",
+    "used": "used_size",
+    "volume_id": "id",
+    "volume_type": "type",
+    "write_protected": "write_protected",
+}
+STRING_STAT_FIELDS = ["created_at", "lock_expires_at", "mapped", "serial", "size", "updated_at", "used"]
+
 
 @api_wrapper
 def create_volume(module, system):
@@ -209,6 +241,7 @@ def find_vol_id(module, system, vol_name):
 @api_wrapper
 def restore_volume_from_snapshot(module, system):
     """ Use snapshot to restore a volume """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
     changed = False
     is_restoring = module.params["restore_volume_from_snapshot"]
     volume_type = module.params["volume_type"]
@@ -282,6 +315,7 @@ def delete_volume(module, volume):
 @api_wrapper
 def create_snapshot(module, system):
     """Create Snapshot from parent volume"""
+    from infinisdk.core.exceptions import ObjectNotFound  # pylint: disable=import-outside-toplevel
     snapshot_name = module.params["name"]
     parent_volume_name = module.params["parent_volume_name"]
     try:
@@ -337,57 +371,40 @@ def update_snapshot(module, snapshot):
     return refresh_changed or lock_changed
 
 
+@api_wrapper
+def get_volume_stat_fields(module, system, field_names):
+    """ Return the named fields of the volume, found by name or serial, using one query. None if not found. """
+    if module.params["name"]:
+        return get_object_fields(system.volumes, field_names, name=module.params["name"])
+    return get_object_fields(system.volumes, field_names, serial=module.params["serial"])
+
+
 def handle_stat(module):
     """ Handle the stat state """
     system = get_system(module)
-    if module.params['name']:
-        volume = get_volume(module, system)
-    else:
-        volume = get_vol_by_sn(module, system)
-    if not volume:
+    stat_fields = module.params["fields"] or list(STAT_FIELDS)
+    field_names = {STAT_FIELDS[stat_field] for stat_field in stat_fields} | {"type"}
+    fields = get_volume_stat_fields(module, system, field_names)
+    if not fields:
         msg = f"Volume {module.params['name']} not found. Cannot stat."
         module.fail_json(msg=msg)
-    fields = volume.get_fields()  # from_cache=True, raw_value=True)
-
-    created_at = str(fields.get("created_at", None))
-    has_children = fields.get("has_children", None)
-    lock_expires_at = str(volume.get_lock_expires_at())
-    lock_state = volume.get_lock_state()
-    mapped = str(fields.get("mapped", None))
-    name = fields.get("name", None)
-    parent_id = fields.get("parent_id", None)
-    provisioning = fields.get("provisioning", None)
-    serial = str(volume.get_serial())
-    size = str(volume.get_size())
-    updated_at = str(fields.get("updated_at", None))
-    used = str(fields.get("used_size", None))
-    volume_id = fields.get("id", None)
-    volume_type = fields.get("type", None)
-    write_protected = fields.get("write_protected", None)
-    if volume_type == "SNAPSHOT":
+
+    if fields.get("type") == "SNAPSHOT":
         msg = "Volume snapshot stat found"
     else:
         msg = "Volume stat found"
 
     result = dict(
         changed=False,
-        name=name,
-        created_at=created_at,
-        has_children=has_children,
-        lock_expires_at=lock_expires_at,
-        lock_state=lock_state,
-        mapped=mapped,
         msg=msg,
-        parent_id=parent_id,
-        provisioning=provisioning,
-        serial=serial,
-        size=size,
-        updated_at=updated_at,
-        used=used,
-        volume_id=volume_id,
-        volume_type=volume_type,
-        write_protected=write_protected,
     )
+    for stat_field in stat_fields:
+        value = fields.get(STAT_FIELDS[stat_field], None)
+        if stat_field == "parent_id" and value is not None:
+            value = value.id
+        elif stat_field in STRING_STAT_FIELDS:
+            value = str(value)
+        result[stat_field] = value
     module.exit_json(**result)
 
 
@@ -486,7 +503,7 @@ def execute_state(module):
             module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
     finally:
         system = get_system(module)
-        system.logout()
+        logout_system(system)
 
 
 def check_options(module):
@@ -540,6 +557,7 @@ def main():
     argument_spec = infinibox_argument_spec()
     argument_spec.update(
         dict(
+            fields=dict(required=False, type="list", elements="str", default=None, choices=list(STAT_FIELDS)),
             name=dict(required=False, default=None),
             parent_volume_name=dict(default=None, required=False, type="str"),
             pool=dict(required=False),
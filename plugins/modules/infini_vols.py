@@ -0,0 +1,375 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# pylint: disable=invalid-name,use-dict-literal,too-many-branches,too-many-locals,line-too-long,wrong-import-position
+
+""" A module for managing many Infinibox volumes in one task """
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r"""
+---
+module: infini_vols
+version_added: 2.16.0
+short_description:  Create, Delete or Modify many volumes on Infinibox in one task
+description:
+    - This module reconciles a list of master volumes on Infinibox.
+    - The current state of all listed volumes is fetched using a few batched queries.
+      Only the creates, updates and deletes required to reach the desired state are executed.
+    - Use this module instead of looping over infini_vol when managing hundreds or thousands of volumes.
+    - A pool is only used when creating a volume. Existing volumes are not moved between pools.
+author: David Ohlemacher (@ohlemacher)
+options:
+  volumes:
+    description:
+      - List of desired volume specifications.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description:
+          - Volume name.
+        type: str
+        required: true
+      pool:
+        description:
+          - Pool that the volume will reside within. Required to create a volume.
+        type: str
+        required: false
+      size:
+        description:
+          - Volume size in MB, GB or TB units. Required to create a volume.
+        type: str
+        required: false
+      thin_provision:
+        description:
+          - Whether the volume should be thin or thick provisioned.
+          - If not specified, volumes are created thin and the provisioning of existing volumes is not changed.
+        type: bool
+        required: false
+      write_protected:
+        description:
+          - Specifies if the volume should be write protected.
+          - If not specified, volumes are created without write protection and the write protection of existing volumes is not changed.
+        type: bool
+        required: false
+      state:
+        description:
+          - Overrides the module state for this volume. Either present or absent.
+        type: str
+        required: false
+        choices: [ "present", "absent" ]
+  state:
+    description:
+      - Creates/Modifies listed volumes when present or removes them when absent.
+      - Stat returns the current fields of the listed volumes without making changes.
+    type: str
+    required: false
+    default: present
+    choices: [ "stat", "present", "absent" ]
+
+extends_documentation_fragment:
+    - infinibox
+requirements:
+    - capacity
+"""
+
+EXAMPLES = r"""
+- name: Make sure volumes exist
+  infini_vols:
+    volumes:
+      - name: foo1
+        size: 1TB
+        pool: bar
+      - name: foo2
+        size: 100GB
+        pool: bar
+        thin_provision: false
+      - name: foo3
+        state: absent
+    state: present
+    user: admin
+    password: secret
+    system: ibox001
+- name: Stat volumes
+  infini_vols:
+    volumes:
+      - name: foo1
+      - name: foo2
+    state: stat
+    user: admin
+    password: secret
+    system: ibox001
+"""
+
+# RETURN = r''' # '''
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    HAS_INFINISDK,
+    api_wrapper,
+    get_objects_by_names,
+    get_system,
+    infinibox_argument_spec,
+    logout_system,
+)
+
+HAS_CAPACITY = True
+try:
+    from capacity import KiB, Capacity, byte
+except ImportError:
+    HAS_CAPACITY = False
+
+VOLUME_FIELDS = ["id", "name", "size", "provtype", "write_protected", "pool_id", "type", "lock_state"]
+
+
+def get_desired_state(module, volume_spec):
+    """ Return the desired state of a volume spec, falling back to the module's state """
+    return volume_spec["state"] or module.params["state"]
+
+
+@api_wrapper
+def get_current_volumes(module, system):
+    """ Fetch the listed volumes that exist, keyed by name, using batched queries """
+    names = [volume_spec["name"] for volume_spec in module.params["volumes"]]
+    return get_objects_by_names(system, "volumes", names, fields=VOLUME_FIELDS)
+
+
+@api_wrapper
+def get_pools(module, system, volume_specs):
+    """ Fetch the pools required to create volumes, keyed by name. Fail if a pool is not found. """
+    pool_names = {volume_spec["pool"] for volume_spec in volume_specs}
+    pools = get_objects_by_names(system, "pools", pool_names, fields=["id", "name"])
+    missing_pool_names = sorted(pool_names - set(pools))
+    if missing_pool_names:
+        module.fail_json(msg=f"Pools {missing_pool_names} not found. Cannot create volumes.")
+    return pools
+
+
+def plan_volume_changes(volume_spec, current):
+    """
+    Compare a volume spec with the volume's current fields.
+    Return a dict of fields to update. Empty if the volume is as desired.
+    Only the fields specified in the volume spec are compared.
+    """
+    updates = {}
+    if volume_spec["size"]:
+        size = Capacity(volume_spec["size"]).roundup(64 * KiB)
+        if current["size"] * byte != size:
+            updates["size"] = size
+    if volume_spec["thin_provision"] is not None:
+        provtype = "THIN" if volume_spec["thin_provision"] else "THICK"
+        if current["provtype"] != provtype:
+            updates["provtype"] = provtype
+    if volume_spec["write_protected"] is not None and current["write_protected"] != volume_spec["write_protected"]:
+        updates["write_protected"] = volume_spec["write_protected"]
+    return updates
+
+
+def create_volume(module, system, volume_spec, pool_id):
+    """ Create a volume from a volume spec """
+    if not module.check_mode:
+        provtype = "THICK" if volume_spec["thin_provision"] is False else "THIN"
+        size = Capacity(volume_spec["size"]).roundup(64 * KiB)
+        pool = system.pools.get_by_id_lazy(pool_id)
+        system.volumes.create(
+            name=volume_spec["name"], provtype=provtype, pool=pool, size=size, write_protected=bool(volume_spec["write_protected"]),
+        )
+
+
+def update_volume(module, system, current, updates):
+    """ Apply planned updates to an existing volume """
+    if not module.check_mode:
+        volume = system.volumes.get_by_id_lazy(current["id"])
+        if "size" in updates:
+            volume.update_size(updates["size"])
+        if "provtype" in updates:
+            volume.update_provisioning(updates["provtype"])
+        if "write_protected" in updates:
+            volume.update_field("write_protected", updates["write_protected"])
+
+
+def delete_volume(module, system, current):
+    """ Delete an existing volume """
+    if not module.check_mode:
+        system.volumes.get_by_id_lazy(current["id"]).delete()
+
+
+def get_volume_result(current):
+    """ Return the stat fields of a volume """
+    return dict(
+        name=current["name"],
+        pool_id=current["pool_id"],
+        provisioning=current["provtype"],
+        size=str(current["size"] * byte),
+        volume_id=current["id"],
+        volume_type=current["type"],
+        write_protected=current["write_protected"],
+    )
+
+
+def get_item_result(name, state, changed, action=None, msg=None, failed=False):
+    """ Return a per volume result """
+    result = dict(name=name, state=state, changed=changed)
+    if action:
+        result["action"] = action
+    if msg:
+        result["msg"] = msg
+    if failed:
+        result["failed"] = True
+    return result
+
+
+def handle_stat(module):
+    """ Return the fields of the listed volumes. Missing volumes are reported as absent. """
+    system = get_system(module)
+    current_volumes = get_current_volumes(module, system)
+    results = []
+    for volume_spec in module.params["volumes"]:
+        name = volume_spec["name"]
+        current = current_volumes.get(name)
+        if current:
+            result = get_item_result(name, "present", False)
+            result.update(get_volume_result(current))
+        else:
+            result = get_item_result(name, "absent", False)
+        results.append(result)
+    found_count = len([result for result in results if result["state"] == "present"])
+    msg = f"{found_count} of {len(results)} volumes found"
+    module.exit_json(changed=False, msg=msg, volumes=results)
+
+
+def handle_present_and_absent(module):
+    """ Create, update and delete volumes so that each matches its desired state """
+    from infinisdk.core.exceptions import APICommandFailed  # pylint: disable=import-outside-toplevel
+    system = get_system(module)
+    volume_specs = module.params["volumes"]
+    current_volumes = get_current_volumes(module, system)
+
+    volume_specs_to_create = [
+        volume_spec for volume_spec in volume_specs
+        if get_desired_state(module, volume_spec) == "present" and volume_spec["name"] not in current_volumes
+    ]
+    for volume_spec in volume_specs_to_create:
+        if not volume_spec["size"] or not volume_spec["pool"]:
+            module.fail_json(msg=f"Volume {volume_spec['name']} does not exist. Size and pool are required to create it.")
+    pools = {}
+    if volume_specs_to_create:
+        pools = get_pools(module, system, volume_specs_to_create)
+
+    results = []
+    for volume_spec in volume_specs:
+        name = volume_spec["name"]
+        desired_state = get_desired_state(module, volume_spec)
+        current = current_volumes.get(name)
+        try:
+            if desired_state == "present" and not current:
+                create_volume(module, system, volume_spec, pools[volume_spec["pool"]]["id"])
+                result = get_item_result(name, desired_state, True, action="created")
+            elif desired_state == "present":
+                updates = plan_volume_changes(volume_spec, current)
+                if updates and current["type"] != "MASTER":
+                    msg = f"Volume {name} is a {current['type'].lower()}, not a master volume. Cannot update it."
+                    result = get_item_result(name, desired_state, False, msg=msg, failed=True)
+                elif updates:
+                    update_volume(module, system, current, updates)
+                    result = get_item_result(name, desired_state, True, action="updated", msg=f"Updated {sorted(updates)}")
+                else:
+                    result = get_item_result(name, desired_state, False)
+            elif current and current["lock_state"] == "LOCKED":
+                result = get_item_result(name, desired_state, False, msg=f"Cannot delete volume {name}. Locked.", failed=True)
+            elif current:
+                delete_volume(module, system, current)
+                result = get_item_result(name, desired_state, True, action="deleted")
+            else:
+                result = get_item_result(name, desired_state, False)
+        except APICommandFailed as err:
+            result = get_item_result(name, desired_state, False, msg=str(err), failed=True)
+        results.append(result)
+
+    changed = any(result["changed"] for result in results)
+    changed_count = len([result for result in results if result["changed"]])
+    failed_count = len([result for result in results if result.get("failed")])
+    if failed_count:
+        msg = f"{failed_count} of {len(results)} volumes failed. {changed_count} volumes changed."
+        module.fail_json(changed=changed, msg=msg, volumes=results)
+    msg = f"{changed_count} of {len(results)} volumes changed"
+    module.exit_json(changed=changed, msg=msg, volumes=results)
+
+
+def execute_state(module):
+    """ Handle each state """
+    state = module.params["state"]
+    try:
+        if state == "stat":
+            handle_stat(module)
+        elif state in ["present", "absent"]:
+            handle_present_and_absent(module)
+        else:
+            module.fail_json(msg=f"Internal handler error. Invalid state: {state}")
+    finally:
+        system = get_system(module)
+        logout_system(system)
+
+
+def check_options(module):
+    """Verify module options are sane"""
+    names = [volume_spec["name"] for volume_spec in module.params["volumes"]]
+    duplicate_names = sorted({name for name in names if names.count(name) > 1})
+    if duplicate_names:
+        module.fail_json(msg=f"Volume names must be unique. Duplicates: {duplicate_names}")
+
+    if module.params["state"] == "stat":
+        return
+
+    for volume_spec in module.params["volumes"]:
+        if volume_spec["size"]:
+            try:
+                Capacity(volume_spec["size"])
+            except Exception:  # pylint: disable=broad-exception-caught
+                module.fail_json(msg=f"Volume {volume_spec['name']} size (Physical Capacity) should be defined in MB, GB, TB or PB units")
+
+
+def main():
+    """ Main """
+    argument_spec = infinibox_argument_spec()
+    argument_spec.update(
+        dict(
+            volumes=dict(
+                required=True,
+                type="list",
+                elements="dict",
+                options=dict(
+                    name=dict(required=True),
+                    pool=dict(required=False, default=None),
+                    size=dict(required=False, default=None),
+                    thin_provision=dict(type="bool", default=None),
+                    write_protected=dict(type="bool", default=None),
+                    state=dict(required=False, default=None, choices=["present", "absent"]),
+                ),
+            ),
+            state=dict(default="present", choices=["stat", "present", "absent"]),
+        )
+    )
+
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    if not HAS_INFINISDK:
+        module.fail_json(msg=missing_required_lib("infinisdk"))
+
+    if not HAS_CAPACITY:
+        module.fail_json(msg=missing_required_lib("capacity"))
+
+    check_options(module)
+    execute_state(module)
+
+
+if __name__ == "__main__":
+    main()
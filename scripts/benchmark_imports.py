@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""
+Measure the import time of each infini_* module.
+
+Each module is imported in a fresh interpreter using python -X importtime, as AnsiballZ
+does on every task. The total import time of the module, and the cumulative import
+time of its heavy dependencies, are reported in microseconds as JSON, so that startup
+cost can be compared across commits. Dependencies imported by another dependency,
+e.g. arrow by infinisdk, are included in that dependency's time.
+
+Usage: scripts/benchmark_imports.py [--repeat 5] [--output imports.json] [infini_vol ...]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES_DIR = os.path.join(REPO_DIR, "plugins", "modules")
+MODULES_PACKAGE = "ansible_collections.infinidat.infinibox.plugins.modules"
+DEPENDENCIES = ["ansible", "arrow", "capacity", "infinisdk", "munch", "urllib3"]
+
+
+def get_module_names():
+    """ Return the names of all infini_* modules """
+    return sorted(
+        file_name[:-3] for file_name in os.listdir(MODULES_DIR)
+        if file_name.startswith("infini_") and file_name.endswith(".py")
+    )
+
+
+def make_collections_path():
+    """ Return a temporary collections path in which this repository is the infinidat.infinibox collection """
+    collections_path = tempfile.mkdtemp(prefix="infinibox_benchmark_")
+    namespace_dir = os.path.join(collections_path, "ansible_collections", "infinidat")
+    os.makedirs(namespace_dir)
+    os.symlink(REPO_DIR, os.path.join(namespace_dir, "infinibox"))
+    return collections_path
+
+
+def parse_importtime(stderr):
+    """
+    Return a dict of the cumulative import time, in microseconds, of each module in python -X importtime output.
+    A module is only imported once, so its time is included in whichever module imported it first.
+    """
+    cumulative_times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():  # Not the header line
+            cumulative_times.setdefault(name.strip(), int(cumulative))
+    return cumulative_times
+
+
+def measure_import(module_name, collections_path):
+    """ Import a module in a fresh interpreter. Return its wall time and import times in microseconds. """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [collections_path, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULES_PACKAGE}.{module_name}"],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    wall_time = int((time.perf_counter() - start) * 1000000)
+    if process.returncode != 0:
+        return dict(failed=True, msg=process.stderr.strip().splitlines()[-1])
+
+    cumulative_times = parse_importtime(process.stderr)
+    imports = {name: cumulative for name, cumulative in cumulative_times.items() if name in DEPENDENCIES}
+    return dict(
+        wall_time=wall_time,
+        import_time=cumulative_times.get(f"{MODULES_PACKAGE}.{module_name}", 0),
+        imports=imports,
+    )
+
+
+def benchmark(module_names, repeat):
+    """ Return the median measurements of importing each module repeat times """
+    collections_path = make_collections_path()
+    results = {}
+    try:
+        for module_name in module_names:
+            runs = [measure_import(module_name, collections_path) for _ in range(repeat)]
+            failed_runs = [run for run in runs if run.get("failed")]
+            if failed_runs:
+                results[module_name] = failed_runs[0]
+                continue
+            results[module_name] = dict(
+                wall_time=int(statistics.median(run["wall_time"] for run in runs)),
+                import_time=int(statistics.median(run["import_time"] for run in runs)),
+                imports={
+                    name: int(statistics.median(run["imports"].get(name, 0) for run in runs))
+                    for name in sorted({name for run in runs for name in run["imports"]})
+                },
+            )
+    finally:
+        shutil.rmtree(collections_path)
+    return results
+
+
+def main():
+    """ Main """
+    parser = argparse.ArgumentParser(description="Measure the import time of infini_* modules")
+    parser.add_argument("modules", nargs="*", help="Modules to measure. Defaults to all infini_* modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of imports per module. The median is reported.")
+    parser.add_argument("--output", help="Write the JSON results to this file rather than to stdout.")
+    args = parser.parse_args()
+
+    results = dict(
+        python=sys.version.split()[0],
+        unit="microseconds",
+        modules=benchmark(args.modules or get_module_names(), args.repeat),
+    )
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
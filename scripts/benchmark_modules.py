@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+
+"""
+Benchmark infini_* modules against a mock Infinibox.
+
+Each scenario runs a module's main() with one state, e.g. infini_vol present, in a fresh
+interpreter, against the REST API served by scripts/mock_infinibox.py. The objects a scenario
+needs, e.g. the pool of a volume, are created in the mock before each run. No real Infinibox is used.
+
+For each module and state the median wall time of the interpreter, the time to import the module
+and infinisdk, the time spent in main(), and the number of REST calls per method and URL template
+are reported as JSON. Times are in microseconds. Compare results across commits to catch regressions,
+e.g. in REST call counts. If any scenario fails, the failures are listed and the exit status is 1.
+
+Use --scale to add many objects of each type to the mock, e.g. --scale 100000, and --latency to
+add a delay to each response, to measure how modules scale with the size and distance of the array.
+
+Usage: scripts/benchmark_modules.py [--repeat 3] [--scale 0] [--latency 0] [--output modules.json] [infini_vol ...]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from importlib import import_module
+
+from benchmark_imports import MODULES_PACKAGE, make_collections_path
+from mock_infinibox import MockInfinibox, populate, start_server
+
+MOCK_HOST = "127.0.0.1"
+AUTH = dict(system="mock-ibox", user="admin", password="secret")
+
+# For each module, the objects to create in the mock, as (collection, fields), config values, as (group, key, value),
+# and the module arguments of each state. Objects are created before each run, so that present creates an object and
+# absent deletes one.
+POOL = ("pools", dict(id=1001, name="pool1"))
+SCENARIOS = {
+    "infini_cluster": dict(
+        objects=[("clusters", dict(name="cluster1"))],
+        states=dict(
+            stat=dict(name="cluster1"),
+            present=dict(name="cluster2"),
+            absent=dict(name="cluster1"),
+        ),
+    ),
+    "infini_config": dict(
+        config=[("mgmt", "mgmt.is_decimal_capacity_converter", False)],
+        states=dict(
+            stat=dict(config_group="mgmt", key="mgmt.is_decimal_capacity_converter"),
+            present=dict(config_group="mgmt", key="mgmt.is_decimal_capacity_converter", value="true"),
+        ),
+    ),
+    "infini_export": dict(
+        objects=[POOL, ("filesystems", dict(id=1002, name="fs1", pool_id=1001)), ("exports", dict(export_path="/fs1", filesystem_id=1002))],
+        states=dict(
+            stat=dict(name="/fs1", filesystem="fs1"),
+            present=dict(name="/fs1_2", filesystem="fs1"),
+            absent=dict(name="/fs1", filesystem="fs1"),
+        ),
+    ),
+    "infini_export_client": dict(
+        objects=[
+            POOL,
+            ("filesystems", dict(id=1002, name="fs1", pool_id=1001)),
+            ("exports", dict(export_path="/fs1", filesystem_id=1002, permissions=[dict(client="10.0.0.1", access="RW", no_root_squash=False)])),
+        ],
+        states=dict(
+            stat=dict(export="/fs1", client="10.0.0.1"),
+            present=dict(export="/fs1", client="10.0.0.2"),
+            absent=dict(export="/fs1", client="10.0.0.1"),
+        ),
+    ),
+    "infini_fs": dict(
+        objects=[POOL, ("filesystems", dict(name="fs1", pool_id=1001))],
+        states=dict(
+            stat=dict(name="fs1", pool="pool1"),
+            present=dict(name="fs2", pool="pool1", size="1GB"),
+            absent=dict(name="fs1", pool="pool1"),
+        ),
+    ),
+    "infini_host": dict(
+        objects=[("hosts", dict(name="host1"))],
+        states=dict(
+            stat=dict(name="host1"),
+            present=dict(name="host2"),
+            absent=dict(name="host1"),
+        ),
+    ),
+    "infini_map": dict(
+        objects=[
+            POOL,
+            ("volumes", dict(id=1002, name="vol1", pool_id=1001, mapped=True)),
+            ("volumes", dict(id=1003, name="vol2", pool_id=1001)),
+            ("hosts", dict(id=1004, name="host1", luns=[dict(id=1005, lun=1, volume_id=1002, host_id=1004, clustered=False)])),
+        ],
+        states=dict(
+            stat=dict(host="host1", volume="vol1"),
+            present=dict(host="host1", volume="vol2"),
+            absent=dict(host="host1", volume="vol1"),
+        ),
+    ),
+    "infini_metadata": dict(
+        objects=[
+            POOL,
+            ("volumes", dict(id=1002, name="vol1", pool_id=1001)),
+            ("metadata", dict(object_id=1002, object_type="volume", key="app", value="payments")),
+        ],
+        states=dict(
+            stat=dict(object_type="vol", object_name="vol1", key="app"),
+            present=dict(object_type="vol", object_name="vol1", key="tier", value="gold"),
+            absent=dict(object_type="vol", object_name="vol1", key="app"),
+        ),
+    ),
+    "infini_network_space": dict(
+        objects=[
+            ("network/spaces", dict(name="space1", ips=[
+                dict(ip_address="10.0.0.10", enabled=True, type="MANAGEMENT"),
+                dict(ip_address="10.0.0.11", enabled=True, type="INTERFACE"),
+            ])),
+        ],
+        states=dict(
+            stat=dict(name="space1"),
+            present=dict(
+                name="space2", service="NAS_SERVICE", interfaces=[1001], network="10.0.1.0", netmask=24,
+                default_gateway="10.0.1.1", ips=["10.0.1.10", "10.0.1.11", "10.0.1.12"],
+            ),
+            absent=dict(name="space1"),
+        ),
+    ),
+    "infini_notification_rule": dict(
+        objects=[("notifications/targets", dict(id=1001, name="target1")), ("notifications/rules", dict(name="rule1", target_id=1001))],
+        states=dict(
+            stat=dict(name="rule1"),
+            present=dict(name="rule2", target="target1", event_level=["INFO"]),
+            absent=dict(name="rule1"),
+        ),
+    ),
+    "infini_notification_target": dict(
+        objects=[("notifications/targets", dict(name="target1", host="syslog.example.com"))],
+        states=dict(
+            stat=dict(name="target1"),
+            present=dict(name="target2", host="syslog.example.com"),
+            absent=dict(name="target1"),
+        ),
+    ),
+    "infini_pool": dict(
+        objects=[("pools", dict(name="pool1"))],
+        states=dict(
+            stat=dict(name="pool1"),
+            present=dict(name="pool2", size="1TB", vsize="1TB"),
+            absent=dict(name="pool1"),
+        ),
+    ),
+    "infini_port": dict(
+        objects=[("hosts", dict(name="host1", ports=[dict(type="ISCSI", address="iqn.2009-01.com.example:host1")]))],
+        states=dict(
+            stat=dict(host="host1"),
+            present=dict(host="host1", iqns=["iqn.2009-01.com.example:host1-2"]),
+            absent=dict(host="host1", iqns=["iqn.2009-01.com.example:host1"]),
+        ),
+    ),
+    "infini_user": dict(
+        objects=[("users", dict(name="user1", email="user1@example.com", role="READ_ONLY"))],
+        states=dict(
+            stat=dict(user_name="user1"),
+            present=dict(user_name="user2", user_email="user2@example.com", user_password="secret2", user_role="read_only"),
+            absent=dict(user_name="user1"),
+        ),
+    ),
+    "infini_vol": dict(
+        objects=[POOL, ("volumes", dict(name="vol1", pool_id=1001))],
+        states=dict(
+            stat=dict(name="vol1"),
+            present=dict(name="vol2", pool="pool1", size="1GB"),
+            absent=dict(name="vol1"),
+        ),
+    ),
+    "infini_vols": dict(
+        objects=[POOL] + [("volumes", dict(name=f"vol{index}", pool_id=1001)) for index in range(1, 11)],
+        states=dict(
+            stat=dict(volumes=[dict(name=f"vol{index}") for index in range(1, 11)]),
+            present=dict(volumes=[dict(name=f"vol{index}", pool="pool1", size="1GB") for index in range(11, 21)]),
+            absent=dict(volumes=[dict(name=f"vol{index}") for index in range(1, 11)]),
+        ),
+    ),
+}
+
+
+def target_mock(infinisdk, port):
+    """ Make infinisdk connect to the mock, over HTTP, whatever the system option of the module """
+
+    class MockTargetInfiniBox(infinisdk.InfiniBox):  # pylint: disable=too-few-public-methods
+        """ InfiniBox connecting to the mock """
+
+        def __init__(self, address, *args, **kwargs):  # pylint: disable=unused-argument
+            kwargs["use_ssl"] = False
+            super().__init__((MOCK_HOST, port), *args, **kwargs)
+
+        @classmethod
+        def get_type_name(cls):
+            """ Keep the type name of InfiniBox. infinisdk tags its hooks by type name and rejects unknown tags. """
+            return "infinibox"
+
+    infinisdk.InfiniBox = MockTargetInfiniBox
+
+
+def run_worker(request):
+    """
+    Run a module's main() with request's arguments, in this fresh interpreter, against the mock listening on request's port.
+    Return the import and run times and the module's result.
+    """
+    start = time.perf_counter()
+    module = import_module(f"{MODULES_PACKAGE}.{request['module']}")
+    from ansible.module_utils import basic  # pylint: disable=import-outside-toplevel
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import infinisdk  # pylint: disable=import-outside-toplevel
+    infinisdk_import_time = time.perf_counter() - start
+    target_mock(infinisdk, request["port"])
+
+    output = io.StringIO()
+    basic._ANSIBLE_ARGS = json.dumps({"ANSIBLE_MODULE_ARGS": request["args"]}).encode("utf-8")  # pylint: disable=protected-access
+    if hasattr(basic, "_ANSIBLE_PROFILE"):  # ansible-core 2.19 and later require a serialization profile
+        basic._ANSIBLE_PROFILE = "legacy"  # pylint: disable=protected-access
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            module.main()
+    except SystemExit:
+        pass  # exit_json() and fail_json() exit once the result is written
+    run_time = time.perf_counter() - start
+
+    result = dict(failed=True, msg="Module returned no result")
+    for line in reversed(output.getvalue().splitlines()):
+        if line.startswith("{"):
+            result = json.loads(line)
+            break
+    return dict(
+        import_time=int(import_time * 1000000),
+        infinisdk_import_time=int(infinisdk_import_time * 1000000),
+        run_time=int(run_time * 1000000),
+        changed=result.get("changed", False),
+        failed=result.get("failed", False),
+        msg=result.get("msg", ""),
+    )
+
+
+def run_scenario(mock, port, collections_path, module_name, state, scale):
+    """
+    Create the scenario's objects in the mock, and scale objects of each type, and run the module in a fresh interpreter.
+    Return its measurements.
+    """
+    scenario = SCENARIOS[module_name]
+    mock.reset()
+    for collection, fields in scenario.get("objects", []):
+        mock.add_object(collection, **fields)
+    for config_group, key, value in scenario.get("config", []):
+        mock.set_config(config_group, key, value)
+    populate(mock, volumes=scale, filesystems=scale, hosts=scale, metadata=scale)
+    mock.reset_request_counts()
+
+    request = dict(module=module_name, port=port, args=dict(AUTH, state=state, **scenario["states"][state]))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [collections_path, os.environ.get("PYTHONPATH")])))
+    env.pop("INFINIBOX_SESSION_CACHE_DIR", None)  # Measure a login per run
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker"],
+        input=json.dumps(request), env=env, capture_output=True, text=True, check=False,
+    )
+    wall_time = int((time.perf_counter() - start) * 1000000)
+    if process.returncode != 0:
+        return dict(failed=True, msg=(process.stderr.strip().splitlines() or ["Worker failed"])[-1])
+
+    measurements = json.loads(process.stdout)
+    measurements.update(wall_time=wall_time, rest_calls=mock.get_request_counts())
+    return measurements
+
+
+def benchmark(module_names, states, repeat, scale=0, latency=0.0, jitter=0.0):
+    """
+    Return the median measurements of running each state of each module repeat times.
+    scale objects of each type are added to the mock, and latency plus up to jitter seconds are added to each response.
+    """
+    mock = MockInfinibox(latency=latency, jitter=jitter)
+    server = start_server(mock, MOCK_HOST)
+    collections_path = make_collections_path()
+    results = {}
+    try:
+        for module_name in module_names:
+            results[module_name] = {}
+            for state in states:
+                if state not in SCENARIOS[module_name]["states"]:
+                    continue
+                runs = [run_scenario(mock, server.server_address[1], collections_path, module_name, state, scale) for _ in range(repeat)]
+                failed_runs = [run for run in runs if run.get("failed")]
+                if failed_runs:
+                    results[module_name][state] = failed_runs[0]
+                    continue
+                results[module_name][state] = dict(
+                    {name: int(statistics.median(run[name] for run in runs)) for name in ("wall_time", "import_time", "infinisdk_import_time", "run_time")},
+                    changed=runs[0]["changed"],
+                    rest_calls=runs[0]["rest_calls"],
+                    rest_calls_total=sum(runs[0]["rest_calls"].values()),
+                )
+    finally:
+        server.shutdown()
+        shutil.rmtree(collections_path)
+    return results
+
+
+def main():
+    """ Main """
+    parser = argparse.ArgumentParser(description="Benchmark infini_* modules against a mock Infinibox")
+    parser.add_argument("modules", nargs="*", help="Modules to benchmark. Defaults to all modules with a scenario.")
+    parser.add_argument("--state", action="append", choices=["stat", "present", "absent"], help="States to benchmark. Defaults to all.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per module and state. The median is reported.")
+    parser.add_argument("--scale", type=int, default=0, help="Number of additional volumes, filesystems, hosts and metadata entries in the mock.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to each mock response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many random milliseconds added to each mock response.")
+    parser.add_argument("--output", help="Write the JSON results to this file rather than to stdout.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.load(sys.stdin))))
+        return
+    unknown_modules = sorted(set(args.modules) - set(SCENARIOS))
+    if unknown_modules:
+        parser.error(f"No scenario for {', '.join(unknown_modules)}. Choose from {', '.join(sorted(SCENARIOS))}.")
+
+    results = dict(
+        python=sys.version.split()[0],
+        unit="microseconds",
+        scale=args.scale,
+        latency=args.latency,
+        jitter=args.jitter,
+        modules=benchmark(
+            args.modules or sorted(SCENARIOS), args.state or ["stat", "present", "absent"], args.repeat,
+            scale=args.scale, latency=args.latency / 1000, jitter=args.jitter / 1000,
+        ),
+    )
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    failures = [
+        f"{module_name} {state}: {result.get('msg')}"
+        for module_name, module_results in results["modules"].items()
+        for state, result in module_results.items()
+        if result.get("failed")
+    ]
+    if failures:
+        sys.exit("Failed scenarios:\n" + "\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
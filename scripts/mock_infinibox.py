@@ -0,0 +1,645 @@
+#!/usr/bin/env python
+
+"""
+Mock Infinibox REST API server, for benchmarks and offline testing.
+
+Objects are kept in memory, in collections keyed by their REST path, e.g. volumes or
+network/spaces. Collections support the list, get, create, update and delete requests made
+by infinisdk and the infini_* modules, including filters, e.g. name=eq:vol1 or id=in:(1,2),
+fields=, sort= and pagination. The subset of the API used by the modules is implemented on top:
+login, system information, LUN mapping, host ports, cluster hosts, metadata, network space IPs,
+config values and object actions such as notifications/targets/{id}/test.
+
+Every request is counted per method and URL template, e.g. GET volumes/{id}, so that the REST
+calls a module makes can be compared across commits. A latency, with optional random jitter,
+may be added to each response to simulate a remote array. Collections may be filled with many
+objects, e.g. --volumes 100000, to measure how modules scale.
+
+The server speaks plain HTTP. Point infinisdk at it with an address tuple,
+e.g. InfiniBox(("127.0.0.1", 8080), auth=("admin", "secret"), use_ssl=False).
+
+Usage: scripts/mock_infinibox.py [--port 8080] [--latency 2] [--jitter 1] [--volumes 100000] [--hosts 1000] ...
+"""
+
+import argparse
+import collections
+import copy
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+API_PATH = "/api/rest/"
+SYSTEM_ID = 1  # Object ID of the system's own metadata
+SYSTEM_VERSION = "7.3.10.0"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+FIRST_OBJECT_ID = 1000
+FIRST_LUN = 1
+GIB = 1024 ** 3
+
+QUERY_PARAMETERS = {"approved", "fields", "include", "page", "page_size", "sort"}  # Not filters
+FILTER_OPERATORS = {"eq", "ne", "gt", "ge", "lt", "le", "in", "notin", "like", "isnull"}
+
+COLLECTION_DEFAULTS = {
+    "pools": dict(
+        physical_capacity=10 * GIB, virtual_capacity=10 * GIB, free_physical_space=10 * GIB, free_virtual_space=10 * GIB,
+        allocated_physical_space=0, reserved_capacity=0, state="NORMAL", ssd_enabled=True, compression_enabled=True,
+        max_extend=0, physical_capacity_warning=80, physical_capacity_critical=90, owners=[], qos_policies=[],
+        volumes_count=0, filesystems_count=0, snapshots_count=0, entities_count=0,
+    ),
+    "volumes": dict(
+        type="MASTER", provtype="THIN", size=GIB, used=0, allocated=0, pool_id=None, parent_id=0, family_id=None,
+        depth=0, write_protected=False, ssd_enabled=True, compression_enabled=True, mapped=False, has_children=False,
+        lock_state="UNLOCKED", lock_expires_at=None, cg_id=None, rmr_source=False, rmr_target=False, data_snapshot_guid=None,
+    ),
+    "filesystems": dict(
+        type="MASTER", provtype="THIN", size=GIB, used=0, allocated=0, pool_id=None, parent_id=0, family_id=None,
+        depth=0, write_protected=False, ssd_enabled=True, compression_enabled=True, has_children=False,
+        lock_state="UNLOCKED", lock_expires_at=None, security_style="UNIX", snapdir_name=".snapshot",
+        snapdir_accessible=True, atime_mode="RELATIME",
+    ),
+    "cgs": dict(
+        type="MASTER", pool_id=None, parent_id=0, members_count=0, lock_state="UNLOCKED", lock_expires_at=None,
+    ),
+    "hosts": dict(
+        ports=[], luns=[], host_cluster_id=0, os_type="linux", security_method="NONE", san_client_type="HOST",
+    ),
+    "clusters": dict(
+        hosts=[], luns=[], san_client_type="CLUSTER",
+    ),
+    "exports": dict(
+        export_path=None, filesystem_id=None, enabled=True, permissions=[], transport_protocols="TCP",
+        anonymous_uid=65534, anonymous_gid=65534, privileged_port=False, make_all_users_anonymous=False,
+        max_read=1048576, max_write=1048576, pref_read=262144, pref_write=262144, pref_readdir=65536,
+        snapdir_visible=False, **{"32bit_file_id": False},
+    ),
+    "network/spaces": dict(
+        service="NAS_SERVICE", interfaces=[], ips=[], routes=[], properties={}, mtu=1500, rate_limit=None,
+        network_config=dict(network=None, netmask=None, default_gateway=None), async_only=False, automatic_ip_failback=False,
+    ),
+    "network/interfaces": dict(
+        type="PORT_GROUP", ports=[], enabled=True, state="OK",
+    ),
+    "notifications/targets": dict(
+        protocol="SYSLOG", host=None, port=514, transport="UDP", facility="LOCAL7", visibility="CUSTOMER",
+    ),
+    "notifications/rules": dict(
+        event_level=[], include_events=[], exclude_events=[], recipients=[], target_id=None,
+    ),
+    "users": dict(
+        email=None, role="READ_ONLY", roles=["READ_ONLY"], enabled=True, type="Local", is_digest_sufficient=False,
+    ),
+}
+SERIAL_COLLECTIONS = {"volumes", "filesystems"}
+METADATA_OBJECT_TYPES = {"clusters": "cluster", "cgs": "cg", "filesystems": "filesystem", "hosts": "host", "pools": "pool", "volumes": "volume"}
+URL_TEMPLATES = [  # Path segments that are names rather than IDs, as (pattern, replacement)
+    (re.compile(r"^metadata/(\{id\}|system)/[^/]+$"), r"metadata/\1/{key}"),
+    (re.compile(r"^config/[^/{}]+/[^/{}]+$"), "config/{group}/{key}"),
+    (re.compile(r"^hosts/\{id\}/ports/[^/]+/[^/]+$"), "hosts/{id}/ports/{type}/{address}"),
+    (re.compile(r"^hosts/host_id_by_initiator_address/[^/]+$"), "hosts/host_id_by_initiator_address/{address}"),
+    (re.compile(r"^network/spaces/\{id\}/ips/[^/]+"), "network/spaces/{id}/ips/{ip}"),
+]
+
+
+def format_value(value):
+    """ Return a field value as it appears in a query filter """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def parse_filter(raw_value):
+    """ Return the operator and the value of a query filter, e.g. ('in', ['1', '2']) for in:(1,2) """
+    operator, separator, value = raw_value.partition(":")
+    if not separator or operator not in FILTER_OPERATORS:
+        return "eq", raw_value
+    if operator in ("in", "notin"):
+        value = [item for item in value.strip("()[]").split(",") if item]
+    return operator, value
+
+
+def matches_filter(value, operator, filter_value):
+    """ Return True if a field value matches a query filter """
+    if operator == "eq":
+        return format_value(value) == filter_value
+    if operator == "ne":
+        return format_value(value) != filter_value
+    if operator == "in":
+        return format_value(value) in filter_value
+    if operator == "notin":
+        return format_value(value) not in filter_value
+    if operator == "like":
+        return filter_value.lower() in format_value(value).lower()
+    if operator == "isnull":
+        return (value is None) == (filter_value == "true")
+    try:
+        value, filter_value = float(value), float(filter_value)
+    except (TypeError, ValueError):
+        return False
+    return {
+        "gt": value > filter_value,
+        "ge": value >= filter_value,
+        "lt": value < filter_value,
+        "le": value <= filter_value,
+    }[operator]
+
+
+def normalize_port_address(port_type, address):
+    """ Return a port address as compared by the API. FC WWNs are lower case without colons. iSCSI names are lower case. """
+    address = address.lower()
+    if port_type.upper() == "FC":
+        address = address.replace(":", "")
+    return address
+
+
+def get_port_type(address):
+    """ Return the type of a port address, ISCSI for iSCSI names, e.g. iqn.2009-01.com.example:host1, else FC """
+    return "ISCSI" if address.lower().startswith(("iqn.", "eui.", "naa.")) else "FC"
+
+
+def get_url_template(parts):
+    """ Return the URL template of a request path, e.g. volumes/{id} for volumes/1001 """
+    template = "/".join("{id}" if part.isdigit() else part for part in parts)
+    for pattern, replacement in URL_TEMPLATES:
+        template = pattern.sub(replacement, template)
+    return template
+
+
+def get_response(result, status=200, metadata=None):
+    """ Return an HTTP status and a successful response """
+    return status, dict(result=result, error=None, metadata=metadata or dict(ready=True))
+
+
+class MockInfinibox:
+    """ In memory Infinibox REST API """
+
+    def __init__(self, latency=0.0, jitter=0.0):
+        """ latency and jitter, in seconds, are added to each response. Jitter is random, from 0 up to jitter. """
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.collections = collections.defaultdict(dict)
+        self.config = {}
+        self.request_counts = collections.Counter()
+        self.next_id = FIRST_OBJECT_ID
+
+    def reset(self):
+        """ Remove all objects, config values and request counts """
+        with self.lock:
+            self.collections.clear()
+            self.config.clear()
+            self.request_counts.clear()
+            self.next_id = FIRST_OBJECT_ID
+
+    def reset_request_counts(self):
+        """ Reset request counts, e.g. once objects are created for a benchmark """
+        with self.lock:
+            self.request_counts.clear()
+
+    def get_request_counts(self):
+        """ Return a dict of request counts keyed by method and URL template, e.g. 'GET volumes/{id}' """
+        with self.lock:
+            return dict(sorted(self.request_counts.items()))
+
+    def add_object(self, collection, **fields):
+        """ Add an object to a collection, with default values for the fields not given. Return the object. """
+        with self.lock:
+            return self._add_object(collection, fields)
+
+    def set_config(self, config_group, key, value):
+        """ Set a config value, as read by GET config/{group}/{key} """
+        with self.lock:
+            self.config[(config_group, key)] = value
+
+    def _add_object(self, collection, fields):
+        object_id = fields.get("id") or self.next_id
+        self.next_id = max(self.next_id, object_id) + 1
+        an_object = {field: copy.copy(value) for field, value in COLLECTION_DEFAULTS.get(collection, {}).items()}  # Lists are not shared
+        an_object.update(id=object_id, created_at=0, updated_at=0)
+        if collection in SERIAL_COLLECTIONS:
+            an_object["serial"] = f"742b0f000004e2b{object_id:016x}"  # IEEE company ID, reserved bits, system ID and 64 bit object ID
+        an_object.update(fields)
+        self.collections[collection][object_id] = an_object
+        return an_object
+
+    def handle(self, method, path, query, body):
+        """ Handle a request. Return its HTTP status and response. """
+        parts = [unquote(part) for part in path[len(API_PATH):].strip("/").split("/")]
+        with self.lock:
+            self.request_counts[f"{method} {get_url_template(parts)}"] += 1
+            status, response = self._handle(method, parts, query, body)
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))  # Outside the lock, so that concurrent requests overlap
+        return status, response
+
+    def _handle(self, method, parts, query, body):
+        if parts[0] == "users" and parts[1:] in (["login"], ["logout"]) and method == "POST":
+            return get_response({})
+        if parts[0] == "system" and method == "GET":
+            return self.get_system(parts[1:])
+        if parts == ["_features"] and method == "GET":
+            return get_response([])
+        if parts[0] == "metadata":
+            return self.handle_metadata(method, parts[1:], query, body)
+        if parts[0] == "config" and len(parts) == 3 and not parts[2].isdigit():
+            return self.handle_config(method, parts[1], parts[2], body)
+        if parts[:2] == ["hosts", "host_id_by_initiator_address"] and len(parts) == 3 and method == "GET":
+            return self.get_host_id_by_initiator_address(parts[2])
+
+        id_index = next((index for index, part in enumerate(parts) if part.isdigit()), len(parts))
+        collection = "/".join(parts[:id_index])
+        if id_index == len(parts) and method == "GET":
+            return self.list_objects(self.collections[collection].values(), query)
+        if id_index == len(parts) and method == "POST":
+            return get_response(self._add_object(collection, dict(body or {})), status=201)
+        if id_index == len(parts):
+            return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} {collection}")
+
+        object_id = int(parts[id_index])
+        an_object = self.collections[collection].get(object_id)
+        if an_object is None:
+            return self.error(404, "NOT_FOUND", f"No {collection} object with ID {object_id}")
+        sub_parts = parts[id_index + 1:]
+        if not sub_parts:
+            return self.handle_object(method, collection, an_object, query, body)
+        if collection == "volumes" and sub_parts == ["luns"] and method == "GET":
+            return self.list_objects(self.get_volume_luns(object_id), query)
+        if sub_parts[0] == "luns":
+            return self.handle_luns(method, collection, an_object, sub_parts[1:], body)
+        if collection == "users" and sub_parts == ["pools"] and method == "GET":
+            return self.list_objects([pool for pool in self.collections["pools"].values() if object_id in pool["owners"]], query)
+        if collection == "hosts" and sub_parts[0] == "ports":
+            return self.handle_host_ports(method, an_object, sub_parts[1:], body)
+        if collection == "clusters" and sub_parts[0] == "hosts":
+            return self.handle_cluster_hosts(method, an_object, sub_parts[1:], body)
+        if collection == "network/spaces" and sub_parts[0] == "ips":
+            return self.handle_network_space_ips(method, an_object, sub_parts[1:], body)
+        if method == "POST":
+            return get_response(dict(an_object))  # An action on the object, e.g. notifications/targets/{id}/test
+        return self.error(404, "NOT_FOUND", f"No such REST path {'/'.join(parts)}")
+
+    def get_system(self, field_parts):
+        """ Return the system information, or one of its fields, e.g. for system/product_id """
+        result = dict(
+            id=SYSTEM_ID, name="mock-ibox", serial_number=1, version=SYSTEM_VERSION, model="InfiniBox", model_name="F4304",
+            product_id="INFINIBOX", operational_state=dict(state="ACTIVE", mode="NORMAL", init_state="DONE"),
+            capacity=dict(total_physical_capacity=1000 * GIB, total_virtual_capacity=1000 * GIB),
+        )
+        if field_parts:
+            if field_parts[0] not in result:
+                return self.error(404, "NOT_FOUND", f"No system field {field_parts[0]}")
+            return get_response(result[field_parts[0]])
+        return get_response(result)
+
+    def list_objects(self, objects, query):
+        """ Return a page of objects matching the query's filters """
+        results = list(objects)
+        for field, raw_value in query:
+            if field not in QUERY_PARAMETERS:
+                operator, filter_value = parse_filter(raw_value)
+                results = [result for result in results if matches_filter(result.get(field), operator, filter_value)]
+
+        parameters = dict(query)
+        if parameters.get("sort"):
+            for sort_field in reversed(parameters["sort"].split(",")):
+                reverse = sort_field.startswith("-")
+                sort_field = sort_field.lstrip("-")
+                results.sort(key=lambda result: format_value(result.get(sort_field)), reverse=reverse)  # pylint: disable=cell-var-from-loop
+        else:
+            results.sort(key=lambda result: result["id"])
+
+        page = max(int(parameters.get("page", 1)), 1)
+        page_size = min(int(parameters.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        pages_total = max((len(results) + page_size - 1) // page_size, 1)
+        page_results = results[(page - 1) * page_size:page * page_size]
+        metadata = dict(ready=True, page=page, page_size=page_size, pages_total=pages_total, number_of_objects=len(results))
+        return get_response([self.get_fields(result, parameters) for result in page_results], metadata=metadata)
+
+    def handle_object(self, method, collection, an_object, query, body):
+        """ Get, update or delete an object """
+        if method == "PUT":
+            an_object.update(body or {})
+        elif method == "DELETE":
+            del self.collections[collection][an_object["id"]]
+            self.delete_object_metadata(an_object["id"])
+        elif method != "GET":
+            return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} {collection}/{an_object['id']}")
+        return get_response(self.get_fields(an_object, dict(query)))
+
+    def handle_luns(self, method, collection, host_or_cluster, lun_parts, body):
+        """
+        List, map or unmap the LUNs of a host or a cluster, e.g. POST hosts/{id}/luns or DELETE hosts/{id}/luns/lun/{lun}.
+        The LUNs of a cluster are also LUNs of its hosts.
+        """
+        members = [host_or_cluster]
+        if collection == "clusters":
+            members += [self.collections["hosts"][host["id"]] for host in host_or_cluster["hosts"] if host["id"] in self.collections["hosts"]]
+
+        if method == "GET" and not lun_parts:
+            return get_response(host_or_cluster["luns"])
+        if method == "POST" and not lun_parts:
+            volume = self.collections["volumes"].get((body or {}).get("volume_id"))
+            if volume is None:
+                return self.error(404, "VOLUME_NOT_FOUND", "No such volume")
+            used_luns = {lun_info["lun"] for member in members for lun_info in member["luns"]}
+            lun = body.get("lun")
+            if lun is None:
+                lun = FIRST_LUN
+                while lun in used_luns:
+                    lun += 1
+            elif lun in used_luns:
+                return self.error(409, "LUN_EXISTS", f"LUN {lun} is already in use")
+            clustered = collection == "clusters"
+            lun_info = dict(
+                id=self.next_id, lun=lun, volume_id=volume["id"], clustered=clustered,
+                host_cluster_id=host_or_cluster["id"] if clustered else 0, host_id=0 if clustered else host_or_cluster["id"],
+            )
+            self.next_id += 1
+            for member in members:
+                member["luns"].append(dict(lun_info))
+            volume["mapped"] = True
+            return get_response(lun_info, status=201)
+        if method == "DELETE" and len(lun_parts) == 2 and lun_parts[0] in ("lun", "volume_id") and lun_parts[1].isdigit():
+            field, value = lun_parts[0], int(lun_parts[1])
+            removed = [lun_info for lun_info in host_or_cluster["luns"] if lun_info[field] == value]
+            if not removed:
+                return self.error(404, "LUN_NOT_FOUND", f"No LUN with {field} {value}")
+            for member in members:
+                member["luns"] = [lun_info for lun_info in member["luns"] if lun_info["volume_id"] != removed[0]["volume_id"]]
+            return get_response(removed[0])
+        return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} luns/{'/'.join(lun_parts)}")
+
+    def get_volume_luns(self, volume_id):
+        """ Return the LUNs a volume is mapped as, to hosts and clusters. Cluster LUNs are not repeated for each host of the cluster. """
+        return [
+            lun_info
+            for collection in ("hosts", "clusters")
+            for host_or_cluster in self.collections[collection].values()
+            for lun_info in host_or_cluster["luns"]
+            if lun_info["volume_id"] == volume_id and (collection == "clusters" or not lun_info["clustered"])
+        ]
+
+    def handle_host_ports(self, method, host, port_parts, body):
+        """ Add or remove a host port, i.e. POST hosts/{id}/ports or DELETE hosts/{id}/ports/{type}/{address} """
+        if method == "GET" and not port_parts:
+            return get_response(host["ports"])
+        if method == "POST" and not port_parts:
+            address = normalize_port_address(body["type"], body["address"])
+            if self.find_port_owner(address) is not None:
+                return self.error(409, "PORT_ALREADY_BELONGS_TO_HOST", f"Port {body['address']} already belongs to a host")
+            port = dict(type=body["type"], address=address, host_id=host["id"])
+            host["ports"].append(port)
+            return get_response(port, status=201)
+        if method == "DELETE" and len(port_parts) == 2:
+            address = normalize_port_address(port_parts[0], port_parts[1])
+            ports = [port for port in host["ports"] if normalize_port_address(port["type"], port["address"]) != address]
+            if len(ports) == len(host["ports"]):
+                return self.error(404, "PORT_NOT_FOUND", f"No port {port_parts[1]}")
+            host["ports"] = ports
+            return get_response(None)
+        return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} ports/{'/'.join(port_parts)}")
+
+    def find_port_owner(self, address):
+        """ Return the ID of the host having a port address, or None. address is normalized, as by normalize_port_address(). """
+        for host in self.collections["hosts"].values():
+            if any(normalize_port_address(port["type"], port["address"]) == address for port in host["ports"]):
+                return host["id"]
+        return None
+
+    def get_host_id_by_initiator_address(self, address):
+        """ Return the ID of the host having a port address """
+        host_id = self.find_port_owner(normalize_port_address(get_port_type(address), address))
+        if host_id is None:
+            return self.error(404, "HOST_NOT_FOUND", f"No host has port {address}")
+        return get_response(host_id)
+
+    def handle_cluster_hosts(self, method, cluster, host_parts, body):
+        """ Add or remove a cluster host, i.e. POST clusters/{id}/hosts or DELETE clusters/{id}/hosts/{host_id} """
+        if method == "GET" and not host_parts:
+            return get_response(cluster["hosts"])
+        if method == "POST":
+            host_id = (body or {}).get("id")
+        else:
+            host_id = int(host_parts[0]) if host_parts and host_parts[0].isdigit() else None
+        host = self.collections["hosts"].get(host_id)
+        if host is None:
+            return self.error(404, "HOST_NOT_FOUND", f"No host with ID {host_id}")
+        if method == "POST" and not host_parts:
+            cluster["hosts"].append(dict(id=host["id"], name=host["name"]))
+            host["host_cluster_id"] = cluster["id"]
+            host["luns"] = host["luns"] + [dict(lun_info) for lun_info in cluster["luns"]]
+            return get_response(dict(host), status=201)
+        if method == "DELETE" and len(host_parts) == 1:
+            cluster["hosts"] = [cluster_host for cluster_host in cluster["hosts"] if cluster_host["id"] != host_id]
+            host["host_cluster_id"] = 0
+            host["luns"] = [lun_info for lun_info in host["luns"] if not lun_info.get("clustered")]
+            return get_response(dict(host))
+        return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} hosts/{'/'.join(host_parts)}")
+
+    def handle_network_space_ips(self, method, network_space, ip_parts, body):
+        """
+        Add, remove, disable or enable a network space IP, i.e. POST network/spaces/{id}/ips,
+        DELETE network/spaces/{id}/ips/{ip} or POST network/spaces/{id}/ips/{ip}/disable
+        """
+        if method == "GET" and not ip_parts:
+            return get_response(network_space["ips"])
+        if method == "POST" and not ip_parts:
+            ip_address = body["ip_address"] if isinstance(body, dict) else body
+            if any(ip["ip_address"] == ip_address for ip in network_space["ips"]):
+                return self.error(409, "IP_ADDRESS_ALREADY_EXISTS", f"IP {ip_address} already exists")
+            ip = dict(ip_address=ip_address, enabled=True, type="MANAGEMENT" if not network_space["ips"] else "INTERFACE")
+            network_space["ips"].append(ip)
+            return get_response(ip, status=201)
+
+        ips = [ip for ip in network_space["ips"] if ip_parts and ip["ip_address"] == ip_parts[0]]
+        if not ips:
+            return self.error(404, "IP_ADDRESS_NOT_FOUND", f"No IP {'/'.join(ip_parts)}")
+        if method == "DELETE" and len(ip_parts) == 1:
+            if ips[0]["enabled"]:
+                return self.error(409, "IP_ADDRESS_ENABLED", f"IP {ip_parts[0]} must be disabled before it is deleted")
+            network_space["ips"].remove(ips[0])
+            return get_response(ips[0])
+        if method == "POST" and len(ip_parts) == 2 and ip_parts[1] in ("disable", "enable"):
+            ips[0]["enabled"] = ip_parts[1] == "enable"
+            return get_response(ips[0])
+        return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} ips/{'/'.join(ip_parts)}")
+
+    def handle_metadata(self, method, metadata_parts, query, body):
+        """
+        Handle metadata requests. Entries are kept in the metadata collection, so that GET metadata lists them all.
+        metadata/{object_id}, or metadata/system, lists or sets the entries of an object. metadata/{object_id}/{key} is one entry.
+        """
+        entries = self.collections["metadata"]
+        if not metadata_parts:
+            if method == "GET":
+                return self.list_objects(entries.values(), query)
+            return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} metadata")
+
+        if metadata_parts[0] == "system":
+            object_id, object_type = SYSTEM_ID, "system"
+        else:
+            object_id = int(metadata_parts[0]) if metadata_parts[0].isdigit() else None
+            object_type = self.get_metadata_object_type(object_id)
+        if object_type is None:
+            return self.error(404, "OBJECT_NOT_FOUND", f"No object with ID {metadata_parts[0]}")
+        object_entries = {entry["key"]: entry for entry in entries.values() if entry["object_id"] == object_id}
+
+        if len(metadata_parts) == 1 and method == "GET":
+            return self.list_objects(object_entries.values(), query)
+        if len(metadata_parts) == 1 and method == "PUT":
+            for key, value in (body or {}).items():
+                if key in object_entries:
+                    object_entries[key]["value"] = value
+                else:
+                    object_entries[key] = self._add_object("metadata", dict(object_id=object_id, object_type=object_type, key=key, value=value))
+            return get_response(list(object_entries.values()))
+        if len(metadata_parts) == 1 and method == "DELETE":
+            self.delete_object_metadata(object_id)
+            return get_response(list(object_entries.values()))
+        if len(metadata_parts) == 2 and metadata_parts[1] in object_entries and method in ("GET", "DELETE"):
+            entry = object_entries[metadata_parts[1]]
+            if method == "DELETE":
+                del entries[entry["id"]]
+            return get_response(entry)
+        if len(metadata_parts) == 2 and method in ("GET", "DELETE"):
+            return self.error(404, "METADATA_KEY_NOT_FOUND", f"No metadata key {metadata_parts[1]}")
+        return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} metadata/{'/'.join(metadata_parts)}")
+
+    def get_metadata_object_type(self, object_id):
+        """ Return the metadata object type of the object with object_id, or None if there is no such object """
+        for collection, object_type in METADATA_OBJECT_TYPES.items():
+            if object_id in self.collections[collection]:
+                return object_type
+        return None
+
+    def delete_object_metadata(self, object_id):
+        """ Delete the metadata entries of an object """
+        entries = self.collections["metadata"]
+        for entry_id in [entry["id"] for entry in entries.values() if entry["object_id"] == object_id]:
+            del entries[entry_id]
+
+    def handle_config(self, method, config_group, key, body):
+        """ Get or set a config value, i.e. config/{group}/{key} """
+        if method == "PUT":
+            self.config[(config_group, key)] = body
+        elif method != "GET":
+            return self.error(405, "METHOD_NOT_ALLOWED", f"Cannot {method} config/{config_group}/{key}")
+        if (config_group, key) not in self.config:
+            return self.error(404, "CONFIG_KEY_NOT_FOUND", f"No config key {config_group}/{key}")
+        return get_response(self.config[(config_group, key)])
+
+    @staticmethod
+    def get_fields(an_object, parameters):
+        """ Return an object limited to the fields= of a query, if any """
+        if not parameters.get("fields"):
+            return dict(an_object)
+        return {field: an_object.get(field) for field in parameters["fields"].split(",")}
+
+    @staticmethod
+    def error(status, code, message):
+        """ Return an HTTP status and an error response """
+        return status, dict(result=None, error=dict(code=code, message=message, is_remote=False), metadata=dict(ready=True))
+
+
+def populate(mock, volumes=0, filesystems=0, hosts=0, metadata=0):
+    """
+    Fill a mock with many objects, to measure how modules scale. Volumes and filesystems are created in a pool named
+    scale_pool, each host has an iSCSI port, and metadata entries are set on the volumes, or on the system if there are none.
+    Names are numbered, e.g. scale_vol_000001.
+    """
+    pool = mock.add_object("pools", name="scale_pool")
+    volume_ids = [mock.add_object("volumes", name=f"scale_vol_{index:06d}", pool_id=pool["id"])["id"] for index in range(volumes)]
+    for index in range(filesystems):
+        mock.add_object("filesystems", name=f"scale_fs_{index:06d}", pool_id=pool["id"])
+    for index in range(hosts):
+        address = f"iqn.2009-01.com.example:scale-host-{index:06d}"
+        mock.add_object("hosts", name=f"scale_host_{index:06d}", ports=[dict(type="ISCSI", address=address)])
+    for index in range(metadata):
+        object_id = volume_ids[index % len(volume_ids)] if volume_ids else SYSTEM_ID
+        object_type = "volume" if volume_ids else "system"
+        mock.add_object("metadata", object_id=object_id, object_type=object_type, key=f"scale_key_{index // max(len(volume_ids), 1):03d}", value=str(index))
+
+
+class MockInfiniboxRequestHandler(BaseHTTPRequestHandler):
+    """ Serve the REST API of the server's MockInfinibox """
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive, as a real Infinibox does
+
+    def handle_request(self, method):
+        """ Read a request, let the mock handle it and write its response """
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        if not url.path.startswith(API_PATH):
+            status, response = MockInfinibox.error(404, "NOT_FOUND", f"Not a REST API path: {url.path}")
+        else:
+            status, response = self.server.mock.handle(method, url.path, parse_qsl(url.query), body)
+
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """ Handle GET """
+        self.handle_request("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """ Handle POST """
+        self.handle_request("POST")
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """ Handle PUT """
+        self.handle_request("PUT")
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """ Handle DELETE """
+        self.handle_request("DELETE")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """ Do not log each request """
+
+
+def start_server(mock, host="127.0.0.1", port=0):
+    """ Serve mock in a background thread. Return the server. Its port is server.server_address[1]. """
+    server = ThreadingHTTPServer((host, port), MockInfiniboxRequestHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """ Main """
+    parser = argparse.ArgumentParser(description="Serve a mock Infinibox REST API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many random milliseconds added to each response")
+    parser.add_argument("--volumes", type=int, default=0, help="Number of volumes to create")
+    parser.add_argument("--filesystems", type=int, default=0, help="Number of filesystems to create")
+    parser.add_argument("--hosts", type=int, default=0, help="Number of hosts to create")
+    parser.add_argument("--metadata", type=int, default=0, help="Number of metadata entries to create")
+    args = parser.parse_args()
+
+    mock = MockInfinibox(latency=args.latency / 1000, jitter=args.jitter / 1000)
+    populate(mock, volumes=args.volumes, filesystems=args.filesystems, hosts=args.hosts, metadata=args.metadata)
+    server = start_server(mock, args.host, args.port)
+    print(f"Mock Infinibox listening on http://{args.host}:{server.server_address[1]}{API_PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=missing-function-docstring,wrong-import-position
+
+""" Unit tests of the infinibox action plugin """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.action.infinibox import (
+    is_controller_python,
+    is_in_process_enabled,
+    run_module_in_process,
+    task_environment,
+)
+
+
+def test_in_process_is_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('INFINIBOX_ACTION_IN_PROCESS', raising=False)
+    assert not is_in_process_enabled()
+    monkeypatch.setenv('INFINIBOX_ACTION_IN_PROCESS', 'true')
+    assert is_in_process_enabled()
+
+
+def test_is_controller_python():
+    assert is_controller_python(None)
+    assert is_controller_python('auto_silent')
+    assert is_controller_python(sys.executable)
+    assert not is_controller_python('/nonexistent/bin/python3')
+
+
+def test_task_environment_is_restored(monkeypatch):
+    monkeypatch.setenv('INFINIBOX_USER', 'admin')
+    monkeypatch.delenv('INFINIBOX_PASSWORD', raising=False)
+    with task_environment({'INFINIBOX_USER': 'operator', 'INFINIBOX_PASSWORD': 'secret'}):
+        assert os.environ['INFINIBOX_USER'] == 'operator'
+        assert os.environ['INFINIBOX_PASSWORD'] == 'secret'
+    assert os.environ['INFINIBOX_USER'] == 'admin'
+    assert 'INFINIBOX_PASSWORD' not in os.environ
+
+
+def test_run_module_in_process_returns_the_module_result():
+    # Argument validation fails before any Infinibox is contacted, but only once AnsibleModule has parsed the arguments
+    result = run_module_in_process('infini_pool', dict(name='pool1', state='unknown', system='ibox001', user='admin', password='secret'))
+    assert result['failed']
+    assert 'value of state must be one of' in result['msg']
+    assert 'exception' not in result
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of the infinibox callback plugin """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.callback.infinibox import (
+    get_empty_perf,
+    get_histogram_percentile,
+    get_perf_line,
+    merge_perf,
+)
+
+
+def get_perf(calls, total_ms, max_ms, histogram, requests):
+    return dict(
+        calls=calls,
+        errors=0,
+        bytes_sent=10 * calls,
+        bytes_received=100 * calls,
+        latency_ms=dict(total=total_ms, p50=0, p90=0, p99=0, max=max_ms),
+        latency_histogram_ms=histogram,
+        requests=requests,
+    )
+
+
+def test_merge_perf():
+    total = get_empty_perf()
+    merge_perf(total, get_perf(2, 3.5, 2.5, {'1': 1, '5': 1}, {'GET volumes/{id}': dict(calls=2, total_ms=3.5, max_ms=2.5)}))
+    merge_perf(total, get_perf(1, 30.2, 30.2, {'50': 1}, {'GET volumes/{id}': dict(calls=1, total_ms=30.2, max_ms=30.2)}))
+    assert total['calls'] == 3
+    assert total['bytes_sent'] == 30
+    assert total['bytes_received'] == 300
+    assert total['latency_ms'] == dict(total=33.7, max=30.2)
+    assert total['latency_histogram_ms'] == {'1': 1, '5': 1, '50': 1}
+    assert total['requests'] == {'GET volumes/{id}': dict(calls=3, total_ms=33.7, max_ms=30.2)}
+
+
+def test_merge_perf_without_calls():
+    total = get_empty_perf()
+    merge_perf(total, get_perf(0, 0, 0, {}, {}))
+    assert total == get_empty_perf()
+
+
+def test_get_histogram_percentile():
+    histogram = {'1': 50, '10': 40, '100': 9, 'inf': 1}
+    assert get_histogram_percentile(histogram, 50, 6000) == 1
+    assert get_histogram_percentile(histogram, 90, 6000) == 10
+    assert get_histogram_percentile(histogram, 99, 6000) == 100
+    assert get_histogram_percentile(histogram, 100, 6000) == 6000
+
+
+def test_get_histogram_percentile_is_capped_at_max():
+    assert get_histogram_percentile({'100': 3}, 50, 63.2) == 63.2
+
+
+def test_get_histogram_percentile_of_empty_histogram():
+    assert get_histogram_percentile({}, 50, 0) == 0
+
+
+def test_get_perf_line():
+    line = get_perf_line(get_perf(2, 3.5, 2.5, {'1': 1, '5': 1}, {}))
+    assert line.startswith("2 calls, 0 errors, 20 bytes sent, 200 bytes received, 3.5 ms, p50 <= 1 ms")
+    assert line.endswith("max 2.5 ms")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring
+
+""" Unit tests of the Infinidat utilities """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+from datetime import timedelta
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils import infinibox
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import (
+    RestCallStats,
+    get_latency_histogram,
+    get_percentile,
+    get_url_template,
+    is_perf_result_enabled,
+)
+
+
+class FakeModule:
+    """ Records fail_json() calls instead of exiting """
+
+    def __init__(self, params):
+        self.params = params
+        self.failures = []
+
+    def fail_json(self, **kwargs):
+        self.failures.append(kwargs)
+
+
+class FakeRequest:
+    def __init__(self, method, url, body=None):
+        self.method = method
+        self.url = url
+        self.body = body
+
+
+class FakeResponse:
+    def __init__(self, elapsed_ms, status_code=200, content=b''):
+        self.elapsed = timedelta(milliseconds=elapsed_ms)
+        self.status_code = status_code
+        self.content = content
+
+
+def test_get_system_catches_api_errors():
+    assert infinibox.get_system.__wrapped__
+    module = FakeModule(params={})  # No system parameter
+    infinibox.reset_module_run()
+    assert infinibox.get_system(module) is None
+    assert module.failures
+
+
+def test_is_perf_result_enabled(monkeypatch):
+    monkeypatch.delenv('INFINIBOX_PERF', raising=False)
+    assert is_perf_result_enabled() is False
+    monkeypatch.setenv('INFINIBOX_PERF', 'True')
+    assert is_perf_result_enabled() is True
+
+
+def test_get_url_template():
+    assert get_url_template("https://ibox/api/rest/volumes/1001?fields=name") == "volumes/{id}"
+    assert get_url_template("https://ibox/api/rest/metadata/1001/ansible_key") == "metadata/{id}/{key}"
+    assert get_url_template("https://ibox/api/rest/metadata/system/ansible_key") == "metadata/system/{key}"
+    assert get_url_template("https://ibox/api/rest/hosts/7/ports/fc/500143802426baf4") == "hosts/{id}/ports/{type}/{address}"
+    assert get_url_template("https://ibox/api/rest/network/spaces/3/ips/10.0.0.1/disable") == "network/spaces/{id}/ips/{ip}/disable"
+
+
+def test_get_percentile():
+    assert get_percentile([], 50) == 0
+    values = list(range(1, 101))
+    assert get_percentile(values, 50) == 50
+    assert get_percentile(values, 99) == 99
+    assert get_percentile(values, 100) == 100
+    assert get_percentile([7], 1) == 7
+
+
+def test_get_latency_histogram():
+    assert get_latency_histogram([0.5, 1, 1.5, 30, 9000]) == {'1': 2, '2': 1, '50': 1, 'inf': 1}
+
+
+def test_rest_call_stats_summary():
+    stats = RestCallStats()
+    stats.record(FakeRequest('GET', "https://ibox/api/rest/volumes/1"), FakeResponse(4, content=b'12345'))
+    stats.record(FakeRequest('GET', "https://ibox/api/rest/volumes/2"), FakeResponse(6, status_code=404))
+    stats.record(FakeRequest('POST', "https://ibox/api/rest/volumes", body='{"a": 1}'), FakeResponse(20))
+    summary = stats.get_summary()
+    assert summary['calls'] == 3
+    assert summary['errors'] == 1
+    assert summary['bytes_sent'] == 8
+    assert summary['bytes_received'] == 5
+    assert summary['latency_ms'] == dict(total=30.0, p50=6.0, p90=20.0, p99=20.0, max=20.0)
+    assert summary['latency_histogram_ms'] == {'5': 1, '10': 1, '20': 1}
+    assert summary['requests'] == {
+        'GET volumes/{id}': dict(calls=2, total_ms=10.0, max_ms=6.0),
+        'POST volumes': dict(calls=1, total_ms=20.0, max_ms=20.0),
+    }
+
+
+def test_empty_rest_call_stats_summary():
+    summary = RestCallStats().get_summary()
+    assert summary['calls'] == 0
+    assert summary['latency_ms']['max'] == 0
+    assert summary['requests'] == {}
+
+
+def test_reset_module_run_clears_caches():
+    infinibox.INFINIBOX_NAME_INDEXES['hosts'] = {}
+    infinibox.INFINIBOX_LUN_TABLES[('host', 1)] = None
+    infinibox.INFINIBOX_OBJECT_IDS[('vol', 'vol1')] = 1001
+    infinibox.reset_module_run()
+    assert not infinibox.INFINIBOX_NAME_INDEXES
+    assert not infinibox.INFINIBOX_LUN_TABLES
+    assert not infinibox.INFINIBOX_OBJECT_IDS
+
+
+def test_lun_table_find_free_lun():
+    lun_table = infinibox.LunTable([dict(lun=1, volume_id=1001), dict(lun='3', volume_id=1003)], reserved_luns=[2])
+    assert lun_table.find_free_lun() == 4
+    assert lun_table.get_lun_by_number(3)['volume_id'] == 1003
+    assert lun_table.remove(1001)['lun'] == 1
+    assert lun_table.find_free_lun() == 1
+
+
+def test_lun_tables_share_reserved_luns():
+    reserved_luns = {1}
+    cluster_table = infinibox.LunTable([dict(lun=1, volume_id=1001)], reserved_luns)
+    host_table = infinibox.LunTable([dict(lun=1, volume_id=1001)], reserved_luns)
+    cluster_table.reserved_luns.add(2)
+    assert host_table.find_free_lun() == 3
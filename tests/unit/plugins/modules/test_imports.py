@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=missing-function-docstring
+
+""" Check that modules import infinisdk and arrow only when a code path needs them """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import ast
+import os
+
+import pytest
+
+PLUGINS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'plugins')
+MODULE_FILES = sorted(
+    os.path.join(directory, file_name)
+    for directory in (os.path.join(PLUGINS_DIR, 'modules'), os.path.join(PLUGINS_DIR, 'module_utils'))
+    for file_name in os.listdir(directory)
+    if file_name.endswith('.py')
+)
+SLOW_MODULES = {'infinisdk', 'arrow', 'urllib3'}
+
+
+def get_module_level_imports(tree):
+    """ Yield the names of the modules imported outside of functions and classes """
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            yield node.module
+        else:
+            nodes.extend(ast.iter_child_nodes(node))
+
+
+@pytest.mark.parametrize('module_file', MODULE_FILES, ids=os.path.basename)
+def test_no_module_level_slow_imports(module_file):
+    with open(module_file, encoding='utf-8') as source:
+        tree = ast.parse(source.read())
+    slow_imports = [name for name in get_module_level_imports(tree) if name.split('.')[0] in SLOW_MODULES]
+    assert not slow_imports
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_cons_group's option checks and member additions """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_cons_group
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(name='cg1', volumes=[], filesystems=[], snapshot_group=None, snapshot_lock_expires_at=None, state='present'),
+            **params
+        )
+        self.check_mode = False
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    def get_result(self):
+        return self.result
+
+    def get_metadata(self):
+        return dict(pages_total=1)
+
+
+class FakeApi:
+    """ Serve GET requests from a dict of results keyed by path prefix and record POST requests """
+
+    def __init__(self, results):
+        self.results = results
+        self.posts = []
+
+    def get(self, path):
+        for prefix, result in self.results.items():
+            if path.startswith(prefix):
+                return FakeResponse(result)
+        return FakeResponse([])
+
+    def post(self, path, data):
+        self.posts.append((path, data))
+
+
+class FakeSystem:
+    def __init__(self, results):
+        self.api = FakeApi(results)
+
+
+class FakeConsGroup:
+    id = 3001
+
+
+def test_restore_requires_snapshot_group():
+    with pytest.raises(AssertionError, match="snapshot_group is required"):
+        infini_cons_group.check_options(FakeModule(state='restore'))
+
+
+def test_snapshot_lock_requires_snapshot_group():
+    with pytest.raises(AssertionError, match="snapshot_group is required"):
+        infini_cons_group.check_options(FakeModule(snapshot_lock_expires_at='2025-01-01 00:00:00'))
+
+
+def test_add_members_adds_only_new_members():
+    system = FakeSystem({
+        'cgs/3001/members': [dict(id=1001, name='vol1', dataset_type='VOLUME')],
+        'volumes?name=in:': [dict(id=1001, name='vol1'), dict(id=1002, name='vol2')],
+        'filesystems?name=in:': [dict(id=2001, name='fs1')],
+    })
+    module = FakeModule(volumes=['vol1', 'vol2'], filesystems=['fs1'])
+    assert infini_cons_group.add_members(module, system, FakeConsGroup()) == ['vol2', 'fs1']
+    assert system.api.posts == [
+        ('cgs/3001/members', dict(dataset_id=1002)),
+        ('cgs/3001/members', dict(dataset_id=2001)),
+    ]
+
+
+def test_add_members_fails_for_missing_datasets():
+    system = FakeSystem({'volumes?name=in:': [dict(id=1001, name='vol1')]})
+    module = FakeModule(volumes=['vol1', 'vol9'])
+    with pytest.raises(AssertionError, match=r"\['vol9'\]"):
+        infini_cons_group.add_members(module, system, FakeConsGroup())
+    assert not system.api.posts
+
+
+def test_add_members_in_check_mode_does_not_post():
+    system = FakeSystem({'volumes?name=in:': [dict(id=1001, name='vol1')]})
+    module = FakeModule(volumes=['vol1'])
+    module.check_mode = True
+    assert infini_cons_group.add_members(module, system, FakeConsGroup()) == ['vol1']
+    assert not system.api.posts
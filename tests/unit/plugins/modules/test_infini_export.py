@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_export's export listing """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_export
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(name=None, filesystem=None, fields=['export_path', 'permissions'], output_file=None, state='stat'),
+            **params
+        )
+        self.check_mode = False
+        self.result = None
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+        raise SystemExit(0)
+
+    @staticmethod
+    def atomic_move(src, dest):
+        os.replace(src, dest)
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    def get_result(self):
+        return self.result
+
+    def get_metadata(self):
+        return dict(pages_total=1)
+
+
+class FakeApi:
+    """ Serve GET requests from a dict of results keyed by path prefix and record the paths requested """
+
+    def __init__(self, results):
+        self.results = results
+        self.paths = []
+
+    def get(self, path):
+        self.paths.append(path)
+        for prefix, result in self.results.items():
+            if path.startswith(prefix):
+                return FakeResponse(result)
+        return FakeResponse([])
+
+
+class FakeSystem:
+    def __init__(self, results):
+        self.api = FakeApi(results)
+
+
+def get_system_with_exports():
+    return FakeSystem({
+        'filesystems?name=in:': [dict(id=2001, name='fs1')],
+        'exports?': [
+            dict(id=1, export_path='/fs1', permissions=[dict(client='*', access='RW')], filesystem_id=2001),
+            dict(id=2, export_path='/fs1_ro', permissions=[], filesystem_id=2001),
+        ],
+    })
+
+
+def test_get_export_list_fields_includes_the_id():
+    assert infini_export.get_export_list_fields(FakeModule(fields=['permissions'])) == ['id', 'permissions']
+
+
+def test_get_exports_url():
+    system = get_system_with_exports()
+    assert infini_export.get_exports_url(FakeModule(), system) == 'exports?fields=export_path,id,permissions'
+    assert infini_export.get_exports_url(FakeModule(filesystem='fs1'), system) == 'exports?fields=export_path,id,permissions&filesystem_id=2001'
+
+
+def test_get_exports_url_fails_for_a_missing_filesystem():
+    with pytest.raises(AssertionError, match='fs9 not found'):
+        infini_export.get_exports_url(FakeModule(filesystem='fs9'), get_system_with_exports())
+
+
+def test_iter_exports_keeps_only_the_requested_fields():
+    module = FakeModule(fields=['export_path'])
+    exports = list(infini_export.iter_exports(module, get_system_with_exports(), 'exports?fields=export_path,id'))
+    assert exports == [dict(id=1, export_path='/fs1'), dict(id=2, export_path='/fs1_ro')]
+
+
+def test_handle_stat_all_returns_the_exports(monkeypatch):
+    monkeypatch.setattr(infini_export, 'get_system', lambda module: get_system_with_exports())
+    module = FakeModule()
+    with pytest.raises(SystemExit):
+        infini_export.handle_stat_all(module)
+    assert module.result['count'] == 2
+    assert [export['export_path'] for export in module.result['exports']] == ['/fs1', '/fs1_ro']
+
+
+def test_handle_stat_all_writes_exports_as_json_lines(monkeypatch, tmp_path):
+    monkeypatch.setattr(infini_export, 'get_system', lambda module: get_system_with_exports())
+    output_file = tmp_path / 'exports.json'
+    module = FakeModule(output_file=str(output_file))
+    with pytest.raises(SystemExit):
+        infini_export.handle_stat_all(module)
+    assert module.result['count'] == 2
+    assert 'exports' not in module.result
+    assert [json.loads(line)['id'] for line in output_file.read_text().splitlines()] == [1, 2]
+    assert os.listdir(str(tmp_path)) == ['exports.json']
+
+
+@pytest.mark.parametrize('params', [
+    dict(state='present', name='/fs1', filesystem='fs1', output_file='exports.json'),
+    dict(state='stat', name='/fs1', output_file='exports.json'),
+])
+def test_check_options_rejects_output_file_unless_listing(params):
+    with pytest.raises(AssertionError, match='output_file'):
+        infini_export.check_options(FakeModule(**params))
+
+
+class FailingApi(FakeApi):
+    """ Serve the first page of exports, then fail """
+
+    def get(self, path):
+        if path.endswith('page=2&page_size=1000'):
+            raise RuntimeError('Connection reset')
+        response = super().get(path)
+        response.get_metadata = lambda: dict(pages_total=2)
+        return response
+
+
+@pytest.mark.parametrize('output', [False, True])
+def test_handle_stat_all_fails_on_api_errors(monkeypatch, tmp_path, output):
+    system = get_system_with_exports()
+    system.api = FailingApi(system.api.results)
+    monkeypatch.setattr(infini_export, 'get_system', lambda module: system)
+    module = FakeModule(output_file=str(tmp_path / 'exports.json') if output else None)
+    with pytest.raises(AssertionError, match='Connection reset'):
+        infini_export.handle_stat_all(module)
+    assert not os.listdir(str(tmp_path))
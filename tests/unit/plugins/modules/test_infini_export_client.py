@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_export_client's permission updates """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_export_client
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(export='/export1', state='present', purge_clients=False, retries=5, client=None, clients=None, access_mode='RW', no_root_squash=False),
+            **params
+        )
+        self.check_mode = False
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeExport:
+    """ An export whose permissions another task replaces right after the first write """
+
+    def __init__(self, permissions, concurrent_permissions=None):
+        self.permissions = permissions
+        self.concurrent_permissions = concurrent_permissions
+        self.writes = 0
+
+    def get_permissions(self):
+        return [dict(permission) for permission in self.permissions]
+
+    def update_permissions(self, permissions):
+        self.writes += 1
+        self.permissions = permissions
+        if self.concurrent_permissions is not None:
+            self.permissions, self.concurrent_permissions = self.concurrent_permissions, None
+
+
+def get_permission(client, access='RW'):
+    return dict(client=client, access=access, no_root_squash=False)
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    monkeypatch.setattr(infini_export_client, 'VERIFY_DELAY_MAX', 0)
+    monkeypatch.setattr(infini_export_client, 'wait_before_retry', lambda attempt: None)
+
+
+def test_get_desired_clients_of_the_client_option():
+    module = FakeModule(client='10.0.0.1', access_mode='RO', no_root_squash=True)
+    assert infini_export_client.get_desired_clients(module) == {'10.0.0.1': dict(client='10.0.0.1', access='RO', no_root_squash=True)}
+
+
+def test_get_desired_clients_keeps_the_last_duplicate():
+    module = FakeModule(clients=[
+        dict(client='10.0.0.1', access_mode='RW', no_root_squash=False),
+        dict(client='10.0.0.1', access_mode='RO', no_root_squash=False),
+    ])
+    assert infini_export_client.get_desired_clients(module) == {'10.0.0.1': get_permission('10.0.0.1', 'RO')}
+
+
+def test_get_new_permissions_adds_and_updates_clients():
+    module = FakeModule(clients=[
+        dict(client='10.0.0.1', access_mode='RO', no_root_squash=False),
+        dict(client='10.0.0.3', access_mode='RW', no_root_squash=True),
+    ])
+    permissions = [get_permission('10.0.0.1'), get_permission('10.0.0.2')]
+    assert infini_export_client.get_new_permissions(module, permissions) == [
+        get_permission('10.0.0.1', 'RO'),
+        get_permission('10.0.0.2'),
+        dict(client='10.0.0.3', access='RW', no_root_squash=True),
+    ]
+
+
+def test_get_new_permissions_removes_absent_clients():
+    module = FakeModule(state='absent', clients=[dict(client='10.0.0.1', access_mode='RW', no_root_squash=False)])
+    permissions = [get_permission('10.0.0.1'), get_permission('10.0.0.2')]
+    assert infini_export_client.get_new_permissions(module, permissions) == [get_permission('10.0.0.2')]
+
+
+def test_get_new_permissions_purges_other_clients():
+    module = FakeModule(purge_clients=True, clients=[dict(client='10.0.0.2', access_mode='RW', no_root_squash=False)])
+    permissions = [get_permission('10.0.0.1'), get_permission('10.0.0.2', 'RO')]
+    assert infini_export_client.get_new_permissions(module, permissions) == [get_permission('10.0.0.2')]
+
+
+@pytest.mark.parametrize("params", [
+    dict(),
+    dict(client='10.0.0.1', clients=[]),
+    dict(purge_clients=True, client='10.0.0.1'),
+    dict(purge_clients=True, clients=[], state='absent'),
+])
+def test_check_options_rejects_invalid_client_options(params):
+    module = FakeModule()
+    module.params.update(params)
+    with pytest.raises(AssertionError):
+        infini_export_client.check_options(module)
+
+
+def test_is_same_permissions_ignores_extra_fields():
+    permissions = [get_permission('10.0.0.1')]
+    assert infini_export_client.is_same_permissions([dict(permissions[0], id=7)], permissions)
+    assert not infini_export_client.is_same_permissions([get_permission('10.0.0.1', 'RO')], permissions)
+
+
+def test_is_same_permissions_ignores_order():
+    permissions = [get_permission('10.0.0.1'), get_permission('10.0.0.2')]
+    assert infini_export_client.is_same_permissions(list(reversed(permissions)), permissions)
+
+
+def test_update_clients_retries_when_overwritten():
+    pytest.importorskip('munch')
+    module = FakeModule(clients=[dict(client='10.0.0.1', access_mode='RW', no_root_squash=False)])
+    export = FakeExport([], concurrent_permissions=[get_permission('10.0.0.2')])  # Written by a task that read []
+    changed, permissions = infini_export_client.update_clients(module, export)
+    assert changed
+    assert export.writes == 2
+    assert permissions == [get_permission('10.0.0.2'), get_permission('10.0.0.1')]
+
+
+def test_update_clients_without_changes_does_not_write():
+    pytest.importorskip('munch')
+    module = FakeModule(clients=[dict(client='10.0.0.1', access_mode='RW', no_root_squash=False)])
+    export = FakeExport([get_permission('10.0.0.1')])
+    assert infini_export_client.update_clients(module, export) == (False, [get_permission('10.0.0.1')])
+    assert export.writes == 0
+
+
+def test_update_clients_keeps_clients_written_during_the_backoff(monkeypatch):
+    pytest.importorskip('munch')
+    module = FakeModule(clients=[dict(client='10.0.0.1', access_mode='RW', no_root_squash=False)])
+    export = FakeExport([], concurrent_permissions=[get_permission('10.0.0.2')])
+
+    def write_during_backoff(attempt):
+        export.permissions = export.permissions + [get_permission('10.0.0.3')]
+    monkeypatch.setattr(infini_export_client, 'wait_before_retry', write_during_backoff)
+
+    changed, permissions = infini_export_client.update_clients(module, export)
+    assert changed
+    assert permissions == [get_permission('10.0.0.2'), get_permission('10.0.0.3'), get_permission('10.0.0.1')]
+    assert export.permissions == permissions
+
+
+def test_update_clients_accepts_permissions_read_back_in_another_order():
+    pytest.importorskip('munch')
+    module = FakeModule(clients=[dict(client='10.0.0.1', access_mode='RW', no_root_squash=False)])
+    export = FakeExport([get_permission('10.0.0.2')])
+    export.get_permissions = lambda: list(reversed(export.permissions))
+    changed, permissions = infini_export_client.update_clients(module, export)
+    assert changed
+    assert export.writes == 1
+    assert infini_export_client.is_same_permissions(permissions, [get_permission('10.0.0.1'), get_permission('10.0.0.2')])
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_maps' LUN allocation """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.module_utils.infinibox import LunTable
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_maps
+
+
+class FakeModule:
+    def __init__(self):
+        self.params = dict(state='present')
+        self.check_mode = True  # map_volume() returns the LUN it would map
+
+
+def get_mapping(volume, host=None, cluster=None, lun=None):
+    return dict(volume=volume, host=host, cluster=cluster, lun=lun, state=None)
+
+
+def test_cluster_and_member_host_do_not_share_luns():
+    reserved_luns = {1}  # The LUNs of cluster1 and its host host1, as loaded by load_lun_tables()
+    cluster_table = LunTable([dict(lun=1, volume_id=1001)], reserved_luns)
+    host_table = LunTable([dict(lun=1, volume_id=1001)], reserved_luns)
+    module = FakeModule()
+
+    cluster_result = infini_maps.plan_and_apply_mapping(module, None, get_mapping('vol2', cluster='cluster1'), dict(id=1002), cluster_table, 1)
+    host_result = infini_maps.plan_and_apply_mapping(module, None, get_mapping('vol3', host='host1'), dict(id=1003), host_table, 2)
+    assert cluster_result['lun'] == 2
+    assert host_result['lun'] == 3
+
+
+def test_desired_lun_used_by_cluster_fails_for_member_host():
+    reserved_luns = set()
+    cluster_table = LunTable([], reserved_luns)
+    host_table = LunTable([], reserved_luns)
+    module = FakeModule()
+
+    infini_maps.plan_and_apply_mapping(module, None, get_mapping('vol1', cluster='cluster1', lun=5), dict(id=1001), cluster_table, 1)
+    result = infini_maps.plan_and_apply_mapping(module, None, get_mapping('vol2', host='host1', lun=5), dict(id=1002), host_table, 2)
+    assert result['failed']
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_metadata's bulk metadata helpers """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_metadata
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(object_type="vol", object_name=None, key=None, value=None, metadata=None, pool_name=None, state="present"),
+            **params
+        )
+        self.check_mode = False
+        self.result = None
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    def get_result(self):
+        return self.result
+
+    def get_metadata(self):
+        return dict(pages_total=1)
+
+
+class FakeApi:
+    """ Serve GET requests from a dict of results keyed by path prefix and record the paths requested and PUT requests """
+
+    def __init__(self, results):
+        self.results = results
+        self.paths = []
+        self.puts = []
+
+    def get(self, path):
+        self.paths.append(path)
+        for prefix, result in self.results.items():
+            if path.startswith(prefix):
+                return FakeResponse(result)
+        return FakeResponse([])
+
+    def put(self, path, data):
+        self.puts.append((path, data))
+
+
+class FakeSystem:
+    def __init__(self, results):
+        self.api = FakeApi(results)
+
+
+def get_system_with_volumes():
+    return FakeSystem({
+        "volumes?name=in:": [
+            dict(id=1001, name="vol1", type="MASTER"),
+            dict(id=1002, name="vol2", type="MASTER"),
+            dict(id=1003, name="snap1", type="SNAPSHOT"),
+        ],
+        "metadata?object_id=in:": [
+            dict(object_id=1001, key="owner", value="dba"),
+            dict(object_id=1001, key="replicas", value="3"),
+            dict(object_id=1001, key="backup", value="True"),
+            dict(object_id=1002, key="owner", value="web"),
+            dict(object_id=1002, key="tier", value="gold"),
+        ],
+    })
+
+
+def test_is_bulk():
+    assert infini_metadata.is_bulk(FakeModule(metadata=dict(vol1=dict(owner="dba"))))
+    assert infini_metadata.is_bulk(FakeModule(state="stat"))
+    assert not infini_metadata.is_bulk(FakeModule(state="stat", object_name="vol1", key="owner"))
+    assert not infini_metadata.is_bulk(FakeModule(state="stat", object_type="system"))
+
+
+@pytest.mark.parametrize("params, msg", [
+    (dict(object_type="system", metadata=dict(ibox=dict(owner="it"))), "not supported for object_type system"),
+    (dict(metadata=dict(vol1=dict(owner="dba")), key="owner"), "mutually exclusive"),
+    (dict(state="stat", object_type="host", pool_name="pool1"), "not supported for object_type host"),
+    (dict(metadata=dict(vol1="dba")), "must be a dict"),
+])
+def test_check_bulk_options(params, msg):
+    with pytest.raises(AssertionError, match=msg):
+        infini_metadata.check_bulk_options(FakeModule(**params))
+
+
+def test_get_object_ids_skips_other_dataset_types():
+    module = FakeModule()
+    object_ids = infini_metadata.get_object_ids(module, get_system_with_volumes(), ["vol1", "vol2", "snap1"])
+    assert object_ids == dict(vol1=1001, vol2=1002)
+
+
+def test_get_objects_metadata():
+    module = FakeModule()
+    objects_metadata = infini_metadata.get_objects_metadata(module, get_system_with_volumes(), [1001, 1002, 1004])
+    assert objects_metadata == {
+        1001: dict(owner="dba", replicas="3", backup="True"),
+        1002: dict(owner="web", tier="gold"),
+        1004: {},
+    }
+
+
+def test_handle_bulk_present_writes_only_keys_that_differ(monkeypatch):
+    system = get_system_with_volumes()
+    monkeypatch.setattr(infini_metadata, "get_system", lambda module: system)
+    module = FakeModule(metadata=dict(vol1=dict(owner="dba"), vol2=dict(owner="dba", tier="gold")))
+    infini_metadata.handle_bulk_present(module)
+    assert system.api.puts == [("metadata/1002", dict(owner="dba"))]
+    assert module.result["changed"]
+    assert module.result["objects"] == [
+        dict(object_name="vol1", changed=False),
+        dict(object_name="vol2", changed=True, keys=["owner"]),
+    ]
+
+
+def test_handle_bulk_present_fails_for_missing_objects(monkeypatch):
+    system = get_system_with_volumes()
+    monkeypatch.setattr(infini_metadata, "get_system", lambda module: system)
+    module = FakeModule(metadata=dict(vol1=dict(owner="dba"), vol9=dict(owner="dba")))
+    with pytest.raises(AssertionError, match=r"\['vol9'\] not found"):
+        infini_metadata.handle_bulk_present(module)
+    assert not system.api.puts
+
+
+def test_handle_bulk_present_compares_values_as_strings(monkeypatch):
+    system = get_system_with_volumes()
+    monkeypatch.setattr(infini_metadata, "get_system", lambda module: system)
+    module = FakeModule(metadata=dict(vol1=dict(replicas=3, backup=True), vol2=dict(replicas=2)))
+    infini_metadata.handle_bulk_present(module)
+    assert system.api.puts == [("metadata/1002", dict(replicas="2"))]
+    assert module.result["objects"][0] == dict(object_name="vol1", changed=False)
+
+
+def test_get_all_object_ids_quotes_the_pool_name():
+    system = get_system_with_volumes()
+    module = FakeModule(state="stat", pool_name="pool 1&x")
+    infini_metadata.get_all_object_ids(module, system)
+    assert system.api.paths == ["volumes?fields=id,name&type=MASTER&pool_name=pool%201%26x&page=1&page_size=1000"]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_network_space's field diff """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_network_space
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(
+                name="space1", interfaces=[], mtu=None, rate_limit=None, async_only=False,
+                netmask=None, network=None, default_gateway=None, ips=[], workers=2,
+            ),
+            **params
+        )
+        self.check_mode = False
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeApi:
+    def __init__(self):
+        self.puts = []
+
+    def put(self, path, data):
+        self.puts.append((path, data))
+
+
+class FakeSystem:
+    def __init__(self):
+        self.api = FakeApi()
+
+
+class FakeNetworkSpace:
+    def __init__(self, fields):
+        self.fields = fields
+
+    def get_fields(self, from_cache=False, raw_value=False):
+        return self.fields
+
+
+def get_fields(**fields):
+    return dict(
+        dict(
+            id=5, interfaces=[3, 1], mtu=1500, rate_limit=None, properties=dict(is_async_only=False, is_nfs_v4=True),
+            network_config=dict(netmask=24, network="10.0.0.0", default_gateway="10.0.0.1"), ips=[],
+        ),
+        **fields
+    )
+
+
+def test_get_desired_network_space_fields_skips_options_not_provided():
+    module = FakeModule(netmask=19)
+    assert infini_network_space.get_desired_network_space_fields(module) == dict(
+        network_config=dict(netmask=19),
+        properties=dict(is_async_only=False),
+    )
+
+
+def test_get_network_space_changes_without_changes():
+    module = FakeModule(interfaces=[1, 3], mtu=1500, netmask=24)
+    assert not infini_network_space.get_network_space_changes(module, get_fields())
+
+
+def test_get_network_space_changes_reports_fields_that_differ():
+    module = FakeModule(interfaces=[1, 2], mtu=9000, network="10.0.0.0", default_gateway="10.0.0.254", async_only=True)
+    assert infini_network_space.get_network_space_changes(module, get_fields()) == dict(
+        interfaces=dict(before=[3, 1], after=[1, 2]),
+        mtu=dict(before=1500, after=9000),
+        network_config=dict(
+            before=dict(network="10.0.0.0", default_gateway="10.0.0.1"),
+            after=dict(network="10.0.0.0", default_gateway="10.0.0.254"),
+        ),
+        properties=dict(before=dict(is_async_only=False), after=dict(is_async_only=True)),
+    )
+
+
+def test_update_network_space_puts_each_change_with_the_complete_network_config():
+    pytest.importorskip('infinisdk')
+    module = FakeModule(mtu=9000, default_gateway="10.0.0.254")
+    system = FakeSystem()
+    changed, changes, ip_results = infini_network_space.update_network_space(module, system, FakeNetworkSpace(get_fields()))
+    assert changed
+    assert sorted(changes) == ["mtu", "network_config"]
+    assert not ip_results
+    assert system.api.puts == [
+        ("network/spaces/5", dict(mtu=9000)),
+        ("network/spaces/5", dict(network_config=dict(netmask=24, network="10.0.0.0", default_gateway="10.0.0.254"))),
+    ]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_port's address normalization and port reconciliation """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_port
+
+
+class FakeModule:
+    def __init__(self, check_mode=False):
+        self.params = dict(host="host1", wwns=[], iqns=[])
+        self.check_mode = check_mode
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeHost:
+    id = 1
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+
+    def add_port(self, port):
+        self.added.append(port)
+
+    def remove_port(self, port):
+        self.removed.append(port)
+
+
+class FakeHostBinder:
+    """ Look up the owner of a port address in host results, recording the addresses looked up """
+
+    def __init__(self, host_results):
+        self.host_results = host_results
+        self.lookups = []
+
+    def get_host_id_by_initiator_address(self, address):
+        self.lookups.append(address)
+        port_owners = infini_port.get_port_owners(self.host_results)
+        return port_owners.get(infini_port.normalize_port_address("ISCSI" if address.startswith("iqn.") else "FC", address))
+
+
+class FakeSystem:
+    def __init__(self, host_results, requested_ports):
+        self.hosts = FakeHostBinder(host_results)
+        self.requested_ports = requested_ports
+
+
+@pytest.fixture(name="system")
+def fixture_system(monkeypatch):
+    """ Request two ports, one of which host1 already has, and give host2 a third port """
+    requested_ports = {"21000024ff3de10a": "21:00:00:24:ff:3d:e1:0a", "iqn.1993-08.org.debian:01:abc": "iqn.1993-08.org.debian:01:abc"}
+    host_results = [
+        dict(id=1, ports=[get_port("FC", "21:00:00:24:FF:3D:E1:0A")]),
+        dict(id=2, ports=[get_port("FC", "21000024ff3de10b")]),
+    ]
+
+    def get_hosts_ports(module, system, host_name=None):
+        return [host_result for host_result in host_results if not host_name or host_result["id"] == 1]
+
+    monkeypatch.setattr(infini_port, "get_requested_ports", lambda module: dict(requested_ports))
+    monkeypatch.setattr(infini_port, "get_hosts_ports", get_hosts_ports)
+    return FakeSystem(host_results, requested_ports)
+
+
+def get_port(port_type, address):
+    return dict(type=port_type, address=address)
+
+
+def get_initiator(*node_ids):
+    return dict(targets=[dict(node_id=node_id) for node_id in node_ids])
+
+
+def test_normalize_port_address():
+    assert infini_port.normalize_port_address("fc", "21:00:00:24:FF:3D:E1:0A") == "21000024ff3de10a"
+    assert infini_port.normalize_port_address("ISCSI", "iqn.1993-08.org.Debian:01:abc") == "iqn.1993-08.org.debian:01:abc"
+
+
+def test_get_long_address():
+    assert infini_port.get_long_address("21000024FF3DE10A") == "21:00:00:24:ff:3d:e1:0a"
+
+
+def test_get_port_owners():
+    host_results = [
+        dict(id=1, ports=[get_port("FC", "21:00:00:24:ff:3d:e1:0a")]),
+        dict(id=2, ports=[get_port("ISCSI", "IQN.1993-08.org.debian:01:abc")]),
+    ]
+    assert infini_port.get_port_owners(host_results) == {
+        "21000024ff3de10a": 1,
+        "iqn.1993-08.org.debian:01:abc": 2,
+    }
+
+
+def test_get_host_connectivity():
+    assert infini_port.get_host_connectivity([]) == "DISCONNECTED"
+    assert infini_port.get_host_connectivity([dict(connectivity="CONNECTED")] * 2) == "CONNECTED"
+    assert infini_port.get_host_connectivity([dict(connectivity="CONNECTED"), dict(connectivity="DISCONNECTED")]) == "DEGRADED"
+
+
+def test_get_port_fields_matches_initiators_by_address():
+    host_result = dict(ports=[
+        get_port("FC", "21000024FF3DE10A"),
+        get_port("ISCSI", "iqn.1993-08.org.debian:01:abc"),
+        get_port("NVME", "nqn.2014-08.org.nvmexpress:uuid:1"),
+    ])
+    host_initiators = {
+        "21000024ff3de10a": get_initiator(1, 2, 3, 3),
+        "iqn.1993-08.org.debian:01:abc": get_initiator(1),
+    }
+    fields = infini_port.get_port_fields(host_result, host_initiators)
+    assert [(port["type"], port["address"], port["connectivity"]) for port in fields["ports"]] == [
+        ("FC", "21:00:00:24:ff:3d:e1:0a", "CONNECTED"),
+        ("ISCSI", "iqn.1993-08.org.debian:01:abc", "DEGRADED"),
+    ]
+    assert fields["connectivity"] == "DEGRADED"
+
+
+def test_update_ports_adds_only_missing_ports(system):
+    host = FakeHost()
+    assert infini_port.update_ports(FakeModule(), system, host)
+    assert host.added == [system.requested_ports["iqn.1993-08.org.debian:01:abc"]]
+
+
+def test_update_ports_looks_up_only_the_requested_ports(system):
+    infini_port.update_ports(FakeModule(), system, FakeHost())
+    assert sorted(system.hosts.lookups) == sorted(system.requested_ports.values())
+
+
+def test_update_ports_fails_for_ports_of_other_hosts(system):
+    system.requested_ports["21000024ff3de10b"] = "21:00:00:24:ff:3d:e1:0b"
+    host = FakeHost()
+    with pytest.raises(AssertionError, match="belong to other hosts"):
+        infini_port.update_ports(FakeModule(), system, host)
+    assert not host.added
+
+
+def test_update_ports_in_check_mode_does_not_add(system):
+    host = FakeHost()
+    assert infini_port.update_ports(FakeModule(check_mode=True), system, host)
+    assert not host.added
+
+
+def test_update_ports_without_missing_ports_is_unchanged(system):
+    del system.requested_ports["iqn.1993-08.org.debian:01:abc"]
+    assert not infini_port.update_ports(FakeModule(), system, FakeHost())
+
+
+def test_delete_ports_removes_only_ports_of_the_host(system):
+    host = FakeHost()
+    assert infini_port.delete_ports(FakeModule(), system, host)
+    assert host.removed == [system.requested_ports["21000024ff3de10a"]]
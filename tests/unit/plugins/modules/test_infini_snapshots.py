@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_snapshots' name templating and snapshot checks """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_snapshots
+
+
+class FakeModule:
+    def __init__(self, **params):
+        self.params = dict(
+            dict(
+                volumes=[], filesystems=[], name_template="{parent}_snap_{timestamp}", timestamp_format="%Y",
+                write_protected=True, snapshot_lock_expires_at=None, workers=2, max_in_flight=None, state="stat",
+            ),
+            **params
+        )
+        self.check_mode = True
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs['msg'])
+
+
+def test_get_snapshot_specs():
+    module = FakeModule(volumes=["vol1"], filesystems=["fs1"], name_template="{type}-{parent}-daily", timestamp_format="fixed")
+    assert infini_snapshots.get_snapshot_specs(module) == [
+        dict(parent="vol1", type="volume", name="volume-vol1-daily"),
+        dict(parent="fs1", type="filesystem", name="filesystem-fs1-daily"),
+    ]
+
+
+def test_get_snapshot_specs_timestamp():
+    module = FakeModule(volumes=["vol1"], timestamp_format="ts")
+    assert infini_snapshots.get_snapshot_specs(module)[0]["name"] == "vol1_snap_ts"
+
+
+def test_check_options_rejects_duplicate_names():
+    module = FakeModule(volumes=["vol1", "vol2"], name_template="snap_{timestamp}")
+    with pytest.raises(AssertionError, match="duplicates"):
+        infini_snapshots.check_options(module)
+
+
+def test_check_options_allows_same_name_for_volume_and_filesystem():
+    module = FakeModule(volumes=["data"], filesystems=["data"])
+    infini_snapshots.check_options(module)
+
+
+def test_check_options_rejects_unknown_template_fields():
+    module = FakeModule(volumes=["vol1"], name_template="{parent}_{pool}")
+    with pytest.raises(AssertionError, match="Invalid name_template"):
+        infini_snapshots.check_options(module)
+
+
+def test_existing_object_that_is_not_a_snapshot_of_the_parent_fails():
+    pytest.importorskip('infinisdk')
+    module = FakeModule(volumes=["vol1"])
+    snapshot_spec = dict(parent="vol1", type="volume", name="vol1_snap")
+    parents = {("volume", "vol1"): dict(id=1001, type="MASTER")}
+    snapshots = {("volume", "vol1_snap"): dict(id=1002, type="MASTER", parent_id=0, write_protected=True, lock_state="UNLOCKED")}
+    result = infini_snapshots.SnapshotWorker(module, None, parents, snapshots).run(snapshot_spec)
+    assert result["failed"]
+    assert not result["changed"]
+
+
+def test_existing_snapshot_is_updated():
+    pytest.importorskip('infinisdk')
+    module = FakeModule(volumes=["vol1"])
+    snapshot_spec = dict(parent="vol1", type="volume", name="vol1_snap")
+    parents = {("volume", "vol1"): dict(id=1001, type="MASTER")}
+    snapshots = {("volume", "vol1_snap"): dict(id=1002, type="SNAPSHOT", parent_id=1001, write_protected=False, lock_state="UNLOCKED")}
+    result = infini_snapshots.SnapshotWorker(module, None, parents, snapshots).run(snapshot_spec)
+    assert result["changed"]
+    assert result["action"] == "updated"
+
+
+def test_missing_snapshot_is_created():
+    pytest.importorskip('infinisdk')
+    module = FakeModule(volumes=["vol1"])
+    snapshot_spec = dict(parent="vol1", type="volume", name="vol1_snap")
+    parents = {("volume", "vol1"): dict(id=1001, type="MASTER")}
+    result = infini_snapshots.SnapshotWorker(module, None, parents, {}).run(snapshot_spec)
+    assert result["action"] == "created"
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Infinidat <info@infinidat.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# pylint: disable=use-dict-literal,missing-function-docstring,wrong-import-position
+
+""" Unit tests of infini_vols' change planning """
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip('ansible')
+capacity = pytest.importorskip('capacity')
+
+from ansible_collections.infinidat.infinibox.plugins.modules import infini_vols
+
+
+class FakeModule:
+    def __init__(self, check_mode=False, volumes=()):
+        self.params = dict(state='present', volumes=list(volumes))
+        self.check_mode = check_mode
+        self.result = None
+
+    def fail_json(self, **kwargs):
+        self.result = kwargs
+        raise AssertionError(kwargs['msg'])
+
+
+class FakeBinder:
+    def __init__(self):
+        self.created = []
+
+    def get_by_id_lazy(self, object_id):
+        return object_id
+
+    def create(self, **fields):
+        self.created.append(fields)
+
+
+class FakeSystem:
+    def __init__(self):
+        self.pools = FakeBinder()
+        self.volumes = FakeBinder()
+
+
+def get_volume_spec(**fields):
+    return dict(dict(name='vol1', size='1GB', thin_provision=True, write_protected=False, pool='pool1', state=None), **fields)
+
+
+def get_current(**fields):
+    return dict(dict(id=1001, name='vol1', size=1000000000, provtype='THIN', write_protected=False, pool_id=1, type='MASTER', lock_state='UNLOCKED'), **fields)
+
+
+def test_plan_volume_changes_without_changes():
+    assert infini_vols.plan_volume_changes(get_volume_spec(), get_current(size=1000013824)) == {}
+
+
+def test_plan_volume_changes():
+    updates = infini_vols.plan_volume_changes(get_volume_spec(thin_provision=False, write_protected=True), get_current(size=1000013824))
+    assert updates == dict(provtype='THICK', write_protected=True)
+
+
+def test_plan_volume_changes_ignores_fields_not_specified():
+    volume_spec = get_volume_spec(size=None, thin_provision=None, write_protected=None)
+    assert infini_vols.plan_volume_changes(volume_spec, get_current(provtype='THICK', write_protected=True)) == {}
+
+
+def test_failures_are_reported_per_volume(monkeypatch):
+    current_volumes = dict(
+        snap1=get_current(id=1002, name='snap1', size=1000013824, type='SNAPSHOT'),
+        vol3=get_current(id=1003, name='vol3', lock_state='LOCKED'),
+        vol4=get_current(id=1004, name='vol4'),
+    )
+    system = FakeSystem()
+    monkeypatch.setattr(infini_vols, 'get_system', lambda module: system)
+    monkeypatch.setattr(infini_vols, 'get_current_volumes', lambda module, system: current_volumes)
+    monkeypatch.setattr(infini_vols, 'get_pools', lambda module, system, volume_specs: dict(pool1=dict(id=1, name='pool1')))
+    module = FakeModule(check_mode=True, volumes=[
+        get_volume_spec(name='vol2'),
+        get_volume_spec(name='snap1', write_protected=True),
+        get_volume_spec(name='vol3', state='absent'),
+        get_volume_spec(name='vol4', state='absent'),
+    ])
+    with pytest.raises(AssertionError, match='2 of 4 volumes failed'):
+        infini_vols.handle_present_and_absent(module)
+    assert module.result['changed']
+    assert [(result['name'], result['changed'], result.get('failed', False)) for result in module.result['volumes']] == [
+        ('vol2', True, False),
+        ('snap1', False, True),
+        ('vol3', False, True),
+        ('vol4', True, False),
+    ]
+
+
+def test_create_volume_is_write_protected_on_creation():
+    system = FakeSystem()
+    infini_vols.create_volume(FakeModule(), system, get_volume_spec(write_protected=True), 1)
+    assert len(system.volumes.created) == 1
+    assert system.volumes.created[0]['write_protected'] is True
+    assert system.volumes.created[0]['provtype'] == 'THIN'
+
+
+def test_create_volume_defaults_to_thin_and_not_write_protected():
+    system = FakeSystem()
+    infini_vols.create_volume(FakeModule(), system, get_volume_spec(thin_provision=None, write_protected=None), 1)
+    assert system.volumes.created[0]['provtype'] == 'THIN'
+    assert system.volumes.created[0]['write_protected'] is False
+
+
+def test_create_volume_in_check_mode():
+    system = FakeSystem()
+    infini_vols.create_volume(FakeModule(check_mode=True), system, get_volume_spec(), 1)
+    assert not system.volumes.created